@@ -0,0 +1,119 @@
+# adminpanel/association.py
+"""
+"Frequently bought together" rules mined with Apriori over order baskets.
+
+Only single-item antecedents are needed for the product page, so mining
+stops at frequent pairs: one pass counts items, a second pass counts pairs
+made only of frequent items (the Apriori pruning step). Each product keeps
+its top-k rules by lift in ProductAssociation.
+"""
+import heapq
+from collections import Counter
+from itertools import combinations
+
+from django.db import transaction
+
+from .models import Order, OrderItem, ProductAssociation
+
+
+def iter_order_baskets(chunk_size=5000):
+    """Stream each non-cancelled order's distinct product ids as a tuple."""
+    rows = (
+        OrderItem.objects.exclude(order__fulfillment_status=Order.CANCELLED)
+        .exclude(product__isnull=True)
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    current_order, basket = None, set()
+    for order_id, product_id in rows:
+        if order_id != current_order:
+            if basket:
+                yield tuple(basket)
+            current_order, basket = order_id, set()
+        basket.add(product_id)
+    if basket:
+        yield tuple(basket)
+
+
+def mine_pair_rules(basket_source, min_support=0.001, min_confidence=0.05, min_lift=1.0,
+                    top_k=5):
+    """
+    Mine rules A -> B from the baskets produced by `basket_source()`.
+
+    `basket_source` is called twice (once per Apriori pass) and must return
+    a fresh iterable of baskets each time, so baskets never need to be held
+    in memory. Returns {product_id: [(recommended_id, support, confidence, lift), ...]}
+    with at most `top_k` rules per product, best lift first. Rules with a lift
+    of `min_lift` or less are dropped: the pair is no more likely together
+    than apart.
+    """
+    item_counts = Counter()
+    basket_count = 0
+    for basket in basket_source():
+        item_counts.update(set(basket))
+        basket_count += 1
+    if not basket_count:
+        return {}
+
+    min_count = max(1, int(min_support * basket_count))
+    frequent = {item for item, count in item_counts.items() if count >= min_count}
+
+    pair_counts = Counter()
+    for basket in basket_source():
+        items = sorted(item for item in set(basket) if item in frequent)
+        if len(items) > 1:
+            pair_counts.update(combinations(items, 2))
+
+    best = {}
+    for (a, b), count in pair_counts.items():
+        if count < min_count:
+            continue
+        support = count / basket_count
+        for antecedent, consequent in ((a, b), (b, a)):
+            confidence = count / item_counts[antecedent]
+            if confidence < min_confidence:
+                continue
+            lift = confidence / (item_counts[consequent] / basket_count)
+            if lift <= min_lift:
+                continue
+            rule = (lift, confidence, support, consequent)
+            heap = best.setdefault(antecedent, [])
+            if len(heap) < top_k:
+                heapq.heappush(heap, rule)
+            else:
+                heapq.heappushpop(heap, rule)
+
+    return {
+        antecedent: [
+            (consequent, support, confidence, lift)
+            for lift, confidence, support, consequent in sorted(heap, reverse=True)
+        ]
+        for antecedent, heap in best.items()
+    }
+
+
+def store_rules(rules, batch_size=2000):
+    """Replace the stored rules with `rules`; returns the number written."""
+    objects = [
+        ProductAssociation(
+            product_id=product_id, recommended_id=recommended_id, rank=rank,
+            support=support, confidence=confidence, lift=lift,
+        )
+        for product_id, product_rules in rules.items()
+        for rank, (recommended_id, support, confidence, lift) in enumerate(product_rules, start=1)
+    ]
+    with transaction.atomic():
+        ProductAssociation.objects.all().delete()
+        ProductAssociation.objects.bulk_create(objects, batch_size=batch_size)
+    return len(objects)
+
+
+def frequently_bought_with(product, limit=5):
+    """In-stock products most often bought with `product` (one indexed query)."""
+    associations = (
+        ProductAssociation.objects.filter(product=product, recommended__stock__gt=0)
+        .select_related('recommended')
+        .order_by('rank')[:limit]
+    )
+    return [association.recommended for association in associations]
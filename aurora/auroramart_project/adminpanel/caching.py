@@ -0,0 +1,40 @@
+# adminpanel/caching.py
+"""
+Shared cache version counters.
+
+Each named version lives in Django's cache. Writers bump it (usually from a
+model signal) and readers fold it into their cache keys or compare it with
+the version of a process-local structure, so every worker notices the change
+without any database traffic.
+"""
+import time
+
+from django.core.cache import cache
+
+# Bumped whenever any Product changes
+CATALOGUE_VERSION = 'catalogue'
+
+
+def _version_key(name):
+    return f'aurora:version:{name}'
+
+
+def get_version(name):
+    """Return the current version for `name`, creating it on first use."""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old value
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Invalidate everything keyed on `name` and return the new version."""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_version(name)
+        return cache.incr(key)
@@ -0,0 +1,182 @@
+# adminpanel/exports.py
+"""
+Streaming exports of the admin grids as CSV or Parquet.
+
+Rows are read with values_list().iterator(chunk_size=...) and encoded a chunk
+at a time, so memory stays flat whatever the row count and the first bytes
+reach the browser as soon as the first chunk is read. Parquet output (one row
+group per chunk) needs pyarrow, which is optional.
+
+Product and customer columns use the importers' field names, so an export
+can be edited and imported back.
+"""
+import csv
+import io
+
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = ('csv', 'parquet')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ExportUnavailable(Exception):
+    """The requested format cannot be produced (e.g. pyarrow is not installed)."""
+
+
+class ExportSpec:
+    """The columns of one export: (header, values_list lookup, type) triples."""
+
+    def __init__(self, name, columns, extra_ordering=()):
+        self.name = name
+        self.columns = columns
+        # Appended to the grid's ordering, e.g. to keep an order's lines together
+        self.extra_ordering = tuple(extra_ordering)
+
+    @property
+    def headers(self):
+        return [header for header, _, _ in self.columns]
+
+    def rows(self, queryset, ordering, chunk_size=EXPORT_CHUNK_SIZE):
+        """Yield lists of up to `chunk_size` row tuples."""
+        lookups = [lookup for _, lookup, _ in self.columns]
+        rows = queryset.order_by(*ordering, *self.extra_ordering).values_list(*lookups)
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+PRODUCT_EXPORT = ExportSpec('products', [
+    ('sku', 'sku', 'str'),
+    ('name', 'name', 'str'),
+    ('description', 'description', 'str'),
+    ('category', 'category', 'str'),
+    ('subcategory', 'subcategory', 'str'),
+    ('price', 'price', 'decimal'),
+    ('rating', 'rating', 'decimal'),
+    ('stock', 'stock', 'int'),
+    ('reorder_threshold', 'reorder_threshold', 'int'),
+])
+
+CUSTOMER_EXPORT = ExportSpec('customers', [
+    ('email', 'email', 'str'),
+    ('name', 'name', 'str'),
+    ('age', 'age', 'int'),
+    ('gender', 'gender', 'str'),
+    ('employment_status', 'employment_status', 'str'),
+    ('occupation', 'occupation', 'str'),
+    ('education', 'education', 'str'),
+    ('household_size', 'household_size', 'int'),
+    ('has_children', 'has_children', 'bool'),
+    ('monthly_income_sgd', 'monthly_income_sgd', 'decimal'),
+    ('preferred_category', 'preferred_category', 'str'),
+])
+
+# One row per order line; orders without lines get one row with blank line columns
+ORDER_EXPORT = ExportSpec('orders', [
+    ('order_id', 'id', 'int'),
+    ('placed_at', 'placed_at', 'datetime'),
+    ('fulfillment_status', 'fulfillment_status', 'str'),
+    ('customer_email', 'customer__email', 'str'),
+    ('total_amount', 'total_amount', 'decimal'),
+    ('shipping_address', 'shipping_address', 'str'),
+    ('sku', 'items__product__sku', 'str'),
+    ('product_name', 'items__product__name', 'str'),
+    ('quantity', 'items__quantity', 'int'),
+    ('unit_price', 'items__unit_price', 'decimal'),
+], extra_ordering=['items__id'])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(spec, queryset, ordering, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV export as one string per chunk, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.headers)
+    yield buffer.getvalue()
+    for chunk in spec.rows(queryset, ordering, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ByteSink(io.RawIOBase):
+    """A write-only file that hands its bytes back on drain()."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def stream_parquet(spec, queryset, ordering, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the Parquet export as bytes, one row group per chunk."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ExportUnavailable("Parquet export needs pyarrow, which is not installed.") from exc
+
+    types = {
+        'str': pa.string(),
+        'int': pa.int64(),
+        'bool': pa.bool_(),
+        'decimal': pa.decimal128(14, 2),
+        'datetime': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(header, types[kind]) for header, _, kind in spec.columns])
+
+    def generate():
+        sink = _ByteSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for chunk in spec.rows(queryset, ordering, chunk_size):
+                columns = [list(values) for values in zip(*chunk)]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                yield sink.drain()
+        # Closing the writer wrote the footer
+        yield sink.drain()
+
+    return generate()
+
+
+def stream_export(spec, queryset, ordering, fmt='csv', chunk_size=EXPORT_CHUNK_SIZE):
+    if fmt == 'parquet':
+        return stream_parquet(spec, queryset, ordering, chunk_size)
+    return stream_csv(spec, queryset, ordering, chunk_size)
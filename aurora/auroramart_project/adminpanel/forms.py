@@ -1,6 +1,8 @@
 # adminpanel/forms.py
 from django import forms
-from .models import Customer, Product, Order
+from .models import Customer, Product, Order, SalesFactDaily
+from . import ml
+from .widgets import CustomerAutocompleteWidget
 
 class CustomerForm(forms.ModelForm):
     class Meta:
@@ -13,6 +15,25 @@ class CustomerForm(forms.ModelForm):
             'has_children', 'monthly_income_sgd', 'preferred_category'
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Left blank, the active model fills it in from the profile fields
+        self.fields['preferred_category'].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('preferred_category') and not self.errors:
+            try:
+                category = ml.predict_preferred_category([cleaned_data])[0]
+            except ml.ModelUnavailable:
+                self.add_error('preferred_category', 'No active model to predict this; please choose one.')
+            else:
+                if category is None:
+                    self.add_error('preferred_category', 'The model has no prediction for this customer; please choose one.')
+                else:
+                    cleaned_data['preferred_category'] = category
+        return cleaned_data
+
 class ProductForm(forms.ModelForm):
     # ... (This form remains the same) ...
     class Meta:
@@ -22,6 +43,15 @@ class ProductForm(forms.ModelForm):
             'price', 'rating', 'stock', 'reorder_threshold', 'image'
         ]
 
+class ProductImportForm(forms.Form):
+    file = forms.FileField(label="Catalogue CSV", help_text="Rows are matched to existing products by SKU.")
+
+class SalesReportForm(forms.Form):
+    level = forms.ChoiceField(label="Break down by", choices=SalesFactDaily.LEVEL_CHOICES, required=False)
+    period = forms.ChoiceField(choices=[('month', 'Month'), ('quarter', 'Quarter')], required=False)
+    start = forms.DateField(label="From", required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(label="To", required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
 class OrderForm(forms.ModelForm):
     # ... (This form remains the same) ...
     class Meta:
@@ -33,5 +63,6 @@ class OrderForm(forms.ModelForm):
             'total_amount',
         ]
         widgets = {
-            'customer': forms.Select(attrs={'class': 'form-control'}),
+            # Searches as you type; a Select would render every customer
+            'customer': CustomerAutocompleteWidget(),
         }
\ No newline at end of file
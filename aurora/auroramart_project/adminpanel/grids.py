@@ -0,0 +1,357 @@
+# adminpanel/grids.py
+"""
+Server-side data grids for the admin list pages.
+
+A grid turns the request's query string into a filtered, sorted queryset and
+serves it a page at a time with keyset cursors (see pagination.py), so a list
+page costs the same whether the table holds a hundred rows or a million. The
+same grid renders the first page into the template and answers the JSON
+endpoint the page calls to load further pages.
+"""
+from urllib.parse import urlencode
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+
+from storefront.categories import get_tree as get_category_tree
+
+from .models import Customer, Order, OrderItem, Product
+from .pagination import CursorPaginator, InvalidCursor, count_results
+
+# Stop counting after this many matches and show "10000+"
+GRID_COUNT_LIMIT = 10000
+
+
+class DataGrid:
+    """
+    Base grid. Subclasses set the model, the sort orderings (each ending in
+    a unique column), the filters, and row() for the JSON payload.
+    """
+    model = None
+    orderings = {}
+    default_sort = ''
+    # Query parameter -> field; several values (?gender=Male&gender=Female) OR together
+    choice_filters = {}
+    # Query parameter prefix -> field; read as <prefix>_min / <prefix>_max
+    range_filters = {}
+    # Query parameter -> Q object applied when the parameter is set (?low_stock=1)
+    flag_filters = {}
+    # Query parameter prefix -> datetime field; read as <prefix>_from / <prefix>_to
+    # (inclusive dates in the current time zone)
+    date_filters = {}
+    per_page = 50
+    max_per_page = 200
+
+    def __init__(self, params, queryset=None):
+        self.params = params
+        self.sort = params.get('sort', '')
+        if self.sort not in self.orderings:
+            self.sort = self.default_sort
+        self.ordering = self.orderings[self.sort]
+        try:
+            per_page = int(params.get('per_page', self.per_page))
+        except ValueError:
+            per_page = self.per_page
+        self.per_page = max(1, min(per_page, self.max_per_page))
+        self.filters = {}
+        self.queryset = self.filter_queryset(
+            queryset if queryset is not None else self.model._default_manager.all()
+        )
+
+    def _field(self, name):
+        return self.model._meta.get_field(name)
+
+    def filter_queryset(self, queryset):
+        """Apply the filters present in the query string."""
+        queryset = self.apply_date_filters(self.apply_range_filters(queryset))
+        for param, condition in self.flag_filters.items():
+            if self.params.get(param):
+                self.filters[param] = '1'
+                queryset = queryset.filter(condition)
+        for param, field_name in self.choice_filters.items():
+            valid = {value for value, _ in self._field(field_name).choices}
+            values = [value for value in self.params.getlist(param) if value in valid]
+            if values:
+                self.filters[param] = values
+                queryset = queryset.filter(self.choice_condition(field_name, values))
+        return queryset
+
+    def choice_condition(self, field_name, values):
+        """The Q object for a choice filter; override to filter on another column."""
+        return Q(**{f'{field_name}__in': values})
+
+    def apply_date_filters(self, queryset):
+        for prefix, field_name in self.date_filters.items():
+            for suffix, lookup, days in (('from', 'gte', 0), ('to', 'lt', 1)):
+                param = f'{prefix}_{suffix}'
+                raw = self.params.get(param, '').strip()
+                try:
+                    day = date.fromisoformat(raw)
+                except ValueError:
+                    continue
+                self.filters[param] = raw
+                # Whole days: <prefix>_to=2024-05-31 includes everything on the 31st
+                boundary = timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+                queryset = queryset.filter(**{f'{field_name}__{lookup}': boundary})
+        return queryset
+
+    def apply_range_filters(self, queryset):
+        for prefix, field_name in self.range_filters.items():
+            field = self._field(field_name)
+            for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+                param = f'{prefix}_{suffix}'
+                raw = self.params.get(param, '').strip()
+                if not raw:
+                    continue
+                try:
+                    value = field.to_python(raw)
+                except ValidationError:
+                    continue
+                self.filters[param] = raw
+                queryset = queryset.filter(**{f'{field_name}__{lookup}': value})
+        return queryset
+
+    def choice_options(self):
+        """The choice filters as (param, label, [(value, label, selected), ...]) for a filter form."""
+        options = []
+        for param, field_name in self.choice_filters.items():
+            field = self._field(field_name)
+            selected = self.filters.get(param, [])
+            options.append((param, field.verbose_name.capitalize(), [
+                (value, label, value in selected) for value, label in field.choices
+            ]))
+        return options
+
+    def count(self):
+        """Return (count, is_exact) for the filtered rows."""
+        return count_results(self.queryset, GRID_COUNT_LIMIT)
+
+    def page_queryset(self):
+        """The queryset rows are read from; add joins and per-row annotations here, not to counts."""
+        return self.queryset
+
+    def page(self):
+        paginator = CursorPaginator(self.page_queryset(), self.ordering, self.per_page)
+        try:
+            return paginator.page(self.params.get('cursor', ''))
+        except InvalidCursor:
+            return paginator.page()
+
+    def query_string(self, **overrides):
+        """The current sort and filters as a query string, with `overrides` applied."""
+        params = [('sort', self.sort)] if self.sort != self.default_sort else []
+        for param, value in self.filters.items():
+            for item in value if isinstance(value, list) else [value]:
+                params.append((param, item))
+        params = [(key, value) for key, value in params if key not in overrides]
+        params += [(key, value) for key, value in overrides.items() if value not in (None, '')]
+        return urlencode(params)
+
+    def sort_links(self):
+        """For each column sort key, the query string that sorts by it (toggling direction)."""
+        links = {}
+        for key in self.orderings:
+            base = key.lstrip('-')
+            target = f'-{base}' if self.sort == base else base
+            if target not in self.orderings:
+                target = key
+            links[base] = self.query_string(sort=target, cursor=None)
+        return links
+
+    def row(self, obj):
+        raise NotImplementedError
+
+    def as_json(self, page):
+        return {
+            'success': True,
+            'results': [self.row(obj) for obj in page],
+            'next_cursor': page.next_cursor,
+        }
+
+
+class CustomerGrid(DataGrid):
+    model = Customer
+    orderings = {
+        '-id': ('-id',),
+        'id': ('id',),
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+        'age': ('age', 'id'),
+        '-age': ('-age', '-id'),
+        'income': ('monthly_income_sgd', 'id'),
+        '-income': ('-monthly_income_sgd', '-id'),
+    }
+    default_sort = '-id'
+    choice_filters = {
+        'gender': 'gender',
+        'employment_status': 'employment_status',
+        'education': 'education',
+        'preferred_category': 'preferred_category',
+    }
+    range_filters = {
+        'age': 'age',
+        'income': 'monthly_income_sgd',
+    }
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).only(
+            'id', 'name', 'email', 'age', 'gender', 'employment_status',
+            'monthly_income_sgd', 'preferred_category',
+        )
+
+    def row(self, customer):
+        return {
+            'id': customer.pk,
+            'cID': customer.cID,
+            'name': customer.name,
+            'email': customer.email,
+            'age': customer.age,
+            'gender': customer.gender,
+            'employment_status': customer.get_employment_status_display(),
+            'monthly_income_sgd': str(customer.monthly_income_sgd),
+            'preferred_category': customer.get_preferred_category_display(),
+            'url': reverse('adminpanel:customer_detail', args=[customer.pk]),
+        }
+
+
+class ProductGrid(DataGrid):
+    model = Product
+    orderings = {
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'stock': ('stock', 'id'),
+        '-stock': ('-stock', '-id'),
+        'id': ('id',),
+        '-id': ('-id',),
+    }
+    default_sort = 'name'
+    choice_filters = {
+        'category': 'category',
+        'subcategory': 'subcategory',
+    }
+    range_filters = {
+        'price': 'price',
+    }
+    flag_filters = {
+        'low_stock': Q(stock__lte=F('reorder_threshold')),
+    }
+
+    def filter_queryset(self, queryset):
+        self.unfaceted_queryset = self.apply_range_filters(queryset)
+        return super().filter_queryset(queryset).only(
+            'id', 'sku', 'name', 'category', 'subcategory', 'price', 'stock', 'reorder_threshold',
+        )
+
+    def choice_condition(self, field_name, values):
+        # The filters take names; the indexed columns are the category links
+        tree = get_category_tree()
+        if field_name == 'category':
+            return Q(category_ref__in=tree.category_ids(values))
+        return Q(subcategory_ref__in=tree.subcategory_ids(values))
+
+    def facets(self):
+        """
+        Counts for each category, subcategory and the low-stock flag, from one
+        query grouped by the (category, subcategory) links. Each facet is
+        counted under the other facets' current selections, as usual for
+        faceted search.
+        """
+        rows = self.unfaceted_queryset.order_by().values('category_ref', 'subcategory_ref').annotate(
+            total=Count('id'),
+            low=Count('id', filter=self.flag_filters['low_stock']),
+        )
+        tree = get_category_tree()
+        categories = set(self.filters.get('category', []))
+        subcategories = set(self.filters.get('subcategory', []))
+        low_only = 'low_stock' in self.filters
+
+        category_counts = Counter()
+        subcategory_counts = Counter()
+        low_stock = 0
+        for row in rows:
+            count = row['low'] if low_only else row['total']
+            category = tree.category_name(row['category_ref'])
+            subcategory = tree.subcategory_name(row['subcategory_ref'])
+            in_category = not categories or category in categories
+            in_subcategory = not subcategories or subcategory in subcategories
+            if in_subcategory:
+                category_counts[category] += count
+            if in_category:
+                subcategory_counts[subcategory] += count
+            if in_category and in_subcategory:
+                low_stock += row['low']
+        return {
+            'category': category_counts,
+            'subcategory': subcategory_counts,
+            'low_stock': low_stock,
+        }
+
+    def faceted_choice_options(self, facets):
+        """choice_options() labelled with `facets` counts; empty subcategories are left out."""
+        options = []
+        for param, label, choices in super().choice_options():
+            counts = facets[param]
+            options.append((param, label, [
+                (value, f'{option_label} ({counts[value]})', selected)
+                for value, option_label, selected in choices
+                if counts[value] or selected or param == 'category'
+            ]))
+        return options
+
+    def row(self, product):
+        return {
+            'id': product.pk,
+            'sku': product.sku,
+            'name': product.name,
+            'category': product.category,
+            'subcategory': product.subcategory,
+            'price': str(product.price),
+            'stock': product.stock,
+            'low_stock': product.stock <= product.reorder_threshold,
+            'url': reverse('adminpanel:product_detail', args=[product.pk]),
+        }
+
+
+class OrderGrid(DataGrid):
+    model = Order
+    orderings = {
+        '-placed_at': ('-placed_at', '-id'),
+        'placed_at': ('placed_at', 'id'),
+    }
+    default_sort = '-placed_at'
+    choice_filters = {
+        'status': 'fulfillment_status',
+    }
+    date_filters = {
+        'placed': 'placed_at',
+    }
+
+    def page_queryset(self):
+        # The item count is a correlated subquery, so it is only evaluated
+        # for the rows on the page
+        item_count = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+            count=Count('id')
+        ).values('count')
+        return self.queryset.select_related('customer').annotate(
+            item_count=Coalesce(Subquery(item_count), 0)
+        )
+
+    def row(self, order):
+        return {
+            'id': order.pk,
+            'oID': order.oID,
+            'customer': order.customer.name if order.customer else None,
+            'placed_at': timezone.localtime(order.placed_at).strftime('%Y-%m-%d %H:%M'),
+            'status': order.get_fulfillment_status_display(),
+            'item_count': order.item_count,
+            'total_amount': str(order.total_amount),
+            'url': reverse('adminpanel:order_detail', args=[order.pk]),
+        }
@@ -0,0 +1,340 @@
+# adminpanel/importers.py
+"""
+Streaming bulk importers for catalogue and customer files.
+
+Rows are read one at a time (CSV via the csv module, or JSON Lines) and
+validated with the model fields' own clean() (so choices, lengths and
+decimal places are enforced exactly as in the ModelForms), then upserted on
+the model's natural key in fixed-size batches, each in its own transaction.
+Memory stays bounded by the batch size whatever the file size, and an
+interrupted run can be resumed from the last committed row.
+
+bulk_create() does not send post_save, so after each product batch the
+`products_imported` signal carries the batch's product ids to whoever keeps
+derived data (search index, cart totals, caches) in sync.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import kpis, ml
+from .models import (
+    CATEGORY_CHOICES, EDUCATION_CHOICES, EMPLOYMENT_CHOICES, GENDER_CHOICES,
+    PRODUCT_CATEGORY_CHOICES, PRODUCT_SUBCATEGORY_CHOICES, Customer, Product,
+)
+from .signals import products_imported
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+
+class ImportFormatError(Exception):
+    """The file cannot be imported at all (e.g. a required column is missing)."""
+
+
+@dataclass
+class ImportResult:
+    start_row: int = 0
+    rows: int = 0
+    imported: int = 0
+    labelled: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+    # Data rows, counted from the first, that are committed or rejected;
+    # pass it back as start_row to resume an interrupted run
+    committed_rows: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def tick(self):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def _choice_lookup(choices):
+    """Map each choice's value and label, case-folded, to the stored value."""
+    lookup = {}
+    for value, label in choices:
+        lookup[value.casefold()] = value
+        lookup[label.casefold()] = value
+    return lookup
+
+
+class RowSpec:
+    """How to read, validate and upsert one model's rows."""
+
+    def __init__(self, model, key, aliases, choices, optional=()):
+        self.model = model
+        self.key = key
+        self.aliases = aliases
+        self.optional = set(optional)
+        self.choice_lookups = {name: _choice_lookup(values) for name, values in choices.items()}
+        self.fields = {name: model._meta.get_field(name) for name in aliases}
+        self.update_fields = [name for name in aliases if name != key]
+
+    def column_map(self, fieldnames):
+        """Map each field to its column name, given the file's column names."""
+        columns = {name.strip().lower().replace(' ', '_'): name for name in fieldnames or []}
+        mapping = {}
+        for field_name, aliases in self.aliases.items():
+            column = next((columns[alias] for alias in aliases if alias in columns), None)
+            if column is None and field_name not in self.optional:
+                raise ImportFormatError(f"Missing column for '{field_name}'.")
+            mapping[field_name] = column
+        return mapping
+
+    def clean_value(self, field_name, raw):
+        """Validate one field's value and return it, or raise ValidationError."""
+        if field_name in self.choice_lookups and raw is not None:
+            raw = self.choice_lookups[field_name].get(str(raw).casefold(), raw)
+        try:
+            return self.fields[field_name].clean('' if raw is None else raw, None)
+        except ValidationError as exc:
+            raise ValidationError({field_name: exc.messages})
+
+    def clean(self, row, column_map):
+        """Validate one row and return an unsaved instance, or raise ValidationError."""
+        values = {}
+        errors = {}
+        for field_name, column in column_map.items():
+            raw = row.get(column) if column else None
+            if isinstance(raw, str):
+                raw = raw.strip()
+            if raw in (None, '') and field_name in self.optional:
+                continue
+            try:
+                values[field_name] = self.clean_value(field_name, raw)
+            except ValidationError as exc:
+                errors.update(exc.message_dict)
+        if errors:
+            raise ValidationError(errors)
+        return self.model(**values)
+
+    def upsert(self, instances):
+        self.model.objects.bulk_create(
+            instances,
+            update_conflicts=True,
+            unique_fields=[self.key],
+            update_fields=self.update_fields,
+        )
+
+
+# Header spellings accepted for each field, after lower-casing and replacing
+# spaces with underscores. For products the first names are the ones used by
+# b2c_products_500.csv before the model fields were renamed.
+PRODUCT_SPEC = RowSpec(
+    Product,
+    key='sku',
+    aliases={
+        'sku': ['sku_code', 'sku'],
+        'name': ['product_name', 'name'],
+        'description': ['product_description', 'description'],
+        'category': ['product_category', 'category'],
+        'subcategory': ['product_subcategory', 'subcategory'],
+        'price': ['unit_price', 'price'],
+        'rating': ['product_rating', 'rating'],
+        'stock': ['quantity_on_hand', 'stock'],
+        'reorder_threshold': ['reorder_quantity', 'reorder_threshold'],
+    },
+    choices={
+        'category': PRODUCT_CATEGORY_CHOICES,
+        'subcategory': PRODUCT_SUBCATEGORY_CHOICES,
+    },
+)
+
+CUSTOMER_SPEC = RowSpec(
+    Customer,
+    key='email',
+    aliases={
+        'email': ['email', 'email_address'],
+        'name': ['name', 'customer_name', 'full_name'],
+        'age': ['age'],
+        'gender': ['gender'],
+        'employment_status': ['employment_status'],
+        'occupation': ['occupation'],
+        'education': ['education'],
+        'household_size': ['household_size'],
+        'has_children': ['has_children'],
+        'monthly_income_sgd': ['monthly_income_sgd', 'monthly_income'],
+        'preferred_category': ['preferred_category'],
+    },
+    choices={
+        'gender': GENDER_CHOICES,
+        'employment_status': EMPLOYMENT_CHOICES,
+        'education': EDUCATION_CHOICES,
+        'preferred_category': CATEGORY_CHOICES,
+    },
+    # Only required when the active model is not labelling the import
+    optional=['preferred_category'],
+)
+
+
+def format_for(path):
+    """Guess the import format from a file name."""
+    return 'jsonl' if str(path).lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(lines, fmt='csv'):
+    """
+    Return (column_names, rows) for `lines`, where rows lazily yields
+    (line_number, mapping) pairs. JSON Lines files have no header, so their
+    column names are None.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        return reader.fieldnames, ((reader.line_num, row) for row in reader)
+    if fmt == 'jsonl':
+        return None, _read_json_lines(lines)
+    raise ImportFormatError(f"Unsupported format '{fmt}'.")
+
+
+def _read_json_lines(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = exc
+        yield line_number, row
+
+
+def _error_message(exc):
+    return '; '.join(f"{name}: {' '.join(messages)}" for name, messages in exc.message_dict.items())
+
+
+def _run_import(spec, lines, fmt, batch_size, start_row, progress, flush, validate=None):
+    fieldnames, rows = read_rows(lines, fmt)
+    header_map = spec.column_map(fieldnames) if fmt == 'csv' else None
+    # JSON objects carry their own keys; most files repeat the same ones
+    column_maps = {}
+    result = ImportResult(start_row=start_row, committed_rows=start_row)
+    batch = {}
+
+    def commit():
+        # flush() may still reject rows, and reports how many it wrote
+        result.imported += flush(list(batch.values()), result)
+        result.committed_rows = start_row + result.rows
+        result.tick()
+        if progress:
+            progress(result)
+
+    for line_number, row in islice(rows, start_row, None):
+        result.rows += 1
+        try:
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"Not a JSON object: {row}")
+            column_map = header_map
+            if column_map is None:
+                keys = tuple(row)
+                if keys not in column_maps:
+                    column_maps[keys] = spec.column_map(keys)
+                column_map = column_maps[keys]
+            instance = spec.clean(row, column_map)
+            if validate:
+                validate(instance)
+        except ValidationError as exc:
+            result.add_error(line_number, _error_message(exc))
+            continue
+        except ImportFormatError as exc:
+            result.add_error(line_number, str(exc))
+            continue
+        # A repeated key within one batch keeps its last row; one upsert
+        # statement cannot touch the same row twice
+        batch[getattr(instance, spec.key)] = (line_number, instance)
+        if len(batch) >= batch_size:
+            commit()
+            batch = {}
+
+    if batch:
+        commit()
+    result.committed_rows = start_row + result.rows
+    result.tick()
+    return result
+
+
+def _flush_products(rows, result):
+    products = [product for _, product in rows]
+    for product in products:
+        # New rows start at their own rating; the storefront's
+        # products_imported listener folds in any review averages
+        product.display_rating = product.rating
+    with transaction.atomic():
+        PRODUCT_SPEC.upsert(products)
+        product_ids = [product.pk for product in products if product.pk is not None]
+        if len(product_ids) < len(products):
+            # Backends that cannot return ids from an upsert
+            product_ids = list(Product.objects.filter(
+                sku__in=[product.sku for product in products]
+            ).values_list('pk', flat=True))
+        products_imported.send(sender=Product, product_ids=product_ids)
+    return len(products)
+
+
+def import_products(lines, fmt='csv', batch_size=IMPORT_BATCH_SIZE, start_row=0, progress=None):
+    """
+    Upsert products by SKU from `lines` (CSV with a header row, or JSON Lines).
+
+    Invalid rows are skipped and reported in the result. The first
+    `start_row` data rows are skipped, to resume an interrupted run.
+    `progress`, if given, is called with the running ImportResult after
+    every committed batch.
+    """
+    result = _run_import(PRODUCT_SPEC, lines, fmt, batch_size, start_row, progress, _flush_products)
+    # bulk_create skipped the counter signals
+    kpis.reconcile()
+    return result
+
+
+def _require_preferred_category(customer):
+    if not customer.preferred_category:
+        raise ValidationError({'preferred_category': ["This field is required."]})
+
+
+def import_customers(lines, fmt='csv', batch_size=IMPORT_BATCH_SIZE, start_row=0, progress=None,
+                     label=False):
+    """
+    Upsert customers by email from `lines`, as import_products() does.
+
+    With `label`, customers without a preferred_category get one from the
+    active decision tree, in one vectorized predict() call per batch; a
+    prediction that is not one of the field's choices rejects the row.
+    Without it, a missing preferred_category rejects the row.
+    """
+    if label:
+        ml.get_model()  # fail before reading anything if there is no model
+
+    def flush(rows, result):
+        unlabelled = [(line_number, customer) for line_number, customer in rows if not customer.preferred_category]
+        if unlabelled:
+            categories = ml.predict_preferred_category([customer for _, customer in unlabelled])
+            for (line_number, customer), category in zip(unlabelled, categories):
+                try:
+                    customer.preferred_category = CUSTOMER_SPEC.clean_value('preferred_category', category)
+                except ValidationError as exc:
+                    result.add_error(line_number, f"{_error_message(exc)} (no usable prediction)")
+                else:
+                    result.labelled += 1
+        customers = [customer for _, customer in rows if customer.preferred_category]
+        with transaction.atomic():
+            CUSTOMER_SPEC.upsert(customers)
+        return len(customers)
+
+    validate = None if label else _require_preferred_category
+    result = _run_import(CUSTOMER_SPEC, lines, fmt, batch_size, start_row, progress, flush, validate)
+    kpis.reconcile()
+    return result
@@ -0,0 +1,131 @@
+# adminpanel/kpis.py
+"""
+Admin dashboard KPIs served from incrementally maintained counters.
+
+Model signals apply +1/-1 deltas to KpiCounter rows (totals, and one
+'segment:<category>' row per preferred category), so the dashboard reads a
+handful of small rows instead of counting whole tables. Bulk paths that skip
+signals (the importers, batch classification) and any drift are repaired by
+reconcile(), which the reconcile_kpis command runs periodically. The
+assembled dashboard payload is cached for a short TTL.
+"""
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Customer, DecisionTreeModel, KpiCounter, Order, Product
+
+CUSTOMERS = 'customers'
+PRODUCTS = 'products'
+ORDERS = 'orders'
+ACTIVE_MODELS = 'active_models'
+SEGMENT_PREFIX = 'segment:'
+
+DASHBOARD_CACHE_KEY = 'adminpanel:dashboard'
+DASHBOARD_CACHE_TIMEOUT = 30
+INVENTORY_ALERT_LIMIT = 10
+SEGMENT_SUMMARY_LIMIT = 5
+
+DASHBOARD_WIDGETS = ('kpis', 'segment_summary', 'inventory_alerts', 'model_status')
+
+
+def segment_counter(category):
+    return f'{SEGMENT_PREFIX}{category}'
+
+
+def adjust(name, delta):
+    """Add `delta` to counter `name`, creating it if needed."""
+    if not delta:
+        return
+    rows = KpiCounter.objects.filter(name=name)
+    if rows.update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            KpiCounter.objects.create(name=name, value=delta)
+    except IntegrityError:
+        # Another request created the row first; fall back to incrementing it
+        rows.update(value=F('value') + delta)
+
+
+def set_counter(name, value):
+    KpiCounter.objects.update_or_create(name=name, defaults={'value': value})
+
+
+def counters():
+    """All stored counters as {name: value}, in one query."""
+    return dict(KpiCounter.objects.values_list('name', 'value'))
+
+
+def actual_counters():
+    """Recount every counter from the source tables."""
+    actual = {
+        CUSTOMERS: Customer.objects.count(),
+        PRODUCTS: Product.objects.count(),
+        ORDERS: Order.objects.count(),
+        ACTIVE_MODELS: DecisionTreeModel.objects.filter(is_active=True).count(),
+    }
+    segments = Customer.objects.order_by().values('preferred_category').annotate(count=Count('id'))
+    for row in segments:
+        actual[segment_counter(row['preferred_category'])] = row['count']
+    return actual
+
+
+def reconcile():
+    """
+    Overwrite drifted counters with recounted values and return the drift as
+    {name: (stored, actual)}.
+    """
+    stored = counters()
+    actual = actual_counters()
+    drift = {}
+    for name in stored.keys() | actual.keys():
+        value = actual.get(name, 0)
+        if stored.get(name) != value:
+            drift[name] = (stored.get(name), value)
+            set_counter(name, value)
+    if drift:
+        cache.delete(DASHBOARD_CACHE_KEY)
+    return drift
+
+
+def build_dashboard():
+    values = counters()
+    segments = sorted(
+        (
+            {'preferred_category': name[len(SEGMENT_PREFIX):], 'count': count}
+            for name, count in values.items()
+            if name.startswith(SEGMENT_PREFIX) and count > 0
+        ),
+        key=lambda segment: (-segment['count'], segment['preferred_category']),
+    )
+    return {
+        'kpis': {
+            'total_customers': values.get(CUSTOMERS, 0),
+            'total_products': values.get(PRODUCTS, 0),
+            'total_orders': values.get(ORDERS, 0),
+            'active_models': values.get(ACTIVE_MODELS, 0),
+        },
+        'segment_summary': segments[:SEGMENT_SUMMARY_LIMIT],
+        # Served by the partial low-stock index
+        'inventory_alerts': list(
+            Product.objects.filter(stock__lte=F('reorder_threshold'))
+            .order_by('stock')
+            .values('id', 'name', 'sku', 'stock', 'reorder_threshold')[:INVENTORY_ALERT_LIMIT]
+        ),
+        'model_status': list(
+            DecisionTreeModel.objects.order_by('-training_date')
+            .values('model_name', 'version', 'accuracy', 'is_active', 'training_date')
+        ),
+    }
+
+
+def dashboard_payload(widget=None):
+    """The cached dashboard data, or just one of its DASHBOARD_WIDGETS."""
+    payload = cache.get(DASHBOARD_CACHE_KEY)
+    if payload is None:
+        payload = build_dashboard()
+        cache.set(DASHBOARD_CACHE_KEY, payload, DASHBOARD_CACHE_TIMEOUT)
+    if widget:
+        return {widget: payload[widget]}
+    return payload
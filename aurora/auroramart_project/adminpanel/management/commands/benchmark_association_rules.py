@@ -0,0 +1,64 @@
+import random
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from adminpanel.association import mine_pair_rules
+
+
+def synthetic_baskets(orders, products, seed):
+    """
+    Reproducible baskets: popularity follows a Zipf-like curve and every
+    product has a few companions it is often bought with, so real rules exist.
+    """
+    rng = random.Random(seed)
+    catalogue = range(products)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in catalogue))
+    companions = [
+        [other for other in rng.sample(catalogue, 4) if other != item] or [(item + 1) % products]
+        for item in catalogue
+    ]
+    baskets = []
+    for _ in range(orders):
+        size = min(1 + int(rng.expovariate(0.6)), 12)
+        anchor = rng.choices(catalogue, cum_weights=cum_weights)[0]
+        basket = {anchor}
+        while len(basket) < size:
+            if rng.random() < 0.5:
+                basket.add(rng.choice(companions[anchor]))
+            else:
+                basket.add(rng.choices(catalogue, cum_weights=cum_weights)[0])
+        baskets.append(tuple(basket))
+    return baskets
+
+
+class Command(BaseCommand):
+    help = "Benchmark the association-rule miner on synthetic baskets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help="Basket counts to benchmark.")
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--min-support', type=float, default=0.001)
+        parser.add_argument('--min-confidence', type=float, default=0.05)
+        parser.add_argument('--top-k', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=2108)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'orders':>10} {'seconds':>9} {'orders/s':>10} {'products':>9} {'rules':>7}")
+        for orders in options['orders']:
+            # Generated up front so only the miner is timed
+            baskets = synthetic_baskets(orders, options['products'], options['seed'])
+            started = time.perf_counter()
+            rules = mine_pair_rules(
+                lambda: baskets,
+                min_support=options['min_support'],
+                min_confidence=options['min_confidence'],
+                top_k=options['top_k'],
+            )
+            elapsed = time.perf_counter() - started
+            rule_count = sum(len(product_rules) for product_rules in rules.values())
+            self.stdout.write(
+                f"{orders:>10} {elapsed:>9.2f} {orders / elapsed:>10.0f} {len(rules):>9} {rule_count:>7}"
+            )
@@ -0,0 +1,47 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from adminpanel import reports
+from adminpanel.models import Order
+from adminpanel.sales import sale_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the daily sales fact table used by the reports page. With no options, "
+        "builds the days since the last run plus a short lookback (run nightly, e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--until', type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--full', action='store_true', help="Rebuild every day that has orders.")
+        parser.add_argument('--lookback', type=int, default=reports.SALES_FACT_LOOKBACK_DAYS,
+                            help="Days before the last built day to recompute.")
+
+    def handle(self, *args, **options):
+        if options['full'] or options['since'] or options['until']:
+            bounds = Order.objects.aggregate(first=Min('placed_at'), last=Max('placed_at'))
+            if bounds['first'] is None:
+                self.stdout.write("No orders to build.")
+                return
+            start = options['since'] or sale_date(bounds['first'])
+            end = options['until'] or sale_date(bounds['last'])
+            if start > end:
+                raise CommandError("--since is after --until.")
+        else:
+            pending = reports.pending_days(lookback=options['lookback'])
+            if pending is None:
+                self.stdout.write("Sales facts are up to date.")
+                return
+            start, end = pending
+
+        started = time.perf_counter()
+        rows = reports.build_sales_facts(start, end)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {rows} fact row(s) for {start} to {end} in {elapsed:.2f}s."
+        ))
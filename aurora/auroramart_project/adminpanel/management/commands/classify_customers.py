@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel import ml
+
+
+class Command(BaseCommand):
+    help = "Predict every customer's preferred_category with the active decision tree model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=ml.CLASSIFY_CHUNK_SIZE,
+                            help="Customers classified per predict() call.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            model = ml.get_model()
+            changed = ml.classify_customers(chunk_size=options['chunk_size'])
+        except ml.ModelUnavailable as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Classified customers with {model.record}; {changed} changed in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel import importers
+
+
+class Command(BaseCommand):
+    help = "Upsert products by SKU from a catalogue file (e.g. b2c_products_500.csv)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row, or a .jsonl file.")
+        parser.add_argument('--format', choices=importers.IMPORT_FORMATS,
+                            help="Defaults to jsonl for .jsonl/.ndjson files, otherwise csv.")
+        parser.add_argument('--batch-size', type=int, default=importers.IMPORT_BATCH_SIZE,
+                            help="Rows upserted per transaction.")
+        parser.add_argument('--start-row', type=int, default=0,
+                            help="Skip this many data rows, to resume an interrupted import.")
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        try:
+            with open(options['path'], newline='', encoding=options['encoding']) as handle:
+                result = importers.import_products(
+                    handle,
+                    fmt=options['format'] or importers.format_for(options['path']),
+                    batch_size=options['batch_size'],
+                    start_row=options['start_row'],
+                    progress=self.report_progress,
+                )
+        except (OSError, importers.ImportFormatError) as exc:
+            raise CommandError(str(exc))
+
+        self.report_errors(result)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} of {result.rows} row(s), {result.error_count} rejected, "
+            f"in {result.elapsed:.1f}s ({result.rows_per_second:,.0f} rows/s)."
+        ))
+
+    def report_progress(self, result):
+        if self.verbosity > 1:
+            self.stdout.write(
+                f"  {result.rows} rows, {result.rows_per_second:,.0f} rows/s "
+                f"(resume with --start-row {result.committed_rows})"
+            )
+
+    def report_errors(self, result):
+        for line_number, message in result.errors:
+            self.stderr.write(f"  line {line_number}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"  ... and {result.error_count - len(result.errors)} more.")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import association
+
+
+class Command(BaseCommand):
+    help = "Mine 'frequently bought together' rules from order baskets and store the top-k per product."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-support', type=float, default=0.001,
+                            help="Minimum fraction of baskets a pair must appear in.")
+        parser.add_argument('--min-confidence', type=float, default=0.05,
+                            help="Minimum P(B | A) for a rule A -> B.")
+        parser.add_argument('--min-lift', type=float, default=1.0,
+                            help="Rules must have a lift above this.")
+        parser.add_argument('--top-k', type=int, default=5,
+                            help="Rules kept per product.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rules = association.mine_pair_rules(
+            association.iter_order_baskets,
+            min_support=options['min_support'],
+            min_confidence=options['min_confidence'],
+            min_lift=options['min_lift'],
+            top_k=options['top_k'],
+        )
+        stored = association.store_rules(rules)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} rule(s) for {len(rules)} product(s) in {elapsed:.2f}s."
+        ))
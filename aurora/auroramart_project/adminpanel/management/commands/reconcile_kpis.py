@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from adminpanel import kpis
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard KPI counters and repair any drift (run periodically, e.g. from cron)."
+
+    def handle(self, *args, **options):
+        drift = kpis.reconcile()
+        for name, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{name}: {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled KPI counters; {len(drift)} corrected." if drift else "KPI counters are in sync."
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_sales_rollup(apps, schema_editor):
+    OrderItem = apps.get_model('adminpanel', 'OrderItem')
+    ProductSalesDaily = apps.get_model('adminpanel', 'ProductSalesDaily')
+    aggregated = (
+        OrderItem.objects.exclude(order__fulfillment_status='CANCELLED')
+        .exclude(product__isnull=True)
+        .annotate(day=TruncDate('order__placed_at'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'), revenue=Sum(F('quantity') * F('unit_price')))
+        .order_by()
+    )
+    ProductSalesDaily.objects.bulk_create(
+        [
+            ProductSalesDaily(product_id=row['product_id'], date=row['day'], units=row['units'], revenue=row['revenue'])
+            for row in aggregated
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0003_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='adminpanel.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'product', 'units'], name='sales_daily_window_idx')],
+                'unique_together': {('product', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_kpi_counters(apps, schema_editor):
+    Customer = apps.get_model('adminpanel', 'Customer')
+    Product = apps.get_model('adminpanel', 'Product')
+    Order = apps.get_model('adminpanel', 'Order')
+    DecisionTreeModel = apps.get_model('adminpanel', 'DecisionTreeModel')
+    KpiCounter = apps.get_model('adminpanel', 'KpiCounter')
+
+    values = {
+        'customers': Customer.objects.count(),
+        'products': Product.objects.count(),
+        'orders': Order.objects.count(),
+        'active_models': DecisionTreeModel.objects.filter(is_active=True).count(),
+    }
+    segments = Customer.objects.order_by().values('preferred_category').annotate(count=Count('id'))
+    for row in segments:
+        values[f"segment:{row['preferred_category']}"] = row['count']
+    KpiCounter.objects.bulk_create([KpiCounter(name=name, value=value) for name, value in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0009_customer_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KpiCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_kpi_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0010_kpi_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesFactDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('month', models.DateField()),
+                ('level', models.CharField(choices=[('segment', 'Customer Segment'), ('category', 'Category'), ('subcategory', 'Subcategory')], max_length=20)),
+                ('segment', models.CharField(blank=True, max_length=50)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('subcategory', models.CharField(blank=True, max_length=100)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['level', 'date'], name='sales_fact_level_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'level', 'segment', 'category', 'subcategory'), name='sales_fact_cell_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils.text import slugify
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_category_links(apps, schema_editor):
+    Product = apps.get_model('adminpanel', 'Product')
+    Category = apps.get_model('storefront', 'Category')
+    SubCategory = apps.get_model('storefront', 'SubCategory')
+
+    # Every (category, subcategory) string pair in use needs a row to point at
+    pairs = Product.objects.order_by().values_list('category', 'subcategory').distinct()
+    for category_name, subcategory_name in pairs:
+        category, _ = Category.objects.get_or_create(
+            name=category_name, defaults={'slug': slugify(category_name)},
+        )
+        SubCategory.objects.get_or_create(
+            category=category, name=subcategory_name, defaults={'slug': slugify(subcategory_name)},
+        )
+
+    category_id = Subquery(
+        Category.objects.filter(name=OuterRef('category')).values('pk')[:1]
+    )
+    subcategory_id = Subquery(
+        SubCategory.objects.filter(
+            category__name=OuterRef('category'), name=OuterRef('subcategory'),
+        ).order_by('pk').values('pk')[:1]
+    )
+    # One transaction per primary-key range, so a large catalogue is never
+    # locked for the whole backfill
+    last_pk = Product.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk + 1, BACKFILL_BATCH_SIZE):
+        with transaction.atomic():
+            Product.objects.filter(
+                pk__gte=start, pk__lt=start + BACKFILL_BATCH_SIZE,
+            ).update(category_ref=category_id, subcategory_ref=subcategory_id)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('adminpanel', '0013_product_category_links'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category_links, migrations.RunPython.noop),
+    ]
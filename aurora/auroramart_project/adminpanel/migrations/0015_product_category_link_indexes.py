@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0014_backfill_product_category_links'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_cat_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_cat_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_cat_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_subcat_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_admin_cat_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_admin_subcat_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_facet_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_instock_facet_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', '-rating', '-id'], name='product_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', 'price', 'id'], name='product_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', 'id'], name='product_cat_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['subcategory_ref', '-rating', '-id'], name='product_subcat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', 'subcategory_ref', 'price', 'rating'], name='product_instock_facet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category_ref', 'name', 'id'], name='product_admin_cat_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['subcategory_ref', 'name', 'id'], name='product_admin_subcat_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category_ref', 'subcategory_ref', 'stock', 'reorder_threshold'], name='product_facet_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0015_product_category_link_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_instock_price_idx',
+        ),
+    ]
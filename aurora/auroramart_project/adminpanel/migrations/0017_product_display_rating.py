@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0016_drop_redundant_product_price_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='display_rating',
+            field=models.DecimalField(decimal_places=1, default=0, editable=False, max_digits=3),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:14
+
+from django.db import migrations, transaction
+from django.db.models import DecimalField, F, FloatField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_display_ratings(apps, schema_editor):
+    Product = apps.get_model('adminpanel', 'Product')
+    ProductReviewStats = apps.get_model('storefront', 'ProductReviewStats')
+
+    # The review average rounded half up to one place, as
+    # storefront.models.review_average() computes it
+    tenths = (20 * F('review_sum') + F('review_count')) / NullIf(2 * F('review_count'), 0)
+    average = ProductReviewStats.objects.filter(product=OuterRef('pk')).annotate(
+        value=Cast(tenths, FloatField()) / Value(10.0),
+    ).values('value')[:1]
+    display_rating = Coalesce(
+        Subquery(average, output_field=DecimalField(max_digits=3, decimal_places=1)), F('rating'),
+    )
+    # One transaction per primary-key range, so a large catalogue is never
+    # locked for the whole backfill
+    last_pk = Product.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk + 1, BACKFILL_BATCH_SIZE):
+        with transaction.atomic():
+            Product.objects.filter(
+                pk__gte=start, pk__lt=start + BACKFILL_BATCH_SIZE,
+            ).update(display_rating=display_rating)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('adminpanel', '0017_product_display_rating'),
+        ('storefront', '0004_product_review_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_display_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0018_backfill_product_display_rating'),
+        ('storefront', '0005_review_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_instock_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_cat_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_subcat_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_instock_facet_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['-display_rating', '-id'], name='product_instock_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', '-display_rating', '-id'], name='product_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['subcategory_ref', '-display_rating', '-id'], name='product_subcat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['category_ref', 'subcategory_ref', 'price', 'display_rating'], name='product_instock_facet_idx'),
+        ),
+    ]
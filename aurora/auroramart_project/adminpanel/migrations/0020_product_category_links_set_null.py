@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0019_product_display_rating_indexes'),
+        ('storefront', '0005_review_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='storefront.category'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='subcategory_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='storefront.subcategory'),
+        ),
+    ]
@@ -0,0 +1,220 @@
+# adminpanel/ml.py
+"""
+Preferred-category inference with the active DecisionTreeModel.
+
+The active model's artifact (a joblib dump of the scikit-learn classifier
+trained in models/decision_tree_classifier.ipynb) is loaded once per worker
+and kept in memory. Saving or deleting any DecisionTreeModel bumps the shared
+'ml-model' version, and each worker reloads on its next prediction.
+
+The notebook one-hot encodes gender, employment_status, occupation and
+education with pandas.get_dummies, so its columns look like `gender_Female`.
+Feature matrices are built straight into NumPy in that column order, taken
+from the fitted model's `feature_names_in_`. NumPy and joblib are imported
+only when a prediction is made, so the admin runs without them and
+predictions raise ModelUnavailable instead.
+
+The notebook's labels are product categories, which only partly overlap
+Customer's CATEGORY_CHOICES; labels are mapped onto those choices, and a
+label with no matching choice gives no prediction rather than an invalid one.
+"""
+import pickle
+import threading
+import warnings
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+
+from . import kpis
+from .caching import get_version
+from .models import CATEGORY_CHOICES, Customer, DecisionTreeModel
+
+# Bumped whenever a DecisionTreeModel row changes
+MODEL_VERSION = 'ml-model'
+
+NUMERIC_FEATURES = ('age', 'household_size', 'has_children', 'monthly_income_sgd')
+CATEGORICAL_FEATURES = ('gender', 'employment_status', 'occupation', 'education')
+FEATURE_FIELDS = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+CLASSIFY_CHUNK_SIZE = 2000
+# Customers classified per request from the AI studio page
+CLASSIFY_BATCH_LIMIT = 10000
+
+# Model label -> Customer.preferred_category; labels not listed give no prediction
+LABEL_CATEGORIES = {value: value for value, _ in CATEGORY_CHOICES}
+LABEL_CATEGORIES.update({
+    'Fashion - Men': 'Apparel',
+    'Fashion - Women': 'Apparel',
+    'Groceries & Gourmet': 'Groceries',
+})
+
+
+class ModelUnavailable(Exception):
+    """No active model, or its artifact cannot be loaded."""
+
+
+@dataclass
+class LoadedModel:
+    record: DecisionTreeModel
+    estimator: object
+    columns: list
+    column_index: dict = field(init=False)
+
+    def __post_init__(self):
+        self.column_index = {name: position for position, name in enumerate(self.columns)}
+
+
+_lock = threading.Lock()
+_state = {'version': None, 'model': None}
+
+
+def _artifact_path(file_path):
+    path = Path(file_path)
+    if not path.is_absolute():
+        path = Path(settings.BASE_DIR) / path
+    return path
+
+
+def load_model(record):
+    """Load `record`'s artifact from disk."""
+    try:
+        import joblib
+    except ImportError as exc:
+        raise ModelUnavailable("joblib is not installed.") from exc
+
+    path = _artifact_path(record.file_path)
+    try:
+        estimator = joblib.load(path)
+    # ImportError: scikit-learn is missing; AttributeError/UnpicklingError: the
+    # file was pickled by an incompatible scikit-learn version
+    except (OSError, EOFError, ValueError, ImportError, AttributeError, pickle.UnpicklingError) as exc:
+        raise ModelUnavailable(f"Could not load model file {path}: {exc}") from exc
+
+    columns = getattr(estimator, 'feature_names_in_', None)
+    if columns is None:
+        raise ModelUnavailable(f"{path} was not fitted on named features.")
+    return LoadedModel(record=record, estimator=estimator, columns=[str(name) for name in columns])
+
+
+def get_model():
+    """Return the active model, reloading it if the active version has changed."""
+    version = get_version(MODEL_VERSION)
+    if _state['version'] != version:
+        with _lock:
+            if _state['version'] != version:
+                record = DecisionTreeModel.objects.filter(is_active=True).order_by('-training_date').first()
+                if record is None:
+                    raise ModelUnavailable("No active decision tree model.")
+                _state['model'] = load_model(record)
+                _state['version'] = version
+    return _state['model']
+
+
+def _values(customer):
+    if isinstance(customer, dict):
+        return [customer.get(name) for name in FEATURE_FIELDS]
+    return [getattr(customer, name) for name in FEATURE_FIELDS]
+
+
+def feature_matrix(customers, model):
+    """
+    Build the (n_customers, n_features) matrix for `model` in one pass.
+
+    `customers` may be Customer instances or dicts of the same fields (e.g. a
+    form's cleaned_data). Categories the model never saw leave their row of
+    one-hot columns at zero, as in the notebook.
+    """
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise ModelUnavailable("numpy is not installed.") from exc
+
+    column_index = model.column_index
+    numeric = [column_index.get(name) for name in NUMERIC_FEATURES]
+    prefixes = [f'{name}_' for name in CATEGORICAL_FEATURES]
+
+    matrix = np.zeros((len(customers), len(model.columns)), dtype=np.float64)
+    for row, customer in enumerate(customers):
+        values = _values(customer)
+        for position, value in zip(numeric, values):
+            if position is not None and value is not None:
+                matrix[row, position] = float(value)
+        for prefix, value in zip(prefixes, values[len(NUMERIC_FEATURES):]):
+            position = column_index.get(f'{prefix}{value}')
+            if position is not None:
+                matrix[row, position] = 1.0
+    return matrix
+
+
+def predict_preferred_category(customers):
+    """
+    Return the predicted preferred_category for each customer, in order.
+
+    A customer whose label has no Customer choice (see LABEL_CATEGORIES)
+    gets None.
+    """
+    customers = list(customers)
+    if not customers:
+        return []
+    model = get_model()
+    matrix = feature_matrix(customers, model)
+    with warnings.catch_warnings():
+        # The matrix is already in feature_names_in_ order
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        predictions = model.estimator.predict(matrix)
+    return [LABEL_CATEGORIES.get(str(label)) for label in predictions]
+
+
+def classify_customers(queryset=None, chunk_size=CLASSIFY_CHUNK_SIZE):
+    """
+    Predict and store preferred_category for every customer in `queryset`.
+
+    Customers are read in primary-key chunks with one predict() call per
+    chunk, and changed rows are written with one UPDATE per predicted
+    category. Customers without a valid prediction keep their category.
+    Returns the number of customers changed.
+    """
+    if queryset is None:
+        queryset = Customer.objects.all()
+    queryset = queryset.only('id', 'preferred_category', *FEATURE_FIELDS).order_by('pk')
+
+    changed = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            # update() skipped the segment counter signals
+            if changed:
+                kpis.reconcile()
+            return changed
+        last_pk = chunk[-1].pk
+        updates = defaultdict(list)
+        for customer, category in zip(chunk, predict_preferred_category(chunk)):
+            if category is not None and customer.preferred_category != category:
+                updates[category].append(customer.pk)
+        for category, ids in updates.items():
+            changed += Customer.objects.filter(pk__in=ids).update(preferred_category=category)
+
+
+def classify_batch(after_pk=0, limit=None):
+    """
+    Classify at most `limit` (default CLASSIFY_BATCH_LIMIT) customers, in
+    primary-key order after `after_pk`.
+
+    For callers that must bound their work, such as a web request; the
+    classify_customers command covers everyone in one run. Returns
+    (changed, next_pk), where next_pk is None once no customers remain.
+    """
+    if limit is None:
+        limit = CLASSIFY_BATCH_LIMIT
+    customers = Customer.objects.filter(pk__gt=after_pk)
+    boundary = list(customers.order_by('pk').values_list('pk', flat=True)[limit - 1:limit])
+    if not boundary:
+        return classify_customers(customers), None
+    last_pk = boundary[0]
+    changed = classify_customers(customers.filter(pk__lte=last_pk))
+    if not Customer.objects.filter(pk__gt=last_pk).exists():
+        last_pk = None
+    return changed, last_pk
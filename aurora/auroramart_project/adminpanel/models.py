@@ -1,6 +1,8 @@
 # auroramart_project/adminpanel/models.py
 
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -149,6 +151,23 @@ class Customer(models.Model):
     def cID(self):
         return f"CUST-{self.id:06d}"
 
+    class Meta:
+        # One index per admin grid filter/sort column, each ending in id so
+        # the keyset pagination (and the default newest-first order) can
+        # walk it without a sort step
+        indexes = [
+            models.Index(fields=['name', 'id'], name='customer_name_idx'),
+            models.Index(fields=['age', 'id'], name='customer_age_idx'),
+            models.Index(fields=['monthly_income_sgd', 'id'], name='customer_income_idx'),
+            models.Index(fields=['gender', 'id'], name='customer_gender_idx'),
+            models.Index(fields=['employment_status', 'id'], name='customer_employment_idx'),
+            models.Index(fields=['education', 'id'], name='customer_education_idx'),
+            models.Index(fields=['preferred_category', 'id'], name='customer_category_idx'),
+            # Case-insensitive prefix search for the order form's customer picker
+            models.Index(Lower('email'), name='customer_email_lower_idx'),
+            models.Index(Lower('name'), name='customer_name_lower_idx'),
+        ]
+
 
 class Product(models.Model):
     """
@@ -164,8 +183,27 @@ class Product(models.Model):
     category = models.CharField(max_length=100, choices=PRODUCT_CATEGORY_CHOICES)
     subcategory = models.CharField(max_length=100, choices=PRODUCT_SUBCATEGORY_CHOICES)
     
+    # Integer links to the storefront's Category/SubCategory rows, which the
+    # catalogue queries filter and group on. While the strings above are
+    # still what forms and imports write, the links are derived from them
+    # (see storefront/signals.py); the indexed columns are these, not the strings.
+    # Deleting a Category/SubCategory unlinks its products, which keep the name
+    # and are linked again if a row with that name is created.
+    category_ref = models.ForeignKey(
+        'storefront.Category', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='products', db_index=False,
+    )
+    subcategory_ref = models.ForeignKey(
+        'storefront.SubCategory', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='products', db_index=False,
+    )
+    
     price = models.DecimalField(max_digits=10, decimal_places=2) # Renamed from unit_price
     rating = models.DecimalField(max_digits=3, decimal_places=1)
+    # The rating the storefront shows, sorts and filters on: the average of
+    # the product's reviews once it has any, else `rating`. Derived and kept
+    # in step by storefront/signals.py, like the category links above.
+    display_rating = models.DecimalField(max_digits=3, decimal_places=1, editable=False)
     stock = models.IntegerField(verbose_name="Stock") # Renamed from quantity_on_hand
     reorder_threshold = models.IntegerField() # Renamed from reorder_quantity
     
@@ -174,6 +212,35 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.sku}: {self.name}"
 
+    class Meta:
+        # Storefront queries always filter stock > 0, so the listing indexes
+        # are partial and each matches one filter + sort combination.
+        indexes = [
+            models.Index(fields=['-display_rating', '-id'], condition=Q(stock__gt=0), name='product_instock_rating_idx'),
+            models.Index(fields=['category_ref', '-display_rating', '-id'], condition=Q(stock__gt=0), name='product_cat_rating_idx'),
+            models.Index(fields=['category_ref', 'price', 'id'], condition=Q(stock__gt=0), name='product_cat_price_idx'),
+            models.Index(fields=['category_ref', 'id'], condition=Q(stock__gt=0), name='product_cat_id_idx'),
+            models.Index(fields=['subcategory_ref', '-display_rating', '-id'], condition=Q(stock__gt=0), name='product_subcat_rating_idx'),
+            # Covers the storefront's grouped facet counts (storefront/facets.py)
+            models.Index(
+                fields=['category_ref', 'subcategory_ref', 'price', 'display_rating'], condition=Q(stock__gt=0),
+                name='product_instock_facet_idx',
+            ),
+            # Covers COUNT(*) ... WHERE stock > 0 for the result totals, and
+            # the admin grid's stock sort
+            models.Index(fields=['stock', 'id'], name='product_stock_idx'),
+            # Admin: low-stock alerts and the product grid's sorts and filters
+            models.Index(fields=['stock'], condition=Q(stock__lte=F('reorder_threshold')), name='product_low_stock_idx'),
+            models.Index(fields=['name', 'id'], name='product_name_idx'),
+            models.Index(fields=['category_ref', 'name', 'id'], name='product_admin_cat_name_idx'),
+            models.Index(fields=['subcategory_ref', 'name', 'id'], name='product_admin_subcat_name_idx'),
+            # Also serves the storefront's in-stock price sort, which reads it
+            # in order and skips the few out-of-stock rows
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+            # Covers the grid's grouped facet counts without touching the table
+            models.Index(fields=['category_ref', 'subcategory_ref', 'stock', 'reorder_threshold'], name='product_facet_idx'),
+        ]
+
 class Order(models.Model):
     """
     Represents a customer's order (a "basket").
@@ -183,12 +250,14 @@ class Order(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     
     # --- NO CHANGE NEEDED: This field already uses choices ---
+    # Cancelled orders are left out of the sales rollups, reports and basket mining
+    CANCELLED = 'CANCELLED'
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
         ('PROCESSING', 'Processing'),
         ('SHIPPED', 'Shipped'),
         ('DELIVERED', 'Delivered'),
-        ('CANCELLED', 'Cancelled'),
+        (CANCELLED, 'Cancelled'),
     ]
     fulfillment_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     shipping_address = models.TextField()
@@ -200,6 +269,13 @@ class Order(models.Model):
     def oID(self):
         return f"ORD-{self.id:08d}"
 
+    class Meta:
+        # Admin order grid: newest-first keyset pages, optionally by status
+        indexes = [
+            models.Index(fields=['placed_at', 'id'], name='order_placed_idx'),
+            models.Index(fields=['fulfillment_status', 'placed_at', 'id'], name='order_status_placed_idx'),
+        ]
+
 class OrderItem(models.Model):
     """
     Represents a single product within an Order.
@@ -213,6 +289,75 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.product.name if self.product else 'Unknown Product'}"
 
+# --- Sales Rollups ---
+
+class ProductSalesDaily(models.Model):
+    """
+    Units sold and revenue per product per day, excluding cancelled orders.
+    Maintained incrementally by adminpanel.sales so best-seller queries never
+    have to aggregate OrderItem.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date}: {self.units} units"
+
+    class Meta:
+        unique_together = ['product', 'date']
+        indexes = [
+            # Windowed best-seller scans read only this index
+            models.Index(fields=['date', 'product', 'units'], name='sales_daily_window_idx'),
+        ]
+
+
+class SalesFactDaily(models.Model):
+    """
+    Pre-aggregated sales for the reports page, one row per day, customer
+    segment and catalogue cell, excluding cancelled orders. Rebuilt a day at a
+    time by adminpanel.reports.
+
+    Each level is stored separately so its order count is exact when summed
+    over days and segments: 'segment' rows cover the whole basket (category
+    and subcategory blank), 'category' rows leave subcategory blank.
+    """
+    LEVEL_SEGMENT = 'segment'
+    LEVEL_CATEGORY = 'category'
+    LEVEL_SUBCATEGORY = 'subcategory'
+    LEVEL_CHOICES = [
+        (LEVEL_SEGMENT, 'Customer Segment'),
+        (LEVEL_CATEGORY, 'Category'),
+        (LEVEL_SUBCATEGORY, 'Subcategory'),
+    ]
+
+    date = models.DateField()
+    # First day of the date's month, so rollups group on a plain column
+    month = models.DateField()
+    level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
+    # The customer's preferred_category when the day was built; blank for guests
+    segment = models.CharField(max_length=50, blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    subcategory = models.CharField(max_length=100, blank=True)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.level} {self.segment}/{self.category}/{self.subcategory}: {self.revenue}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'level', 'segment', 'category', 'subcategory'], name='sales_fact_cell_unique',
+            ),
+        ]
+        indexes = [
+            # Report rollups read one level over a date range
+            models.Index(fields=['level', 'date'], name='sales_fact_level_date_idx'),
+        ]
+
 # --- AI/ML Feature Model ---
 
 class DecisionTreeModel(models.Model):
@@ -228,3 +373,35 @@ class DecisionTreeModel(models.Model):
 
     def __str__(self):
         return f"{self.model_name} v{self.version} ({'Active' if self.is_active else 'Inactive'})"
+
+
+class ProductAssociation(models.Model):
+    """
+    A precomputed "frequently bought together" rule (product -> recommended),
+    mined offline from order baskets by the mine_association_rules command.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='associations')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    support = models.FloatField()
+    confidence = models.FloatField()
+    lift = models.FloatField()
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank}, lift {self.lift:.2f})"
+
+    class Meta:
+        # Also the index behind the product page lookup
+        unique_together = ['product', 'rank']
+
+
+class KpiCounter(models.Model):
+    """
+    A dashboard counter (e.g. 'customers', 'segment:Books') kept current by
+    model signals and periodically reconciled; see kpis.py.
+    """
+    name = models.CharField(max_length=120, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
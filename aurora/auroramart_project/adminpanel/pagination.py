@@ -0,0 +1,161 @@
+# adminpanel/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page remembers the sort-key values of its last (or
+first) row and the next query asks for rows strictly after them, so every
+page costs the same index range scan no matter how deep the user goes. The
+ordering must end in a unique column (normally the primary key) to break ties.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded or does not fit the ordering."""
+
+
+def _field_name(term):
+    return term.lstrip('-')
+
+
+def _is_descending(term):
+    return term.startswith('-')
+
+
+def encode_cursor(ordering, values, reverse=False):
+    payload = {
+        'o': ','.join(ordering),
+        'v': [None if value is None else str(value) for value in values],
+    }
+    if reverse:
+        payload['r'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    """Return (values, reverse) from an opaque cursor made for `ordering`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, reverse = payload['v'], bool(payload.get('r'))
+        matches = payload['o'] == ','.join(ordering) and len(values) == len(ordering)
+    except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not matches:
+        # A cursor from a different sort order would silently skip rows
+        raise InvalidCursor(cursor)
+    return values, reverse
+
+
+class CursorPage:
+    """One page of results plus the cursors for its neighbours."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """Paginate a queryset by `ordering`, e.g. ('-rating', '-id')."""
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        model = queryset.model
+        self.fields = [model._meta.get_field(_field_name(term)) for term in self.ordering]
+
+    def _position_filter(self, values, reverse):
+        """Rows strictly after (or before, when reversing) the given key values."""
+        condition = Q()
+        equal = Q()
+        for term, field, value in zip(self.ordering, self.fields, values):
+            after = _is_descending(term) == reverse
+            lookup = f'{field.name}__{"gt" if after else "lt"}'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{field.name: value})
+        return condition
+
+    def _parse(self, cursor):
+        values, reverse = decode_cursor(cursor, self.ordering)
+        try:
+            return [field.to_python(value) for field, value in zip(self.fields, values)], reverse
+        except ValidationError as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def _cursor_for(self, obj, reverse=False):
+        return encode_cursor(self.ordering, [getattr(obj, field.attname) for field in self.fields], reverse)
+
+    def page(self, cursor=None):
+        """Return the page after `cursor` (or the first page when it is empty)."""
+        reverse = False
+        queryset = self.queryset
+        if cursor:
+            values, reverse = self._parse(cursor)
+            queryset = queryset.filter(self._position_filter(values, reverse))
+
+        if reverse:
+            flipped = [term[1:] if _is_descending(term) else f'-{term}' for term in self.ordering]
+            queryset = queryset.order_by(*flipped)
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows, None, None)
+
+        # Moving forwards there is a previous page whenever we started from a
+        # cursor; moving backwards there is always a next page.
+        if reverse:
+            next_cursor = self._cursor_for(rows[-1])
+            previous_cursor = self._cursor_for(rows[0], reverse=True) if has_more else None
+        else:
+            next_cursor = self._cursor_for(rows[-1]) if has_more else None
+            previous_cursor = self._cursor_for(rows[0], reverse=True) if cursor else None
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def count_results(queryset, limit=None):
+    """
+    Count a queryset, optionally stopping at `limit`.
+
+    Returns (count, is_exact). With a limit the database only has to walk
+    limit + 1 rows (SELECT COUNT(*) FROM (... LIMIT n)), which keeps broad
+    catalogue queries cheap; the caller can display "1000+".
+    """
+    if limit is None:
+        return queryset.count(), True
+    count = queryset.order_by()[:limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
@@ -0,0 +1,199 @@
+# adminpanel/reports.py
+"""
+Sales reports served from the SalesFactDaily cube.
+
+build_sales_facts() aggregates the OrderItems of a range of days into
+SalesFactDaily rows (revenue, units and order counts per day, customer
+segment, category and subcategory), replacing whatever was stored for those
+days, so rebuilding is idempotent. The build_sales_facts command runs it
+nightly over the days since the last build plus a short lookback that picks
+up late cancellations and edits.
+
+sales_report() then answers month or quarter rollups with a GROUP BY over the
+fact rows' month column instead of scanning orders.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from storefront.categories import get_tree as get_category_tree
+
+from .models import Order, OrderItem, SalesFactDaily
+from .sales import sale_date
+
+# Days before the last built day that the nightly build recomputes
+SALES_FACT_LOOKBACK_DAYS = 7
+# Days aggregated per query and transaction
+SALES_FACT_CHUNK_DAYS = 31
+
+PERIODS = ('month', 'quarter')
+
+# Dimension columns reported for each fact level
+LEVEL_DIMENSIONS = {
+    SalesFactDaily.LEVEL_SEGMENT: ('segment',),
+    SalesFactDaily.LEVEL_CATEGORY: ('category',),
+    SalesFactDaily.LEVEL_SUBCATEGORY: ('category', 'subcategory'),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate_lines(start, end):
+    """Yield unsaved SalesFactDaily rows for the days start..end (inclusive)."""
+    lines = (
+        OrderItem.objects.filter(
+            order__placed_at__gte=_day_start(start),
+            order__placed_at__lt=_day_start(end + timedelta(days=1)),
+        )
+        .exclude(order__fulfillment_status=Order.CANCELLED)
+        .annotate(
+            day=TruncDate('order__placed_at'),
+            segment=Coalesce('order__customer__preferred_category', Value('')),
+        )
+        .order_by()
+    )
+    # Grouped on the products' integer category links, which the fact rows
+    # store as names; products not linked to a category row (e.g. one that
+    # was deleted) are grouped on their own category strings instead
+    by_catalogue = lines.filter(product__isnull=False)
+    category_id = {'category_id': F('product__category_ref')}
+    category_name = {'category_name': F('product__category')}
+    querysets = (
+        (SalesFactDaily.LEVEL_SEGMENT, lines, {}),
+        (SalesFactDaily.LEVEL_CATEGORY, by_catalogue.filter(product__category_ref__isnull=False), category_id),
+        (SalesFactDaily.LEVEL_CATEGORY, by_catalogue.filter(product__category_ref__isnull=True), category_name),
+        (SalesFactDaily.LEVEL_SUBCATEGORY, by_catalogue.filter(product__subcategory_ref__isnull=False),
+         {**category_id, 'subcategory_id': F('product__subcategory_ref')}),
+        (SalesFactDaily.LEVEL_SUBCATEGORY, by_catalogue.filter(product__subcategory_ref__isnull=True),
+         {**category_name, 'subcategory_name': F('product__subcategory')}),
+    )
+    tree = get_category_tree()
+
+    def name(row, dimension, name_of):
+        if f'{dimension}_id' in row:
+            return name_of(row[f'{dimension}_id'])
+        return row.get(f'{dimension}_name', '')
+
+    for level, queryset, dimensions in querysets:
+        rows = queryset.annotate(**dimensions).values('day', 'segment', *dimensions).annotate(
+            order_count=Count('order', distinct=True),
+            unit_count=Sum('quantity'),
+            line_revenue=Sum(F('quantity') * F('unit_price')),
+        )
+        for row in rows.iterator():
+            yield SalesFactDaily(
+                date=row['day'],
+                month=row['day'].replace(day=1),
+                level=level,
+                segment=row['segment'],
+                category=name(row, 'category', tree.category_name),
+                subcategory=name(row, 'subcategory', tree.subcategory_name),
+                orders=row['order_count'],
+                units=row['unit_count'],
+                revenue=row['line_revenue'],
+            )
+
+
+def build_sales_facts(start, end, chunk_days=SALES_FACT_CHUNK_DAYS, batch_size=2000):
+    """Rebuild the facts for the days start..end (inclusive); returns the row count."""
+    created = 0
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        with transaction.atomic():
+            SalesFactDaily.objects.filter(date__range=(start, chunk_end)).delete()
+            facts = list(_aggregate_lines(start, chunk_end))
+            SalesFactDaily.objects.bulk_create(facts, batch_size=batch_size)
+        created += len(facts)
+        start = chunk_end + timedelta(days=1)
+    return created
+
+
+def last_built_day():
+    return SalesFactDaily.objects.aggregate(last=Max('date'))['last']
+
+
+def pending_days(today=None, lookback=SALES_FACT_LOOKBACK_DAYS):
+    """
+    The (start, end) days the nightly build should recompute: everything
+    after the last built day, plus `lookback` days before it, up to
+    yesterday. None when there is nothing to build.
+    """
+    today = today or timezone.localdate()
+    end = today - timedelta(days=1)
+    last = last_built_day()
+    if last is None:
+        first_order = Order.objects.aggregate(first=Min('placed_at'))['first']
+        if first_order is None:
+            return None
+        start = sale_date(first_order)
+    else:
+        start = min(last + timedelta(days=1), end - timedelta(days=lookback - 1))
+    return (start, end) if start <= end else None
+
+
+def period_start(period, month):
+    if period == 'quarter':
+        return month.replace(month=(month.month - 1) // 3 * 3 + 1)
+    return month
+
+
+def period_label(period, day):
+    if period == 'quarter':
+        return f"{day.year} Q{(day.month - 1) // 3 + 1}"
+    return day.strftime('%Y-%m')
+
+
+def sales_report(level, period='month', start=None, end=None):
+    """
+    Revenue, units, orders and average order value per period, broken down
+    by `level`'s dimensions, over the days start..end.
+
+    Returns (totals, breakdown): totals has one row per period; breakdown one
+    row per period and dimension value, largest revenue first. For category
+    levels, orders and average order value cover the orders that bought from
+    that category.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'.")
+
+    def rollup(level, dimensions):
+        facts = SalesFactDaily.objects.filter(level=level)
+        if start:
+            facts = facts.filter(date__gte=start)
+        if end:
+            facts = facts.filter(date__lte=end)
+        # The database groups by month; quarters are merged from those here
+        cells = defaultdict(lambda: {'orders': 0, 'units': 0, 'revenue': Decimal('0')})
+        monthly = facts.values('month', *dimensions).annotate(
+            order_count=Sum('orders'), unit_count=Sum('units'), total_revenue=Sum('revenue'),
+        ).order_by()
+        for row in monthly:
+            cell = cells[(period_start(period, row['month']),) + tuple(row[name] for name in dimensions)]
+            cell['orders'] += row['order_count']
+            cell['units'] += row['unit_count']
+            cell['revenue'] += row['total_revenue']
+
+        result = []
+        for (day, *values), cell in cells.items():
+            orders = cell['orders']
+            result.append({
+                'period': day,
+                'label': period_label(period, day),
+                **dict(zip(dimensions, values)),
+                **cell,
+                'average_order_value': (
+                    (cell['revenue'] / orders).quantize(Decimal('0.01')) if orders else Decimal('0.00')
+                ),
+            })
+        result.sort(key=lambda row: (row['period'], -row['revenue']))
+        return result
+
+    totals = rollup(SalesFactDaily.LEVEL_SEGMENT, ())
+    return totals, rollup(level, LEVEL_DIMENSIONS[level])
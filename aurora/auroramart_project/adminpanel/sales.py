@@ -0,0 +1,107 @@
+# adminpanel/sales.py
+"""
+Incremental per-product, per-day sales rollups and best-seller queries.
+
+Every change to an order line (or to an order's cancelled state) is applied
+to ProductSalesDaily as a delta, so reading best sellers over a window is a
+small GROUP BY over the rollup instead of an aggregate over all OrderItems.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, Product, ProductSalesDaily
+
+BEST_SELLER_WINDOWS = (7, 30, 90)
+
+
+def sale_date(placed_at):
+    return timezone.localdate(placed_at) if timezone.is_aware(placed_at) else placed_at.date()
+
+
+def apply_sales(sale_day, lines, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) sold lines on `sale_day`.
+    `lines` is an iterable of (product_id, quantity, unit_price).
+    """
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    for product_id, quantity, unit_price in lines:
+        if product_id is None:
+            continue
+        totals[product_id][0] += sign * quantity
+        totals[product_id][1] += sign * quantity * Decimal(unit_price)
+
+    for product_id, (units, revenue) in totals.items():
+        if units == 0 and revenue == 0:
+            continue
+        _increment(product_id, sale_day, units, revenue)
+
+
+def _increment(product_id, sale_day, units, revenue):
+    rows = ProductSalesDaily.objects.filter(product_id=product_id, date=sale_day)
+    if rows.update(units=F('units') + units, revenue=F('revenue') + revenue):
+        return
+    try:
+        with transaction.atomic():
+            ProductSalesDaily.objects.create(product_id=product_id, date=sale_day, units=units, revenue=revenue)
+    except IntegrityError:
+        # Another request created the row first; fall back to incrementing it
+        rows.update(units=F('units') + units, revenue=F('revenue') + revenue)
+
+
+def order_lines(order):
+    return order.items.values_list('product_id', 'quantity', 'unit_price')
+
+
+def record_order(order, sign=1):
+    """Apply every line of `order`; use after bulk-creating its items."""
+    if order.fulfillment_status == Order.CANCELLED:
+        return
+    apply_sales(sale_date(order.placed_at), order_lines(order), sign)
+
+
+def best_sellers(days=30, limit=8):
+    """In-stock products ranked by units sold over the last `days` days."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    ranked = (
+        ProductSalesDaily.objects.filter(date__gte=since, product__stock__gt=0)
+        .values('product_id')
+        .annotate(sold=Sum('units'))
+        .filter(sold__gt=0)
+        .order_by('-sold', 'product_id')[:limit]
+    )
+    ranked_ids = [row['product_id'] for row in ranked]
+    products = Product.objects.in_bulk(ranked_ids)
+    return [products[product_id] for product_id in ranked_ids if product_id in products]
+
+
+def rebuild_rollup(batch_size=2000):
+    """Recompute the whole rollup from OrderItem; returns the row count."""
+    aggregated = (
+        OrderItem.objects.exclude(order__fulfillment_status=Order.CANCELLED)
+        .exclude(product__isnull=True)
+        .annotate(day=TruncDate('order__placed_at'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'), revenue=Sum(F('quantity') * F('unit_price')))
+        .order_by()
+    )
+    with transaction.atomic():
+        ProductSalesDaily.objects.all().delete()
+        batch = []
+        created = 0
+        for row in aggregated.iterator(chunk_size=batch_size):
+            batch.append(ProductSalesDaily(
+                product_id=row['product_id'], date=row['day'], units=row['units'], revenue=row['revenue'],
+            ))
+            if len(batch) >= batch_size:
+                ProductSalesDaily.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        ProductSalesDaily.objects.bulk_create(batch)
+        created += len(batch)
+    return created
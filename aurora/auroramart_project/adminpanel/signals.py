@@ -0,0 +1,120 @@
+# adminpanel/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import kpis, sales
+from .caching import bump_version
+from .ml import MODEL_VERSION
+from .models import Customer, DecisionTreeModel, Order, OrderItem, Product
+
+# --- Custom Signals ---
+
+# Sent after each bulk-import batch with `product_ids`; bulk_create() skips
+# post_save, so listeners refresh whatever they derive from products here.
+products_imported = Signal()
+
+# --- Sales Rollups ---
+
+def _order_state(order_id):
+    return Order.objects.filter(pk=order_id).values('placed_at', 'fulfillment_status').first()
+
+@receiver(pre_save, sender=OrderItem)
+def remember_previous_order_line(sender, instance, **kwargs):
+    instance._previous_line = None
+    if instance.pk:
+        instance._previous_line = OrderItem.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'quantity', 'unit_price'
+        ).first()
+
+@receiver(post_save, sender=OrderItem)
+def roll_up_saved_order_line(sender, instance, **kwargs):
+    order = _order_state(instance.order_id)
+    if order is None or order['fulfillment_status'] == Order.CANCELLED:
+        return
+    day = sales.sale_date(order['placed_at'])
+    if instance._previous_line:
+        sales.apply_sales(day, [instance._previous_line], sign=-1)
+    sales.apply_sales(day, [(instance.product_id, instance.quantity, instance.unit_price)])
+
+@receiver(post_delete, sender=OrderItem)
+def roll_up_deleted_order_line(sender, instance, **kwargs):
+    order = _order_state(instance.order_id)
+    if order is None or order['fulfillment_status'] == Order.CANCELLED:
+        return
+    sales.apply_sales(
+        sales.sale_date(order['placed_at']),
+        [(instance.product_id, instance.quantity, instance.unit_price)],
+        sign=-1,
+    )
+
+@receiver(pre_save, sender=Order)
+def remember_previous_order_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = Order.objects.filter(pk=instance.pk).values_list(
+            'fulfillment_status', flat=True
+        ).first()
+
+@receiver(post_save, sender=Order)
+def roll_up_cancellation(sender, instance, created, **kwargs):
+    """Cancelling an order takes its lines out of the rollup; reinstating adds them back."""
+    previous = instance._previous_status
+    if created or previous is None:
+        return
+    was_cancelled = previous == Order.CANCELLED
+    is_cancelled = instance.fulfillment_status == Order.CANCELLED
+    if is_cancelled and not was_cancelled:
+        sales.apply_sales(sales.sale_date(instance.placed_at), sales.order_lines(instance), sign=-1)
+    elif was_cancelled and not is_cancelled:
+        sales.record_order(instance)
+
+# --- ML Models ---
+
+@receiver(post_save, sender=DecisionTreeModel)
+@receiver(post_delete, sender=DecisionTreeModel)
+def reload_active_model(sender, **kwargs):
+    """Workers reload the active model on their next prediction."""
+    bump_version(MODEL_VERSION)
+
+# --- Dashboard KPIs ---
+
+@receiver(post_save, sender=Customer)
+def count_saved_customer(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_category', None)
+    if created:
+        kpis.adjust(kpis.CUSTOMERS, 1)
+    elif previous == instance.preferred_category:
+        return
+    elif previous is not None:
+        kpis.adjust(kpis.segment_counter(previous), -1)
+    kpis.adjust(kpis.segment_counter(instance.preferred_category), 1)
+
+@receiver(pre_save, sender=Customer)
+def remember_previous_segment(sender, instance, **kwargs):
+    instance._previous_category = None
+    if instance.pk:
+        instance._previous_category = Customer.objects.filter(pk=instance.pk).values_list(
+            'preferred_category', flat=True
+        ).first()
+
+@receiver(post_delete, sender=Customer)
+def uncount_deleted_customer(sender, instance, **kwargs):
+    kpis.adjust(kpis.CUSTOMERS, -1)
+    kpis.adjust(kpis.segment_counter(instance.preferred_category), -1)
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Order)
+def count_created_row(sender, created, **kwargs):
+    if created:
+        kpis.adjust(kpis.PRODUCTS if sender is Product else kpis.ORDERS, 1)
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def uncount_deleted_row(sender, **kwargs):
+    kpis.adjust(kpis.PRODUCTS if sender is Product else kpis.ORDERS, -1)
+
+@receiver(post_save, sender=DecisionTreeModel)
+@receiver(post_delete, sender=DecisionTreeModel)
+def recount_active_models(sender, **kwargs):
+    # A handful of rows; recounting is simpler than tracking is_active flips
+    kpis.set_counter(kpis.ACTIVE_MODELS, DecisionTreeModel.objects.filter(is_active=True).count())
@@ -0,0 +1,72 @@
+// Search-as-you-type customer picker used by CustomerAutocompleteWidget.
+(function() {
+    var MIN_QUERY_LENGTH = 2;
+    var DEBOUNCE_MS = 200;
+
+    function initAutocomplete(container) {
+        if (container.dataset.ready) {
+            return;
+        }
+        container.dataset.ready = '1';
+
+        var input = container.querySelector('.autocomplete-input');
+        var hidden = container.querySelector('.autocomplete-value');
+        var results = container.querySelector('.autocomplete-results');
+        var timer = null;
+        var latest = 0;
+
+        function hideResults() {
+            results.hidden = true;
+            results.innerHTML = '';
+        }
+
+        function choose(customer) {
+            hidden.value = customer.id;
+            input.value = customer.label;
+            hideResults();
+        }
+
+        function render(customers) {
+            results.innerHTML = '';
+            customers.forEach(function(customer) {
+                var item = document.createElement('li');
+                item.textContent = customer.label;
+                item.addEventListener('mousedown', function(event) {
+                    event.preventDefault();
+                    choose(customer);
+                });
+                results.appendChild(item);
+            });
+            results.hidden = customers.length === 0;
+        }
+
+        input.addEventListener('input', function() {
+            // Typing invalidates the previous choice until a new one is picked
+            hidden.value = '';
+            clearTimeout(timer);
+            var query = input.value.trim();
+            if (query.length < MIN_QUERY_LENGTH) {
+                hideResults();
+                return;
+            }
+            timer = setTimeout(function() {
+                var request = ++latest;
+                fetch(container.dataset.searchUrl + '?q=' + encodeURIComponent(query))
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        // Ignore answers to queries the user has already typed past
+                        if (request === latest) {
+                            render(data.results);
+                        }
+                    })
+                    .catch(hideResults);
+            }, DEBOUNCE_MS);
+        });
+
+        input.addEventListener('blur', hideResults);
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('.autocomplete').forEach(initAutocomplete);
+    });
+})();
@@ -1,3 +1,618 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import association, exports, kpis, ml, reports, sales
+from .importers import ImportFormatError, import_customers, import_products
+from .forms import CustomerForm, OrderForm
+from .grids import CustomerGrid, OrderGrid, ProductGrid
+from storefront.models import Category, SubCategory
+from .models import CATEGORY_CHOICES, Customer, DecisionTreeModel, Order, OrderItem, Product, ProductSalesDaily, SalesFactDaily
+
+
+def make_customer(email, **overrides):
+    fields = {
+        'email': email,
+        'name': f'Customer {email}',
+        'age': 30,
+        'gender': 'Female',
+        'employment_status': 'Full-time',
+        'occupation': 'Tech',
+        'education': 'Bachelor',
+        'household_size': 2,
+        'has_children': False,
+        'monthly_income_sgd': Decimal('5000.00'),
+        'preferred_category': 'Books',
+    }
+    fields.update(overrides)
+    return Customer.objects.create(**fields)
+
+
+def make_product(sku, **overrides):
+    fields = {
+        'sku': sku,
+        'name': f'Product {sku}',
+        'description': 'Test product',
+        'category': 'Electronics',
+        'subcategory': 'Headphones',
+        'price': Decimal('10.00'),
+        'rating': Decimal('4.0'),
+        'stock': 50,
+        'reorder_threshold': 5,
+    }
+    fields.update(overrides)
+    return Product.objects.create(**fields)
+
+
+class FakeTree:
+    """Stands in for the fitted classifier, answering with fixed labels in turn."""
+    feature_names_in_ = ['age', 'household_size', 'has_children', 'monthly_income_sgd', 'gender_Female']
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def predict(self, matrix):
+        return [self.labels[row % len(self.labels)] for row in range(len(matrix))]
+
+
+def fake_model(*labels):
+    estimator = FakeTree(labels)
+    return ml.LoadedModel(record=None, estimator=estimator, columns=list(estimator.feature_names_in_))
+
+
+class PreferredCategoryModelTests(TestCase):
+    def test_classified_customers_keep_valid_choices(self):
+        customers = [make_customer(f'c{i}@example.com') for i in range(4)]
+        labels = ('Fashion - Women', 'Pet Supplies', 'Electronics', 'Groceries & Gourmet')
+        with mock.patch.object(ml, 'get_model', return_value=fake_model(*labels)):
+            changed = ml.classify_customers()
+
+        self.assertEqual(changed, 3)
+        stored = dict(Customer.objects.values_list('pk', 'preferred_category'))
+        self.assertEqual(
+            [stored[customer.pk] for customer in customers],
+            ['Apparel', 'Books', 'Electronics', 'Groceries'],
+        )
+        choices = {value for value, _ in CATEGORY_CHOICES}
+        self.assertTrue(set(stored.values()) <= choices)
+
+    def test_form_fills_blank_category_only_with_a_choice(self):
+        data = {
+            'email': 'new@example.com', 'name': 'New', 'age': 41, 'gender': 'Male',
+            'employment_status': 'Retired', 'occupation': 'Finance', 'education': 'Master',
+            'household_size': 1, 'has_children': False, 'monthly_income_sgd': '3200.00',
+            'preferred_category': '',
+        }
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Fashion - Men')):
+            form = CustomerForm(data)
+            self.assertTrue(form.is_valid(), form.errors)
+            self.assertEqual(form.save().preferred_category, 'Apparel')
+
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Toys & Games')):
+            form = CustomerForm(dict(data, email='other@example.com'))
+            self.assertFalse(form.is_valid())
+            self.assertIn('preferred_category', form.errors)
+
+    def test_missing_numpy_makes_the_model_unavailable(self):
+        customer = make_customer('np@example.com')
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Electronics')), \
+                mock.patch.dict('sys.modules', {'numpy': None}):
+            with self.assertRaises(ml.ModelUnavailable):
+                ml.predict_preferred_category([customer])
+
+    def test_unloadable_artifact_makes_the_model_unavailable(self):
+        DecisionTreeModel.objects.create(version='broken', file_path='models/missing.joblib')
+        with mock.patch('joblib.load', side_effect=ImportError("No module named 'sklearn'")):
+            with self.assertRaises(ml.ModelUnavailable):
+                ml.get_model()
+
+    def test_batches_walk_every_customer_once(self):
+        for i in range(5):
+            make_customer(f'b{i}@example.com')
+        after, changed, batches = 0, 0, 0
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Electronics')):
+            while after is not None:
+                batch_changed, after = ml.classify_batch(after, limit=2)
+                changed += batch_changed
+                batches += 1
+
+        self.assertEqual((changed, batches), (5, 3))
+        self.assertFalse(Customer.objects.exclude(preferred_category='Electronics').exists())
+
+    def test_studio_classifies_one_batch_per_request(self):
+        user = User.objects.create_user(username='staff', password='secret-pass-123', is_staff=True)
+        self.client.force_login(user)
+        make_customer('s1@example.com')
+        second = make_customer('s2@example.com')
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Apparel')), \
+                mock.patch.object(ml, 'CLASSIFY_BATCH_LIMIT', 1):
+            response = self.client.post(reverse('adminpanel:ai_studio_home'))
+            self.assertEqual(response.context['classification']['changed'], 1)
+            after = response.context['classification']['next']
+            self.assertIsNotNone(after)
+
+            response = self.client.post(reverse('adminpanel:ai_studio_home'), {'after': after})
+        self.assertIsNone(response.context['classification']['next'])
+        second.refresh_from_db()
+        self.assertEqual(second.preferred_category, 'Apparel')
+
+
+class ProductImportTests(TestCase):
+    HEADER = 'sku_code,product_name,product_description,product_category,product_subcategory,unit_price,product_rating,quantity_on_hand,reorder_quantity'
+
+    def test_rows_are_upserted_by_sku_in_batches(self):
+        make_product('IMP-1', name='Old name', stock=1)
+        batches = []
+        result = import_products([
+            self.HEADER,
+            'IMP-1,Desk Lamp,Warm light,home & kitchen,Home Decor,19.90,4.5,12,3',
+            'IMP-2,Mug,Stoneware,Home & Kitchen,Cookware,6.00,4.1,40,10',
+            'IMP-3,Broken,Bad price,Home & Kitchen,Cookware,abc,4.1,40,10',
+            'IMP-4,Tent,Two person,Camping,Camping & Hiking,99.00,4.5,3,1',
+            'IMP-5,Kettle,Steel,Home & Kitchen,Small Appliances,25.00,3.9,8,2',
+        ], batch_size=2, progress=lambda result: batches.append(result.imported))
+
+        self.assertEqual((result.rows, result.imported, result.error_count), (5, 3, 2))
+        self.assertEqual([line for line, _ in result.errors], [4, 5])
+        self.assertEqual(batches, [2, 3])
+        lamp = Product.objects.get(sku='IMP-1')
+        self.assertEqual((lamp.name, lamp.category, lamp.stock), ('Desk Lamp', 'Home & Kitchen', 12))
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_json_lines_and_missing_columns(self):
+        result = import_products([
+            '{"sku": "J-1", "name": "Pen", "description": "Blue", "category": "Books", "subcategory": "Fiction",'
+            ' "price": "1.50", "rating": "4.0", "stock": 100, "reorder_threshold": 10}',
+            'not json',
+        ], fmt='jsonl')
+        self.assertEqual((result.imported, result.error_count), (1, 1))
+        self.assertEqual(Product.objects.get(sku='J-1').price, Decimal('1.50'))
+
+        with self.assertRaises(ImportFormatError):
+            import_products(['sku,name', 'X-1,Thing'])
+
+
+CUSTOMER_CSV_HEADER = (
+    'email,name,age,gender,employment_status,occupation,education,'
+    'household_size,has_children,monthly_income_sgd,preferred_category'
+)
+
+
+def customer_csv(*rows):
+    lines = [CUSTOMER_CSV_HEADER]
+    for email, category in rows:
+        lines.append(f'{email},Name,35,Male,Full-time,Sales,Diploma,3,True,4200,{category}')
+    return lines
+
+
+class CustomerImportTests(TestCase):
+    def test_labelled_import_rejects_predictions_outside_the_choices(self):
+        lines = customer_csv(('a@example.com', ''), ('b@example.com', ''), ('c@example.com', 'books'))
+        with mock.patch.object(ml, 'get_model', return_value=fake_model('Pet Supplies', 'Fashion - Men')):
+            result = import_customers(lines, label=True)
+
+        self.assertEqual((result.imported, result.labelled, result.error_count), (2, 1, 1))
+        self.assertEqual(result.errors[0][0], 2)
+        self.assertIn('preferred_category', result.errors[0][1])
+        self.assertEqual(
+            dict(Customer.objects.values_list('email', 'preferred_category')),
+            {'b@example.com': 'Apparel', 'c@example.com': 'Books'},
+        )
+
+    def test_invalid_rows_are_reported_and_runs_resume(self):
+        lines = customer_csv(('a@example.com', 'Books'), ('not-an-email', 'Books'), ('c@example.com', ''),
+                             ('d@example.com', 'Toys'), ('e@example.com', 'groceries'))
+        result = import_customers(lines, batch_size=2)
+        self.assertEqual((result.rows, result.imported, result.error_count), (5, 2, 3))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5])
+        self.assertEqual(result.committed_rows, 5)
+
+        # Resuming after the first two rows skips them even if they changed
+        lines[1] = lines[1].replace('Books', 'Electronics')
+        result = import_customers(lines, start_row=2)
+        self.assertEqual((result.rows, result.imported), (3, 1))
+        self.assertEqual(
+            dict(Customer.objects.values_list('email', 'preferred_category')),
+            {'a@example.com': 'Books', 'e@example.com': 'Groceries'},
+        )
+
+
+def walk_grid(grid_class, query):
+    """Every row a grid serves for `query`, following its cursors page by page."""
+    rows, cursor = [], ''
+    while True:
+        params = QueryDict(query, mutable=True)
+        if cursor:
+            params['cursor'] = cursor
+        page = grid_class(params).page()
+        rows += list(page)
+        cursor = page.next_cursor
+        if not cursor:
+            return rows
+
+
+class CustomerGridTests(TestCase):
+    def setUp(self):
+        for i, (name, gender, age) in enumerate([
+            ('Ada', 'Female', 25), ('Ben', 'Male', 41), ('Cy', 'Male', 33),
+            ('Ada', 'Female', 52), ('Eve', 'Female', 38), ('Ada', 'Male', 29),
+        ]):
+            make_customer(f'g{i}@example.com', name=name, gender=gender, age=age)
+
+    def test_sorted_walk_breaks_ties_on_id(self):
+        rows = walk_grid(CustomerGrid, 'sort=name&per_page=2')
+        expected = list(Customer.objects.order_by('name', 'id'))
+        self.assertEqual(rows, expected)
+
+    def test_filters_combine(self):
+        grid = CustomerGrid(QueryDict('gender=Female&gender=Unknown&age_min=30&age_max=60&sort=-age'))
+        self.assertEqual([customer.age for customer in grid.page()], [52, 38])
+        self.assertEqual(grid.count(), (2, True))
+        self.assertEqual(grid.query_string(), 'sort=-age&age_min=30&age_max=60&gender=Female')
+
+    def test_bad_cursor_falls_back_to_the_first_page(self):
+        first = list(CustomerGrid(QueryDict('per_page=2')).page())
+        self.assertEqual(list(CustomerGrid(QueryDict('per_page=2&cursor=bogus')).page()), first)
+
+
+class ProductGridTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='staff', password='secret-pass-123', is_staff=True)
+        self.client.force_login(self.user)
+
+    def make_catalogue(self):
+        electronics = Category.objects.create(name='Electronics', slug='electronics')
+        books = Category.objects.create(name='Books', slug='books')
+        SubCategory.objects.create(category=electronics, name='Headphones', slug='headphones')
+        SubCategory.objects.create(category=electronics, name='Speakers', slug='speakers')
+        SubCategory.objects.create(category=books, name='Fiction', slug='fiction')
+        make_product('PG-1', price=Decimal('30.00'))
+        make_product('PG-2', price=Decimal('30.00'), stock=2)
+        make_product('PG-3', subcategory='Speakers', price=Decimal('80.00'))
+        make_product('PG-4', category='Books', subcategory='Fiction', price=Decimal('12.00'), stock=1)
+
+    def test_filters_and_facets(self):
+        self.make_catalogue()
+        grid = ProductGrid(QueryDict('category=Electronics&price_max=50'))
+        self.assertEqual(sorted(product.sku for product in grid.page()), ['PG-1', 'PG-2'])
+
+        facets = grid.facets()
+        self.assertEqual(dict(facets['category']), {'Electronics': 2, 'Books': 1})
+        self.assertEqual(dict(facets['subcategory']), {'Headphones': 2})
+        self.assertEqual(facets['low_stock'], 1)
+        options = dict((param, choices) for param, _, choices in grid.faceted_choice_options(facets))
+        self.assertIn(('Electronics', 'Electronics (2)', True), options['category'])
+        self.assertEqual(options['subcategory'], [('Headphones', 'Headphones (2)', False)])
+
+        low = ProductGrid(QueryDict('low_stock=1'))
+        self.assertEqual(sorted(product.sku for product in low.page()), ['PG-2', 'PG-4'])
+        self.assertEqual(dict(low.facets()['category']), {'Electronics': 1, 'Books': 1})
+
+    def test_price_sorted_walk(self):
+        self.make_catalogue()
+        rows = walk_grid(ProductGrid, 'sort=-price&per_page=1')
+        self.assertEqual(rows, list(Product.objects.order_by('-price', '-id')))
+
+    def test_rows_link_to_the_admin_detail_page(self):
+        product = make_product('GRID-1')
+        response = self.client.get(reverse('adminpanel:product_list_api'))
+        self.assertEqual(response.json()['results'][0]['url'], f'/admin/products/{product.pk}/')
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.lamp = make_product('SALE-1', price=Decimal('20.00'))
+        self.mug = make_product('SALE-2', price=Decimal('5.00'))
+        self.order = Order.objects.create(shipping_address='1 Test Street')
+        self.lamp_line = OrderItem.objects.create(order=self.order, product=self.lamp, quantity=2, unit_price=Decimal('20.00'))
+        OrderItem.objects.create(order=self.order, product=self.mug, quantity=5, unit_price=Decimal('5.00'))
+
+    def rollup(self):
+        rows = ProductSalesDaily.objects.values_list('product__sku', 'units', 'revenue')
+        return {sku: (units, revenue) for sku, units, revenue in rows if units}
+
+    def test_line_changes_are_applied_as_deltas(self):
+        self.assertEqual(self.rollup(), {'SALE-1': (2, Decimal('40.00')), 'SALE-2': (5, Decimal('25.00'))})
+        self.assertEqual(sales.best_sellers(), [self.mug, self.lamp])
+
+        self.lamp_line.quantity = 7
+        self.lamp_line.save()
+        self.assertEqual(self.rollup()['SALE-1'], (7, Decimal('140.00')))
+        self.assertEqual(sales.best_sellers(), [self.lamp, self.mug])
+
+        self.lamp_line.delete()
+        self.assertEqual(list(self.rollup()), ['SALE-2'])
+
+    def test_cancellation_reverses_the_order(self):
+        self.order.fulfillment_status = Order.CANCELLED
+        self.order.save()
+        self.assertEqual(self.rollup(), {})
+        self.assertEqual(sales.best_sellers(), [])
+
+        self.order.fulfillment_status = 'PENDING'
+        self.order.save()
+        self.assertEqual(self.rollup(), {'SALE-1': (2, Decimal('40.00')), 'SALE-2': (5, Decimal('25.00'))})
+
+    def test_rebuild_agrees_with_the_incremental_rollup(self):
+        other = Order.objects.create(shipping_address='2 Test Street')
+        OrderItem.objects.create(order=other, product=self.lamp, quantity=1, unit_price=Decimal('18.00'))
+        incremental = self.rollup()
+        sales.rebuild_rollup()
+        self.assertEqual(self.rollup(), incremental)
+        self.assertEqual(incremental['SALE-1'], (3, Decimal('58.00')))
+
+
+class SalesReportTests(TestCase):
+    def setUp(self):
+        electronics = Category.objects.create(name='Electronics', slug='electronics')
+        books = Category.objects.create(name='Books', slug='books')
+        SubCategory.objects.create(category=electronics, name='Headphones', slug='headphones')
+        SubCategory.objects.create(category=books, name='Fiction', slug='fiction')
+        headphones = make_product('REP-1')
+        novel = make_product('REP-2', category='Books', subcategory='Fiction')
+        reader = make_customer('reader@example.com', preferred_category='Books')
+
+        self.place(datetime(2024, 1, 10, 12), [(headphones, 2, '20.00'), (novel, 1, '15.00')], customer=reader)
+        self.place(datetime(2024, 2, 3, 12), [(headphones, 1, '18.00')])
+        self.place(datetime(2024, 2, 4, 12), [(novel, 3, '15.00')], fulfillment_status=Order.CANCELLED)
+
+    def place(self, placed_at, lines, **fields):
+        order = Order.objects.create(shipping_address='1 Report Road', **fields)
+        for product, quantity, price in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=Decimal(price))
+        # placed_at is auto_now_add, so backdate it with an update
+        Order.objects.filter(pk=order.pk).update(placed_at=timezone.make_aware(placed_at))
+
+    def build(self):
+        call_command('build_sales_facts', full=True, stdout=io.StringIO())
+
+    def summary(self, rows, *dimensions):
+        return {
+            (row['label'],) + tuple(row[name] for name in dimensions): (row['orders'], row['units'], row['revenue'])
+            for row in rows
+        }
+
+    def test_monthly_totals_skip_cancelled_orders(self):
+        self.build()
+        totals, segments = reports.sales_report(SalesFactDaily.LEVEL_SEGMENT)
+        self.assertEqual(self.summary(totals), {
+            ('2024-01',): (1, 3, Decimal('55.00')),
+            ('2024-02',): (1, 1, Decimal('18.00')),
+        })
+        self.assertEqual(self.summary(segments, 'segment'), {
+            ('2024-01', 'Books'): (1, 3, Decimal('55.00')),
+            ('2024-02', ''): (1, 1, Decimal('18.00')),
+        })
+        self.assertEqual(totals[0]['average_order_value'], Decimal('55.00'))
+
+    def test_quarterly_breakdowns_agree_with_the_order_lines(self):
+        self.build()
+        totals, categories = reports.sales_report(SalesFactDaily.LEVEL_CATEGORY, 'quarter')
+        self.assertEqual(self.summary(totals), {('2024 Q1',): (2, 4, Decimal('73.00'))})
+        self.assertEqual(self.summary(categories, 'category'), {
+            ('2024 Q1', 'Electronics'): (2, 3, Decimal('58.00')),
+            ('2024 Q1', 'Books'): (1, 1, Decimal('15.00')),
+        })
+        self.assertEqual([row['category'] for row in categories], ['Electronics', 'Books'])
+
+        _, subcategories = reports.sales_report(
+            SalesFactDaily.LEVEL_SUBCATEGORY, 'quarter', start=date(2024, 2, 1),
+        )
+        self.assertEqual(self.summary(subcategories, 'category', 'subcategory'), {
+            ('2024 Q1', 'Electronics', 'Headphones'): (1, 1, Decimal('18.00')),
+        })
+
+    def test_unlinked_products_report_under_their_own_category(self):
+        kit = make_product('REP-3', category='Toys & Games', subcategory='STEM Toys')  # no Category row
+        self.place(datetime(2024, 3, 1, 12), [(kit, 2, '30.00')])
+        Category.objects.get(name='Books').delete()  # unlinks the novel
+        self.build()
+
+        _, categories = reports.sales_report(SalesFactDaily.LEVEL_CATEGORY, 'quarter')
+        self.assertEqual(self.summary(categories, 'category'), {
+            ('2024 Q1', 'Electronics'): (2, 3, Decimal('58.00')),
+            ('2024 Q1', 'Toys & Games'): (1, 2, Decimal('60.00')),
+            ('2024 Q1', 'Books'): (1, 1, Decimal('15.00')),
+        })
+        _, subcategories = reports.sales_report(SalesFactDaily.LEVEL_SUBCATEGORY, 'quarter')
+        self.assertEqual(
+            {(row['category'], row['subcategory']) for row in subcategories},
+            {('Electronics', 'Headphones'), ('Toys & Games', 'STEM Toys'), ('Books', 'Fiction')},
+        )
+
+    def test_rebuilding_replaces_the_days(self):
+        self.build()
+        facts = SalesFactDaily.objects.count()
+        Order.objects.filter(fulfillment_status=Order.CANCELLED).update(fulfillment_status='PENDING')
+        self.build()
+        self.assertEqual(SalesFactDaily.objects.count(), facts + 3)
+        totals, _ = reports.sales_report(SalesFactDaily.LEVEL_SEGMENT)
+        self.assertEqual(self.summary(totals)[('2024-02',)], (2, 4, Decimal('63.00')))
+        self.assertEqual(reports.pending_days(today=date(2024, 2, 5)), (date(2024, 1, 29), date(2024, 2, 4)))
+
+
+class AssociationRuleTests(TestCase):
+    BASKETS = [(1, 2), (1, 2), (1, 2, 3), (3, 4), (3, 4), (4,)]
+
+    def test_pair_rules_on_a_small_fixture(self):
+        rules = association.mine_pair_rules(lambda: iter(self.BASKETS), min_support=0.34)
+        # (1, 3) and (2, 3) are bought together once, below the support floor
+        self.assertEqual(set(rules), {1, 2, 3, 4})
+        (consequent, support, confidence, lift), = rules[1]
+        self.assertEqual((consequent, support, confidence, lift), (2, 0.5, 1.0, 2.0))
+        (consequent, support, confidence, lift), = rules[3]
+        self.assertEqual(consequent, 4)
+        self.assertAlmostEqual(support, 1 / 3)
+        self.assertAlmostEqual(confidence, 2 / 3)
+        self.assertAlmostEqual(lift, 4 / 3)
+
+    def test_stored_rules_skip_cancelled_orders_and_sold_out_products(self):
+        lamp, bulb, shade = make_product('AR-1'), make_product('AR-2'), make_product('AR-3', stock=0)
+        for status, products in [('PENDING', [lamp, bulb]), ('PENDING', [lamp, bulb, shade]),
+                                 ('PENDING', [shade]), ('CANCELLED', [lamp, shade])]:
+            order = Order.objects.create(shipping_address='Somewhere', fulfillment_status=status)
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+
+        baskets = sorted(tuple(sorted(basket)) for basket in association.iter_order_baskets())
+        self.assertEqual(baskets, sorted([(lamp.pk, bulb.pk), (lamp.pk, bulb.pk, shade.pk), (shade.pk,)]))
+
+        rules = association.mine_pair_rules(association.iter_order_baskets, min_support=0.5)
+        association.store_rules(rules)
+        self.assertEqual(association.frequently_bought_with(lamp), [bulb])
+
+
+class OrderGridTests(TestCase):
+    def setUp(self):
+        product = make_product('OG-1')
+        may = timezone.make_aware(datetime(2024, 5, 31, 23, 30))
+        june = timezone.make_aware(datetime(2024, 6, 1, 0, 30))
+        self.orders = []
+        for placed_at, status, lines in [(may, 'PENDING', 2), (may, 'SHIPPED', 1), (june, 'PENDING', 3),
+                                         (june, 'CANCELLED', 0)]:
+            order = Order.objects.create(shipping_address='Somewhere', fulfillment_status=status)
+            Order.objects.filter(pk=order.pk).update(placed_at=placed_at)
+            for _ in range(lines):
+                OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+            self.orders.append(order)
+
+    def test_date_filters_include_the_whole_day(self):
+        grid = OrderGrid(QueryDict('placed_to=2024-05-31&status=PENDING&status=SHIPPED'))
+        self.assertEqual({order.pk for order in grid.page()}, {self.orders[0].pk, self.orders[1].pk})
+        grid = OrderGrid(QueryDict('placed_from=2024-06-01&status=PENDING'))
+        (order,) = grid.page()
+        self.assertEqual((order.pk, order.item_count), (self.orders[2].pk, 3))
+
+    def test_walk_through_tied_timestamps(self):
+        rows = walk_grid(OrderGrid, 'per_page=1')
+        self.assertEqual([order.pk for order in rows], [order.pk for order in reversed(self.orders)])
+        self.assertEqual([order.item_count for order in rows], [0, 3, 1, 2])
+
+
+class CustomerAutocompleteTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user(username='staff', password='secret-pass-123', is_staff=True))
+        self.ann = make_customer('ann.lee@example.com', name='Ann Lee')
+        self.bob = make_customer('bob@example.com', name='Annabel Bob')
+        make_customer('carl@example.com', name='Carl')
+
+    def search(self, query):
+        response = self.client.get(reverse('adminpanel:customer_search_api'), {'q': query})
+        return [result['id'] for result in response.json()['results']]
+
+    def test_matches_email_then_name_prefixes(self):
+        self.assertEqual(self.search('ANN'), [self.ann.pk, self.bob.pk])
+        self.assertEqual(self.search('bob@'), [self.bob.pk])
+        self.assertEqual(self.search('a'), [])
+
+    def test_order_form_renders_only_the_current_customer(self):
+        order = Order.objects.create(customer=self.ann, shipping_address='Somewhere')
+        with self.assertNumQueries(1):
+            html = str(OrderForm(instance=order)['customer'])
+        self.assertIn('Ann Lee &lt;ann.lee@example.com&gt;', html)
+        self.assertNotIn('Carl', html)
+
+
+class KpiCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def nonzero(self, values):
+        return {name: value for name, value in values.items() if value}
+
+    def test_signals_keep_counters_equal_to_a_recount(self):
+        ann = make_customer('k1@example.com', preferred_category='Books')
+        make_customer('k2@example.com', preferred_category='Books')
+        product = make_product('KPI-1')
+        Order.objects.create(customer=ann, shipping_address='Somewhere')
+        ann.preferred_category = 'Electronics'
+        ann.save()
+        product.delete()
+
+        self.assertEqual(self.nonzero(kpis.counters()), self.nonzero(kpis.actual_counters()))
+        self.assertEqual(kpis.counters()[kpis.segment_counter('Books')], 1)
+        self.assertEqual(kpis.reconcile(), {})
+
+    def test_reconcile_repairs_bulk_writes(self):
+        make_customer('k3@example.com', preferred_category='Books')
+        Customer.objects.update(preferred_category='Groceries')  # skips the signals
+        drift = kpis.reconcile()
+        self.assertEqual(drift, {
+            kpis.segment_counter('Books'): (1, 0),
+            kpis.segment_counter('Groceries'): (None, 1),
+        })
+        self.assertEqual(kpis.reconcile(), {})
+        self.assertEqual(
+            kpis.dashboard_payload('segment_summary'),
+            {'segment_summary': [{'preferred_category': 'Groceries', 'count': 1}]},
+        )
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='staff', password='secret-pass-123', is_staff=True)
+        self.client.force_login(self.user)
+
+    def download(self, name, query=''):
+        response = self.client.get(reverse(f'adminpanel:{name}') + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def csv_rows(self, name, query=''):
+        return list(csv.reader(io.StringIO(self.download(name, query).decode())))
+
+    def test_csv_has_a_row_per_filtered_product(self):
+        Category.objects.create(name='Electronics', slug='electronics')
+        Category.objects.create(name='Books', slug='books')
+        for i in range(5):
+            make_product(f'EXP-{i}', price=Decimal(10 + i))
+        make_product('EXP-B', category='Books', subcategory='Fiction')
+
+        rows = self.csv_rows('product_export', '?category=Electronics&sort=-price')
+        self.assertEqual(rows[0], exports.PRODUCT_EXPORT.headers)
+        self.assertEqual(len(rows), 1 + ProductGrid(QueryDict('category=Electronics')).queryset.count())
+        self.assertEqual([row[0] for row in rows[1:]], ['EXP-4', 'EXP-3', 'EXP-2', 'EXP-1', 'EXP-0'])
+
+    def test_chunks_stream_every_row_once(self):
+        for i in range(5):
+            make_customer(f'e{i}@example.com')
+        grid = CustomerGrid(QueryDict(''))
+        chunks = list(exports.stream_csv(exports.CUSTOMER_EXPORT, grid.queryset, grid.ordering, chunk_size=2))
+        self.assertEqual(len(chunks), 1 + 3)
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(sorted(row[0] for row in rows[1:]), [f'e{i}@example.com' for i in range(5)])
+
+    def test_orders_export_one_row_per_line(self):
+        product = make_product('EXP-O')
+        order = Order.objects.create(shipping_address='1 Export Lane')
+        OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=Decimal('10.00'))
+        OrderItem.objects.create(order=order, product=product, quantity=2, unit_price=Decimal('9.00'))
+        Order.objects.create(shipping_address='2 Export Lane')
+
+        rows = self.csv_rows('order_export')
+        self.assertEqual(len(rows), 1 + 3)
+        self.assertEqual(sorted(row[8] for row in rows[1:]), ['', '1', '2'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('adminpanel:customer_export') + '?format=xlsx')
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(exports.parquet_available(), "pyarrow is not installed")
+    def test_parquet_round_trips(self):
+        import pyarrow.parquet as pq
 
-# Create your tests here.
+        for i in range(3):
+            make_customer(f'p{i}@example.com')
+        table = pq.read_table(io.BytesIO(self.download('customer_export', '?format=parquet')))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column_names, exports.CUSTOMER_EXPORT.headers)
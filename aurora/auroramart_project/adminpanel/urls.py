@@ -3,6 +3,8 @@ from django.urls import path
 from . import views
 from .views import AdminLoginView, AdminLogoutView
 
+app_name = 'adminpanel'
+
 urlpatterns = [
     # Authentication
     path('login/', AdminLoginView.as_view(), name='admin_login'),
@@ -10,10 +12,20 @@ urlpatterns = [
 
     # Main page
     path('', views.admin_dashboard_home, name='admin_dashboard_home'),
+    path('api/dashboard/', views.dashboard_api, name='dashboard_api'),
     path('customers/', views.customer_list, name='customer_list'),
+    path('api/customers/', views.customer_list_api, name='customer_list_api'),
+    path('customers/export/', views.customer_export, name='customer_export'),
+    path('api/customers/search/', views.customer_search_api, name='customer_search_api'),
     path('products/', views.product_list, name='product_list'),
+    path('api/products/', views.product_list_api, name='product_list_api'),
+    path('products/export/', views.product_export, name='product_export'),
     path('orders/', views.order_list, name='order_list'),
+    path('api/orders/', views.order_list_api, name='order_list_api'),
+    path('orders/export/', views.order_export, name='order_export'),
     
+    path('products/import/', views.product_import, name='product_import'),
+
     # Product Detail and Delete
     path('products/<int:pk>/', views.product_detail, name='product_detail'),
     path('products/<int:pk>/delete/', views.product_delete, name='product_delete'),
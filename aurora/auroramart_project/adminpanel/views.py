@@ -1,128 +1,259 @@
 # auroramart_project/adminpanel/views.py
 
-from django.db.models import Count, Sum, F, DecimalField
+import io
+from datetime import date
+
+from django.db.models import Sum, F, DecimalField, Q
+from django.db.models.functions import Lower
 from django.shortcuts import render, redirect, get_object_or_404 # <-- Import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
-from .models import Customer, Product, Order, OrderItem, DecisionTreeModel
-from django.db import models
+from .models import Customer, Product, Order, OrderItem, DecisionTreeModel, SalesFactDaily
 # Import all forms
-from .forms import CustomerForm, ProductForm, OrderForm
-from django.http import HttpResponseNotAllowed # <-- Import this
+from .forms import CustomerForm, ProductForm, OrderForm, ProductImportForm, SalesReportForm
+from . import exports, importers, kpis, ml, reports
+from .grids import CustomerGrid, OrderGrid, ProductGrid
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse # <-- Import this
+from django.utils import timezone
 
 # --- Authentication Views ---
 # (Your Login and Logout views remain unchanged)
 class AdminLoginView(LoginView):
     """Custom login view for the admin panel."""
     template_name = 'adminpanel/login.html'
-    next_page = 'admin_dashboard_home'
+    next_page = 'adminpanel:admin_dashboard_home'
 
 class AdminLogoutView(LogoutView):
     """Logs out the user and redirects to the login page."""
-    next_page = 'admin_login'
+    next_page = 'adminpanel:admin_login'
 
 # --- Core Dashboard Views ---
-# (Your admin_dashboard_home view remains unchanged)
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def admin_dashboard_home(request):
     """
-    Main Dashboard View - Gathers KPIs and initial data for index.html.
+    Main Dashboard View - Renders the cached KPI payload (see kpis.py) into index.html.
     """
-    kpis = {
-        'total_customers': Customer.objects.count(),
-        'total_products': Product.objects.count(),
-        'active_models': DecisionTreeModel.objects.filter(is_active=True).count(),
-        'total_orders': Order.objects.count(),
-    }
-    
-    inventory_alerts = Product.objects.filter(
-        stock__lte=models.F('reorder_threshold')
-    ).order_by('stock')[:10]
-
-    segment_summary = Customer.objects.values('preferred_category') \
-        .annotate(count=Count('id')) \
-        .order_by('-count')[:5]
-
-    model_status = DecisionTreeModel.objects.order_by('-training_date')
-
     context = {
         'page_title': 'Dashboard',
-        'kpis': kpis,
-        'inventory_alerts': inventory_alerts,
-        'segment_summary': segment_summary,
-        'model_status': model_status,
+        **kpis.dashboard_payload(),
     }
 
     return render(request, 'adminpanel/index.html', context)
 
 
+@login_required(login_url='adminpanel:admin_login')
+def dashboard_api(request):
+    """The dashboard payload as JSON; ?widget=kpis returns just that widget."""
+    widget = request.GET.get('widget') or None
+    if widget is not None and widget not in kpis.DASHBOARD_WIDGETS:
+        return JsonResponse({'success': False, 'error': f"Unknown widget '{widget}'."}, status=400)
+    return JsonResponse({'success': True, **kpis.dashboard_payload(widget)})
+
+
 # --- Combined List & Create Views ---
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def customer_list(request):
     """View to LIST and CREATE Customers on one page."""
-    # (This view remains unchanged)
     if request.method == 'POST':
         form = CustomerForm(request.POST)
         if form.is_valid():
             form.save()
-            return redirect('customer_list')
+            return redirect('adminpanel:customer_list')
     else:
         form = CustomerForm()
 
-    customers = Customer.objects.all().order_by('-id')
+    grid = CustomerGrid(request.GET)
+    page = grid.page()
+    total_customers, count_is_exact = grid.count()
     context = {
         'page_title': 'Customer List',
-        'customers': customers,
+        'customers': page,
+        'grid': grid,
+        'total_customers': total_customers,
+        'count_is_exact': count_is_exact,
+        'can_export_parquet': exports.parquet_available(),
         'form': form
     }
     return render(request, 'adminpanel/customer_list.html', context)
 
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
+def customer_list_api(request):
+    """JSON pages of the customer grid, for the list page's "Load more"."""
+    grid = CustomerGrid(request.GET)
+    return JsonResponse(grid.as_json(grid.page()))
+
+
+CUSTOMER_SEARCH_LIMIT = 10
+
+def _prefix_range(field, prefix):
+    """
+    Match `field` starting with `prefix` as a range (prefix <= value < next
+    prefix) so the database can seek in an index on the expression instead
+    of scanning with LIKE.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+@login_required(login_url='adminpanel:admin_login')
+def customer_search_api(request):
+    """Customers whose email or name starts with ?q=, for the customer picker."""
+    query = request.GET.get('q', '').strip().lower()
+    if len(query) < 2:
+        return JsonResponse({'success': True, 'results': []})
+
+    customers = Customer.objects.annotate(
+        email_lower=Lower('email'), name_lower=Lower('name')
+    ).only('id', 'name', 'email')
+    # Two small index range scans rather than one OR that may scan the table
+    matches = list(customers.filter(_prefix_range('email_lower', query)).order_by('email_lower')[:CUSTOMER_SEARCH_LIMIT])
+    seen = {customer.pk for customer in matches}
+    for customer in customers.filter(_prefix_range('name_lower', query)).order_by('name_lower')[:CUSTOMER_SEARCH_LIMIT]:
+        if len(matches) >= CUSTOMER_SEARCH_LIMIT:
+            break
+        if customer.pk not in seen:
+            matches.append(customer)
+
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {'id': customer.pk, 'name': customer.name, 'email': customer.email,
+             'label': f'{customer.name} <{customer.email}>'}
+            for customer in matches
+        ],
+    })
+
+
+@login_required(login_url='adminpanel:admin_login')
 def product_list(request):
     """View to LIST and CREATE Products on one page."""
-    # (This view remains unchanged)
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
             form.save()
-            return redirect('product_list')
+            return redirect('adminpanel:product_list')
     else:
         form = ProductForm()
 
-    products = Product.objects.all().order_by('name')
+    grid = ProductGrid(request.GET)
+    page = grid.page()
+    total_products, count_is_exact = grid.count()
+    facets = grid.facets()
     context = {
         'page_title': 'Product List',
-        'products': products,
+        'products': page,
+        'grid': grid,
+        'total_products': total_products,
+        'count_is_exact': count_is_exact,
+        'filter_options': grid.faceted_choice_options(facets),
+        'low_stock_count': facets['low_stock'],
+        'can_export_parquet': exports.parquet_available(),
         'form': form
     }
     return render(request, 'adminpanel/product_list.html', context)
 
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
+def product_list_api(request):
+    """JSON pages of the product grid, for the list page's "Load more"."""
+    grid = ProductGrid(request.GET)
+    return JsonResponse(grid.as_json(grid.page()))
+
+
+@login_required(login_url='adminpanel:admin_login')
+def product_import(request):
+    """Upload a catalogue CSV and upsert its rows by SKU."""
+    result = None
+    if request.method == 'POST':
+        form = ProductImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Decode the upload as it streams instead of reading it whole
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = importers.import_products(lines)
+            except (importers.ImportFormatError, UnicodeDecodeError) as exc:
+                form.add_error('file', str(exc))
+    else:
+        form = ProductImportForm()
+
+    context = {
+        'page_title': 'Import Products',
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'adminpanel/product_import.html', context)
+
+
+@login_required(login_url='adminpanel:admin_login')
 def order_list(request):
     """View to LIST and CREATE Orders on one page."""
-    # (This view remains unchanged)
     if request.method == 'POST':
         form = OrderForm(request.POST)
         if form.is_valid():
             form.save()
-            return redirect('order_list')
+            return redirect('adminpanel:order_list')
     else:
         form = OrderForm()
 
-    orders = Order.objects.all().order_by('-placed_at')[:100]
+    grid = OrderGrid(request.GET)
+    page = grid.page()
+    total_orders, count_is_exact = grid.count()
     context = {
         'page_title': 'Order List',
-        'orders': orders,
+        'orders': page,
+        'grid': grid,
+        'total_orders': total_orders,
+        'count_is_exact': count_is_exact,
+        'can_export_parquet': exports.parquet_available(),
         'form': form
     }
     return render(request, 'adminpanel/order_list.html', context)
 
+
+@login_required(login_url='adminpanel:admin_login')
+def order_list_api(request):
+    """JSON pages of the order grid, for the list page's "Load more"."""
+    grid = OrderGrid(request.GET)
+    return JsonResponse(grid.as_json(grid.page()))
+
+# --- Exports ---
+
+def _export(request, grid_class, spec):
+    """Stream `spec` over the grid's current filters and sort."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': f"Unknown format '{fmt}'."}, status=400)
+    grid = grid_class(request.GET)
+    try:
+        content = exports.stream_export(spec, grid.queryset, grid.ordering, fmt)
+    except exports.ExportUnavailable as exc:
+        return JsonResponse({'success': False, 'error': str(exc)}, status=400)
+    response = StreamingHttpResponse(content, content_type=exports.CONTENT_TYPES[fmt])
+    filename = f"{spec.name}-{timezone.localdate():%Y%m%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required(login_url='adminpanel:admin_login')
+def customer_export(request):
+    return _export(request, CustomerGrid, exports.CUSTOMER_EXPORT)
+
+
+@login_required(login_url='adminpanel:admin_login')
+def product_export(request):
+    return _export(request, ProductGrid, exports.PRODUCT_EXPORT)
+
+
+@login_required(login_url='adminpanel:admin_login')
+def order_export(request):
+    """One row per order line."""
+    return _export(request, OrderGrid, exports.ORDER_EXPORT)
+
 # --- NEW: PRODUCT DETAIL / UPDATE VIEW ---
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def product_detail(request, pk):
     """
     View to display and update a single product.
@@ -138,7 +269,7 @@ def product_detail(request, pk):
         if form.is_valid():
             form.save()
             # Redirect back to the same detail page to see the changes
-            return redirect('product_detail', pk=product.pk)
+            return redirect('adminpanel:product_detail', pk=product.pk)
     else:
         # If it's a GET request, create the form pre-filled with the product's data
         form = ProductForm(instance=product)
@@ -152,7 +283,7 @@ def product_detail(request, pk):
 
 # --- NEW: PRODUCT DELETE VIEW ---
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def product_delete(request, pk):
     """
     View to delete a single product.
@@ -166,10 +297,10 @@ def product_delete(request, pk):
     product.delete()
     
     # After deleting, send the user back to the main product list
-    return redirect('product_list')
+    return redirect('adminpanel:product_list')
 
 # --- CUSTOMER DETAIL / UPDATE VIEW ---
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def customer_detail(request, pk):
     """
     View to display and update a single customer.
@@ -180,7 +311,7 @@ def customer_detail(request, pk):
         form = CustomerForm(request.POST, instance=customer)
         if form.is_valid():
             form.save()
-            return redirect('customer_detail', pk=customer.pk)
+            return redirect('adminpanel:customer_detail', pk=customer.pk)
     else:
         form = CustomerForm(instance=customer)
 
@@ -192,7 +323,7 @@ def customer_detail(request, pk):
     return render(request, 'adminpanel/customer_detail.html', context)
 
 # --- CUSTOMER DELETE VIEW ---
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def customer_delete(request, pk):
     """
     View to delete a single customer.
@@ -203,10 +334,10 @@ def customer_delete(request, pk):
 
     customer = get_object_or_404(Customer, pk=pk)
     customer.delete()
-    return redirect('customer_list')
+    return redirect('adminpanel:customer_list')
 
 # --- ORDER DETAIL / UPDATE VIEW ---
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def order_detail(request, pk):
     """
     View to display and update a single order.
@@ -217,7 +348,7 @@ def order_detail(request, pk):
         form = OrderForm(request.POST, instance=order)
         if form.is_valid():
             form.save()
-            return redirect('order_detail', pk=order.pk)
+            return redirect('adminpanel:order_detail', pk=order.pk)
     else:
         form = OrderForm(instance=order)
 
@@ -229,7 +360,7 @@ def order_detail(request, pk):
     return render(request, 'adminpanel/order_detail.html', context)
 
 # --- ORDER DELETE VIEW ---
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def order_delete(request, pk):
     """
     View to delete a single order.
@@ -240,23 +371,60 @@ def order_delete(request, pk):
 
     order = get_object_or_404(Order, pk=pk)
     order.delete()
-    return redirect('order_list')
+    return redirect('adminpanel:order_list')
 
 
-# --- AI/ML and Reports Skeletons (No Change) ---
-# (These views remain unchanged)
+# --- AI/ML and Reports Views ---
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def ai_studio_home(request):
     """Dedicated page for deploying and monitoring AI/ML models."""
-    models = DecisionTreeModel.objects.all()
-    context = {'page_title': 'AI/ML Studio', 'models': models}
+    classification = None
+    if request.method == 'POST':
+        # Re-run the active model over one capped batch of customers; the
+        # page posts back `after` to continue with the next one
+        try:
+            after = int(request.POST.get('after') or 0)
+        except ValueError:
+            after = 0
+        try:
+            changed, next_pk = ml.classify_batch(after)
+            classification = {'changed': changed, 'next': next_pk, 'error': None}
+        except ml.ModelUnavailable as exc:
+            classification = {'changed': 0, 'next': None, 'error': str(exc)}
+
+    trained_models = DecisionTreeModel.objects.order_by('-training_date')
+    context = {
+        'page_title': 'AI/ML Studio',
+        'trained_models': trained_models,
+        'classification': classification,
+    }
     return render(request, 'adminpanel/ai_studio_home.html', context)
 
 
-@login_required(login_url='admin_login')
+@login_required(login_url='adminpanel:admin_login')
 def custom_reports(request):
-    """Page for viewing custom reports and analytics."""
-    report_.data = {'sales_by_month': [15000, 18000, 16500]}
-    context = {'page_title': 'Custom Reports', 'reports': report_data}
+    """Sales rollups by month or quarter, read from the pre-aggregated fact table."""
+    form = SalesReportForm(request.GET or None)
+    options = form.cleaned_data if form.is_valid() else {}
+    level = options.get('level') or SalesFactDaily.LEVEL_CATEGORY
+    period = options.get('period') or 'month'
+    start = options.get('start')
+    end = options.get('end')
+    if start is None and end is None:
+        # Default to the trailing twelve months
+        today = timezone.localdate()
+        months = today.year * 12 + today.month - 1 - 11
+        start = date(months // 12, months % 12 + 1, 1)
+
+    totals, breakdown = reports.sales_report(level, period, start, end)
+    context = {
+        'page_title': 'Custom Reports',
+        'form': form,
+        'level': level,
+        'dimensions': reports.LEVEL_DIMENSIONS[level],
+        'totals': totals,
+        'breakdown': breakdown,
+        'last_built_day': reports.last_built_day(),
+    }
     return render(request, 'adminpanel/reports.html', context)
@@ -0,0 +1,28 @@
+# adminpanel/widgets.py
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Customer
+
+
+class CustomerAutocompleteWidget(forms.Widget):
+    """
+    Customer picker that searches as you type instead of rendering every
+    customer as an <option>. Rendering costs at most one query (the label of
+    the current value); suggestions come from the customer search endpoint.
+    """
+    template_name = 'adminpanel/widgets/customer_autocomplete.html'
+    search_url = reverse_lazy('adminpanel:customer_search_api')
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value not in (None, ''):
+            customer = Customer.objects.filter(pk=value).values_list('name', 'email').first()
+            if customer:
+                label = f'{customer[0]} <{customer[1]}>'
+        context['widget'].update({
+            'label': label,
+            'search_url': str(self.search_url),
+        })
+        return context
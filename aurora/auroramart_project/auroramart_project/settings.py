@@ -67,6 +67,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
                 'django.template.context_processors.static',
+                'storefront.context_processors.category_tree',
             ],
         },
     },
@@ -82,6 +83,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for another's lock before "database is
+            # locked"; checkout relies on it (see storefront/checkout.py)
+            'timeout': 20,
+        },
+        'TEST': {
+            # A file, not the shared-cache in-memory default: threads sharing
+            # an in-memory database get "table is locked" at once instead of
+            # waiting, which CheckoutConcurrencyTests needs to exercise
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared backend (Redis/Memcached) in production so that cache version
+# bumps from signals reach every worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auroramart',
     }
 }
 
@@ -0,0 +1,62 @@
+# storefront/cart.py
+"""Read-model for rendering a cart without per-line queries."""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from .models import CartItem
+
+SHIPPING_FEE = Decimal('4.00')
+
+
+@dataclass
+class CartLine:
+    """One cart row with its product already loaded."""
+    id: int
+    product: object
+    quantity: int
+    total_price: Decimal
+
+
+@dataclass
+class CartSummary:
+    """Cart lines plus the aggregates the cart page displays."""
+    cart: object
+    lines: list = field(default_factory=list)
+    item_count: int = 0
+    subtotal: Decimal = Decimal('0.00')
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    @property
+    def shipping_fee(self):
+        return SHIPPING_FEE
+
+    @property
+    def grand_total(self):
+        return self.subtotal + SHIPPING_FEE
+
+
+def build_cart_summary(cart):
+    """Fetch every line with its product in one query and total it up once."""
+    items = (
+        CartItem.objects.filter(cart=cart)
+        .select_related('product')
+        .order_by('added_at', 'id')
+    )
+    summary = CartSummary(cart=cart)
+    for item in items:
+        line_total = item.quantity * item.product.price
+        summary.lines.append(CartLine(item.id, item.product, item.quantity, line_total))
+        summary.item_count += item.quantity
+        summary.subtotal += line_total
+    return summary
+
+
+def cart_totals_payload(item_count, subtotal):
+    """The cart totals as returned by the cart AJAX endpoints."""
+    return {
+        'cart_total': item_count,
+        'cart_price': float(subtotal),
+    }
@@ -0,0 +1,183 @@
+# storefront/categories.py
+"""
+Per-process category tree for navigation and category page slugs.
+
+The whole Category/SubCategory tree is read once per worker (two queries)
+into immutable nodes, and rebuilt when the shared 'categories' version,
+bumped by the Category and SubCategory signals, moves on. Resolving a
+category page's slugs and rendering the navigation then never touch the
+database.
+
+Products point at these rows through integer foreign keys derived from their
+category and subcategory strings; link_product() and link_products() keep
+the two in step. Rows are never created as a side effect of saving a
+product: a product naming a missing row stays unlinked until the row is
+added (in the admin, or with the create_product_categories command), and
+creating a row links the products that name it.
+"""
+import threading
+from dataclasses import dataclass, field
+
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
+from django.utils.text import slugify
+
+from adminpanel.caching import get_version
+from adminpanel.models import Product
+from .homepage import CATEGORY_VERSION
+from .models import Category, SubCategory
+
+
+@dataclass(frozen=True)
+class SubCategoryNode:
+    id: int
+    name: str
+    slug: str
+    description: str
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    id: int
+    name: str
+    slug: str
+    description: str
+    is_active: bool
+    children: tuple = ()
+    children_by_slug: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def active_children(self):
+        return [child for child in self.children if child.is_active]
+
+
+class CategoryTree:
+    def __init__(self, categories):
+        self.categories = categories
+        self.by_slug = {category.slug: category for category in categories}
+        self.by_name = {category.name: category for category in categories}
+        self.by_id = {category.id: category for category in categories}
+        self.subcategories_by_id = {
+            child.id: child for category in categories for child in category.children
+        }
+
+    @property
+    def active_categories(self):
+        return [category for category in self.categories if category.is_active]
+
+    def resolve(self, category_slug, subcategory_slug=None):
+        """
+        Return (category, subcategory) nodes for a category page's slugs;
+        the category must be active. Raises Http404 like get_object_or_404.
+        """
+        category = self.by_slug.get(category_slug)
+        if category is None or not category.is_active:
+            raise Http404("No category matches the given query.")
+        subcategory = None
+        if subcategory_slug:
+            subcategory = category.children_by_slug.get(subcategory_slug)
+            if subcategory is None:
+                raise Http404("No subcategory matches the given query.")
+        return category, subcategory
+
+    def category_name(self, category_id):
+        category = self.by_id.get(category_id)
+        return category.name if category else ''
+
+    def subcategory_name(self, subcategory_id):
+        subcategory = self.subcategories_by_id.get(subcategory_id)
+        return subcategory.name if subcategory else ''
+
+    def category_ids(self, names):
+        return [self.by_name[name].id for name in names if name in self.by_name]
+
+    def subcategory_ids(self, names):
+        """Subcategory names repeat across categories, so one name may give several ids."""
+        names = set(names)
+        return [child.id for child in self.subcategories_by_id.values() if child.name in names]
+
+
+def build_tree():
+    children = {}
+    for sub in SubCategory.objects.order_by('name'):
+        children.setdefault(sub.category_id, []).append(
+            SubCategoryNode(sub.id, sub.name, sub.slug, sub.description, sub.is_active)
+        )
+    categories = []
+    for category in Category.objects.order_by('name'):
+        nodes = tuple(children.get(category.id, ()))
+        categories.append(CategoryNode(
+            category.id, category.name, category.slug, category.description, category.is_active,
+            nodes, {node.slug: node for node in nodes},
+        ))
+    return CategoryTree(categories)
+
+
+_lock = threading.Lock()
+_tree = None
+_tree_version = None
+
+
+def get_tree():
+    """Return this process's tree, rebuilding it if the categories changed."""
+    global _tree, _tree_version
+    version = get_version(CATEGORY_VERSION)
+    if _tree is None or _tree_version != version:
+        with _lock:
+            if _tree is None or _tree_version != version:
+                _tree = build_tree()
+                _tree_version = version
+    return _tree
+
+
+# --- Product Links ---
+
+def node_ids(category_name, subcategory_name):
+    """
+    Return the (Category id, SubCategory id) a product's strings name; either
+    is None while no such row exists.
+
+    This reads the database rather than the tree: a tree built inside a
+    transaction that later rolls back could hand out ids that never existed.
+    """
+    ids = SubCategory.objects.filter(
+        category__name=category_name, name=subcategory_name,
+    ).order_by('pk').values_list('category_id', 'pk').first()
+    if ids is not None:
+        return ids
+    return Category.objects.filter(name=category_name).values_list('pk', flat=True).first(), None
+
+
+def link_product(product):
+    """Set a product's category links from its strings, ahead of saving it."""
+    product.category_ref_id, product.subcategory_ref_id = node_ids(product.category, product.subcategory)
+
+
+def link_products(queryset):
+    """Set the category links of every product in `queryset` with one UPDATE."""
+    return queryset.update(
+        category_ref=Subquery(Category.objects.filter(name=OuterRef('category')).values('pk')[:1]),
+        subcategory_ref=Subquery(
+            SubCategory.objects.filter(category__name=OuterRef('category'), name=OuterRef('subcategory'))
+            .order_by('pk').values('pk')[:1]
+        ),
+    )
+
+
+def create_missing_nodes():
+    """
+    Create a Category/SubCategory row for every pair of strings products use
+    that has none yet, and return how many rows were created. Their
+    post_save signals link the products that name them.
+    """
+    pairs = set(Product.objects.order_by().values_list('category', 'subcategory').distinct())
+    pairs -= set(SubCategory.objects.values_list('category__name', 'name'))
+    created = 0
+    for category_name, subcategory_name in sorted(pairs):
+        category, category_created = Category.objects.get_or_create(
+            name=category_name, defaults={'slug': slugify(category_name)},
+        )
+        SubCategory.objects.create(category=category, name=subcategory_name, slug=slugify(subcategory_name))
+        created += 1 + category_created
+    return created
@@ -0,0 +1,109 @@
+# storefront/checkout.py
+"""
+Checkout: turn a Cart into an adminpanel Order in one transaction.
+
+The cart's products are locked in primary-key order (so two checkouts that
+share products always lock them in the same order and cannot deadlock), and
+each line's stock is taken with a conditional UPDATE ... WHERE stock >= qty.
+If any line is short, the whole transaction rolls back and nothing is sold.
+Order lines are bulk-created with the locked prices as unit_price snapshots.
+
+On SQLite the transaction is opened with BEGIN IMMEDIATE (see
+write_transaction()), so concurrent checkouts queue on the busy timeout.
+
+bulk_create() skips the OrderItem signals, so the sales rollup is updated
+with sales.record_order(); the Order itself is saved normally and counts
+towards the dashboard KPIs through its own signal.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from adminpanel import sales
+from adminpanel.caching import CATALOGUE_VERSION, bump_version
+from adminpanel.models import Order, OrderItem, Product
+from .cart import SHIPPING_FEE
+from .models import Cart, CartItem
+from .transactions import write_transaction
+
+
+class CheckoutError(Exception):
+    """The cart cannot be checked out; the message is safe to show to shoppers."""
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, product_name, available):
+        self.product_name = product_name
+        self.available = available
+        super().__init__(f"Only {available} of {product_name} left in stock.")
+
+
+@dataclass
+class CheckoutLine:
+    product_id: int
+    name: str
+    quantity: int
+    unit_price: Decimal
+
+
+def checkout(cart, shipping_address, customer=None):
+    """
+    Place an order for everything in `cart` and empty it. Returns the Order.
+
+    Raises CheckoutError (or its OutOfStock subclass) without changing
+    anything if the cart is empty or a product is short.
+    """
+    if not shipping_address.strip():
+        raise CheckoutError("A shipping address is required.")
+
+    with write_transaction():
+        quantities = dict(
+            CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity')
+        )
+        if not quantities:
+            raise CheckoutError("Your cart is empty.")
+
+        locked = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=quantities)
+            .order_by('pk')
+            .values_list('pk', 'name', 'price', 'stock')
+        )
+        lines = [
+            CheckoutLine(product_id, name, quantities[product_id], price)
+            for product_id, name, price, _ in locked
+        ]
+
+        # The conditional UPDATE is what guarantees no oversell, even on
+        # backends where select_for_update() is a no-op
+        for line, (_, _, _, stock) in zip(lines, locked):
+            taken = Product.objects.filter(pk=line.product_id, stock__gte=line.quantity).update(
+                stock=F('stock') - line.quantity
+            )
+            if not taken:
+                raise OutOfStock(line.name, stock)
+        sold_out = any(stock == line.quantity for line, (_, _, _, stock) in zip(lines, locked))
+
+        subtotal = sum((line.quantity * line.unit_price for line in lines), Decimal('0.00'))
+        order = Order.objects.create(
+            customer=customer,
+            shipping_address=shipping_address.strip(),
+            total_amount=subtotal + SHIPPING_FEE,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=line.product_id, quantity=line.quantity, unit_price=line.unit_price)
+            for line in lines
+        ])
+        sales.record_order(order)
+
+        CartItem.objects.filter(cart=cart).delete()
+        Cart.objects.filter(pk=cart.pk).update(item_count=0, subtotal=0)
+        cart.item_count = 0
+        cart.subtotal = Decimal('0.00')
+
+        if sold_out:
+            # update() skipped the Product signals; in-stock listings are cached
+            transaction.on_commit(lambda: bump_version(CATALOGUE_VERSION))
+    return order
@@ -0,0 +1,9 @@
+# storefront/context_processors.py
+from django.utils.functional import SimpleLazyObject
+
+from .categories import get_tree
+
+
+def category_tree(request):
+    """The category tree for the navigation; only loaded if a template uses it."""
+    return {'category_tree': SimpleLazyObject(get_tree)}
@@ -0,0 +1,203 @@
+# storefront/facets.py
+"""
+Faceted navigation for the product list.
+
+Category, subcategory, price-bucket and rating counts all come from one
+GROUP BY over the current result set (served by a covering partial index),
+grouped by (category, subcategory, price bucket, rating band). That gives at
+most a few thousand rows, and every facet count is summed from them in
+Python. Each facet is counted under the other facets' selections but not its
+own, so picking "Books" still shows how many products the other categories
+would add.
+
+Categories and subcategories are selected and grouped by their integer ids;
+labels come from the in-process category tree.
+
+Without a search query the grouped rows only depend on the page's category
+and price range, so they are cached under the catalogue version.
+"""
+import hashlib
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from adminpanel.caching import CATALOGUE_VERSION, get_version
+from .categories import get_tree as get_category_tree
+
+FACET_CACHE_TIMEOUT = 60 * 15
+
+# (key, label, lower bound, upper bound); a bucket holds lower <= price < upper
+PRICE_BUCKETS = [
+    ('0-25', 'Under $25', None, 25),
+    ('25-50', '$25 to $50', 25, 50),
+    ('50-100', '$50 to $100', 50, 100),
+    ('100-250', '$100 to $250', 100, 250),
+    ('250-500', '$250 to $500', 250, 500),
+    ('500+', '$500 & above', 500, None),
+]
+PRICE_BUCKET_KEYS = [key for key, _, _, _ in PRICE_BUCKETS]
+
+# "N stars & up" options; a product's band is its display rating rounded down
+RATING_THRESHOLDS = (5, 4, 3, 2, 1)
+
+
+def _price_condition(lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(price__gte=lower)
+    if upper is not None:
+        condition &= Q(price__lt=upper)
+    return condition
+
+
+def _ids(values):
+    return [int(value) for value in values if value.isdigit()]
+
+
+def _decimal(value):
+    try:
+        return Decimal(value) if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+class ProductFacets:
+    """Reads facet selections from the query string, filters by them and counts them."""
+
+    def __init__(self, params):
+        self.categories = _ids(params.getlist('category'))
+        self.subcategories = _ids(params.getlist('subcategory'))
+        self.prices = [key for key in params.getlist('price') if key in PRICE_BUCKET_KEYS]
+        try:
+            self.rating = int(params.get('rating', ''))
+        except ValueError:
+            self.rating = None
+        if self.rating not in RATING_THRESHOLDS:
+            self.rating = None
+        # The free-form price range narrows the result set before faceting
+        self.min_price = _decimal(params.get('min_price'))
+        self.max_price = _decimal(params.get('max_price'))
+
+    @property
+    def is_active(self):
+        return bool(self.categories or self.subcategories or self.prices or self.rating)
+
+    def apply_range(self, queryset):
+        if self.min_price is not None:
+            queryset = queryset.filter(price__gte=self.min_price)
+        if self.max_price is not None:
+            queryset = queryset.filter(price__lte=self.max_price)
+        return queryset
+
+    def filter(self, queryset):
+        """Apply the selections: OR within a facet, AND across facets."""
+        if self.categories:
+            queryset = queryset.filter(category_ref__in=self.categories)
+        if self.subcategories:
+            queryset = queryset.filter(subcategory_ref__in=self.subcategories)
+        if self.prices:
+            condition = Q()
+            for key, _, lower, upper in PRICE_BUCKETS:
+                if key in self.prices:
+                    condition |= _price_condition(lower, upper)
+            queryset = queryset.filter(condition)
+        if self.rating:
+            queryset = queryset.filter(display_rating__gte=self.rating)
+        return queryset
+
+    def grouped_rows(self, queryset, cache_scope=None):
+        """
+        One row per (category, subcategory, price bucket, rating band) with
+        its product count. With a `cache_scope` (anything identifying the
+        queryset besides the catalogue), the rows are cached.
+        """
+        key = None
+        if cache_scope is not None:
+            digest = hashlib.md5(repr(cache_scope).encode()).hexdigest()
+            key = f'storefront:facets:{get_version(CATALOGUE_VERSION)}:{digest}'
+            rows = cache.get(key)
+            if rows is not None:
+                return rows
+
+        price_bucket = Case(
+            *[When(_price_condition(lower, upper), then=Value(position))
+              for position, (_, _, lower, upper) in enumerate(PRICE_BUCKETS)],
+            output_field=IntegerField(),
+        )
+        rating_band = Case(
+            *[When(display_rating__gte=threshold, then=Value(threshold)) for threshold in RATING_THRESHOLDS],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        rows = list(
+            queryset.order_by()
+            .annotate(price_bucket=price_bucket, rating_band=rating_band)
+            .values_list('category_ref', 'subcategory_ref', 'price_bucket', 'rating_band')
+            .annotate(count=Count('id'))
+        )
+        if key:
+            cache.set(key, rows, FACET_CACHE_TIMEOUT)
+        return rows
+
+    def counts(self, rows):
+        """Sum the grouped rows into per-facet counts, disjunctively."""
+        categories = set(self.categories)
+        subcategories = set(self.subcategories)
+        prices = {PRICE_BUCKET_KEYS.index(key) for key in self.prices}
+
+        counts = {name: Counter() for name in ('category', 'subcategory', 'price', 'rating')}
+        for category, subcategory, price_bucket, rating_band, count in rows:
+            matches = {
+                'category': not categories or category in categories,
+                'subcategory': not subcategories or subcategory in subcategories,
+                'price': not prices or price_bucket in prices,
+                'rating': not self.rating or rating_band >= self.rating,
+            }
+
+            def others_match(facet):
+                return all(matched for name, matched in matches.items() if name != facet)
+
+            if others_match('category'):
+                counts['category'][category] += count
+            if others_match('subcategory'):
+                counts['subcategory'][subcategory] += count
+            if others_match('price'):
+                counts['price'][price_bucket] += count
+            if others_match('rating'):
+                for threshold in RATING_THRESHOLDS:
+                    if rating_band >= threshold:
+                        counts['rating'][threshold] += count
+        return counts
+
+    def options(self, rows):
+        """The sidebar options, as lists of dicts with value, label, count and selected."""
+        counts = self.counts(rows)
+        tree = get_category_tree()
+
+        def id_options(facet, name_of, selected):
+            # Selected values stay listed (so they can be unticked) even when
+            # the other selections leave them with no products
+            node_ids = set(counts[facet]) | set(selected)
+            options = [
+                {'value': node_id, 'label': name_of(node_id), 'count': counts[facet][node_id],
+                 'selected': node_id in selected}
+                for node_id in node_ids
+                if node_id is not None and name_of(node_id) and (counts[facet][node_id] or node_id in selected)
+            ]
+            return sorted(options, key=lambda option: option['label'])
+
+        return {
+            'category': id_options('category', tree.category_name, self.categories),
+            'subcategory': id_options('subcategory', tree.subcategory_name, self.subcategories),
+            'price': [
+                {'value': key, 'label': label, 'count': counts['price'][position], 'selected': key in self.prices}
+                for position, (key, label, _, _) in enumerate(PRICE_BUCKETS)
+            ],
+            'rating': [
+                {'value': threshold, 'label': f'{threshold} & up', 'count': counts['rating'][threshold],
+                 'selected': threshold == self.rating}
+                for threshold in RATING_THRESHOLDS
+            ],
+        }
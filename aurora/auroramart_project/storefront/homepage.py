@@ -0,0 +1,56 @@
+# storefront/homepage.py
+"""
+Cached data for the homepage.
+
+Everything the homepage shows is computed once and stored in Django's cache
+under a key built from the catalogue, banner, category and review versions,
+so a signal bumping any of them makes the next request rebuild it.
+"""
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+
+from adminpanel.caching import CATALOGUE_VERSION, get_version
+from adminpanel.models import Product
+from adminpanel.sales import best_sellers
+from .models import Banner, Category
+
+BANNER_VERSION = 'banners'
+CATEGORY_VERSION = 'categories'
+# Bumped whenever a product's review stats change
+REVIEW_VERSION = 'reviews'
+
+# Sales are not versioned, so best sellers refresh at most this often
+HOMEPAGE_CACHE_TIMEOUT = 60 * 15
+PRODUCTS_PER_SECTION = 8
+BEST_SELLER_DAYS = 30
+
+
+def homepage_version():
+    """A single token that changes whenever any homepage input changes."""
+    return '.'.join(str(get_version(name)) for name in (
+        CATALOGUE_VERSION, BANNER_VERSION, CATEGORY_VERSION, REVIEW_VERSION,
+    ))
+
+
+def get_homepage_data():
+    """Return the homepage lists, from the cache when possible."""
+    version = homepage_version()
+    key = f'storefront:homepage:{version}'
+    data = cache.get(key)
+    if data is None:
+        top_rated = list(
+            Product.objects.filter(stock__gt=0).select_related('review_stats')
+            .order_by('-display_rating', '-id')[:PRODUCTS_PER_SECTION]
+        )
+        # Fall back to top rated until there are sales in the window
+        top_sellers = best_sellers(BEST_SELLER_DAYS, PRODUCTS_PER_SECTION) or top_rated
+        prefetch_related_objects(top_sellers, 'review_stats')
+        data = {
+            'featured_products': top_rated,
+            'best_sellers': top_sellers,
+            'banners': list(Banner.objects.filter(is_active=True).order_by('display_order')),
+            'categories': list(Category.objects.filter(is_active=True)),
+        }
+        cache.set(key, data, HOMEPAGE_CACHE_TIMEOUT)
+    data['homepage_version'] = version
+    return data
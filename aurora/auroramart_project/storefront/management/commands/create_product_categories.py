@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from storefront import categories
+
+
+class Command(BaseCommand):
+    help = "Create the storefront Category/SubCategory rows that products name but that do not exist yet."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = categories.create_missing_nodes()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Created {created} category row(s) in {elapsed:.2f}s."))
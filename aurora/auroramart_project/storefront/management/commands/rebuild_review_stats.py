@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel.caching import CATALOGUE_VERSION, bump_version
+from storefront.homepage import REVIEW_VERSION
+from storefront.models import ProductReviewStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-product review counts, sums and histograms from ProductReview, "
+        "and the products' display ratings."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuilt = ProductReviewStats.objects.rebuild()
+        bump_version(CATALOGUE_VERSION)
+        bump_version(REVIEW_VERSION)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt review stats for {rebuilt} product(s) in {elapsed:.2f}s."))
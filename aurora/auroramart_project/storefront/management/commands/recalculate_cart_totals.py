@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from storefront.models import Cart
+
+
+class Command(BaseCommand):
+    help = "Verify the denormalized Cart.item_count/subtotal columns against the cart lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Recompute the totals of every cart that has drifted.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Number of carts streamed from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = self.find_drifted(options['chunk_size'])
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All cart totals are consistent."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(drifted)} cart(s) have drifted totals."))
+        if not options['fix']:
+            for cart_id in drifted[:20]:
+                self.stdout.write(f"  cart {cart_id}")
+            self.stdout.write("Re-run with --fix to repair them.")
+            return
+
+        Cart.objects.filter(id__in=drifted).recalculate_totals()
+        remaining = self.find_drifted(options['chunk_size'])
+        if remaining:
+            self.stderr.write(self.style.ERROR(f"{len(remaining)} cart(s) still drifted after repair."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} cart(s)."))
+
+    def find_drifted(self, chunk_size):
+        """Return the ids of carts whose stored totals differ from their lines."""
+        carts = Cart.objects.with_expected_totals().values_list(
+            'id', 'item_count', 'subtotal', 'expected_item_count', 'expected_subtotal'
+        )
+
+        return [
+            cart_id
+            for cart_id, count, subtotal, expected_count, expected_subtotal in carts.iterator(chunk_size=chunk_size)
+            if count != expected_count or subtotal != expected_subtotal
+        ]
@@ -0,0 +1,54 @@
+# Creates the full-text index used by storefront.search.
+
+from django.db import migrations
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS storefront_product_search USING fts5(
+    name, description, category, subcategory,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+SQLITE_POPULATE = """
+INSERT INTO storefront_product_search (rowid, name, description, category, subcategory)
+SELECT id, name, description, category, subcategory FROM adminpanel_product
+"""
+SQLITE_DROP = "DROP TABLE IF EXISTS storefront_product_search"
+
+POSTGRES_CREATE = """
+CREATE INDEX IF NOT EXISTS storefront_product_search_gin ON adminpanel_product USING gin ((
+    setweight(to_tsvector('english'::regconfig, COALESCE(name, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, COALESCE(category, '') || ' ' || COALESCE(subcategory, '')), 'B') ||
+    setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'D')
+))
+"""
+POSTGRES_DROP = "DROP INDEX IF EXISTS storefront_product_search_gin"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE)
+        schema_editor.execute(SQLITE_POPULATE)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0002_alter_customer_education_and_more'),
+        ('storefront', '0002_cart_denormalized_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
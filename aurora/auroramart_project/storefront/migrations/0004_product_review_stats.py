@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_review_stats(apps, schema_editor):
+    ProductReview = apps.get_model('storefront', 'ProductReview')
+    ProductReviewStats = apps.get_model('storefront', 'ProductReviewStats')
+
+    rows = ProductReview.objects.order_by().values('product').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)},
+    )
+    ProductReviewStats.objects.bulk_create([
+        ProductReviewStats(
+            product_id=row['product'], review_count=row['count'], review_sum=row['total'],
+            **{f'rating_{stars}': row[f'stars_{stars}'] for stars in range(1, 6)},
+        )
+        for row in rows
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0015_product_category_link_indexes'),
+        ('storefront', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductReviewStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_stats', serialize=False, to='adminpanel.product')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('review_sum', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Product review stats',
+            },
+        ),
+        migrations.RunPython(seed_review_stats, migrations.RunPython.noop),
+    ]
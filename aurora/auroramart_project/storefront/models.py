@@ -1,10 +1,43 @@
 # models.py
-from django.db import models
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum, Subquery, OuterRef, DecimalField, FloatField, IntegerField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.contrib.auth.models import User
-from adminpanel.models import Product, Customer
+from adminpanel.models import PRODUCT_CATEGORY_CHOICES, PRODUCT_SUBCATEGORY_CHOICES, Product, Customer
+from .transactions import write_transaction
 
 # --- Shopping Cart Models ---
 
+class CartQuerySet(models.QuerySet):
+    def _line_totals(self):
+        """Correlated subqueries computing each cart's totals from its lines."""
+        money = DecimalField(max_digits=12, decimal_places=2)
+        lines = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+        item_count = lines.annotate(total=Sum('quantity')).values('total')
+        subtotal = lines.annotate(
+            total=Sum(F('quantity') * F('product__price'), output_field=money)
+        ).values('total')
+        return {
+            'item_count': Coalesce(Subquery(item_count, output_field=IntegerField()), Value(0)),
+            'subtotal': Coalesce(Subquery(subtotal, output_field=money), Value(0, output_field=money)),
+        }
+
+    def with_expected_totals(self):
+        """Annotate expected_item_count/expected_subtotal computed from the lines."""
+        totals = self._line_totals()
+        return self.annotate(
+            expected_item_count=totals['item_count'],
+            expected_subtotal=totals['subtotal'],
+        )
+
+    def recalculate_totals(self):
+        """Recompute item_count/subtotal from the cart lines in one UPDATE."""
+        return self.update(**self._line_totals())
+
+
 class Cart(models.Model):
     """Shopping cart for a user session or logged-in user."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -12,6 +45,13 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized totals, maintained by the mutation methods below so the
+    # header badge and the cart AJAX responses never have to scan the lines.
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = CartQuerySet.as_manager()
+
     def __str__(self):
         if self.user:
             return f"Cart for {self.user.username}"
@@ -19,11 +59,69 @@ class Cart(models.Model):
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.item_count
 
     @property
     def total_price(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.subtotal
+
+    def _apply_delta(self, quantity, amount):
+        """Shift the stored totals in a single UPDATE and mirror it in memory."""
+        Cart.objects.filter(pk=self.pk).update(
+            item_count=F('item_count') + quantity,
+            subtotal=F('subtotal') + amount,
+        )
+        self.item_count += quantity
+        self.subtotal += amount
+
+    def add_product(self, product, quantity=1):
+        """Add a product (or more of it) to the cart and return the line."""
+        with transaction.atomic():
+            item, created = CartItem.objects.get_or_create(
+                cart=self,
+                product=product,
+                defaults={'quantity': quantity}
+            )
+            if not created:
+                CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') + quantity)
+                item.quantity += quantity
+            self._apply_delta(quantity, quantity * product.price)
+        return item
+
+    def _locked_quantity(self, item):
+        """The line's stored quantity, locked until the transaction ends; None if it is gone."""
+        return CartItem.objects.select_for_update().filter(pk=item.pk).values_list('quantity', flat=True).first()
+
+    def set_quantity(self, item, quantity):
+        """Change a line's quantity; a quantity of zero or less removes it."""
+        if quantity <= 0:
+            return self.remove_item(item)
+        # The delta is taken from the stored quantity, not `item`'s, so two
+        # concurrent edits of the same line cannot both count their change
+        with write_transaction():
+            current = self._locked_quantity(item)
+            if current is None:
+                return item
+            CartItem.objects.filter(pk=item.pk).update(quantity=quantity)
+            item.quantity = quantity
+            delta = quantity - current
+            self._apply_delta(delta, delta * item.product.price)
+        return item
+
+    def remove_item(self, item):
+        """Delete a line from the cart."""
+        with write_transaction():
+            current = self._locked_quantity(item)
+            if current is None:
+                return item
+            item.delete()
+            self._apply_delta(-current, -current * item.product.price)
+        return item
+
+    def recalculate_totals(self):
+        """Rebuild the denormalized totals from the cart lines."""
+        Cart.objects.filter(pk=self.pk).recalculate_totals()
+        self.refresh_from_db(fields=['item_count', 'subtotal'])
 
 class CartItem(models.Model):
     """Individual item in a shopping cart."""
@@ -90,10 +188,154 @@ class ProductReview(models.Model):
 
     class Meta:
         unique_together = ['product', 'user']
+        # One per review sort on the product page, each ending in id for the keyset
+        indexes = [
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_created_idx'),
+            models.Index(fields=['product', '-rating', '-created_at', '-id'], name='review_product_rating_idx'),
+            models.Index(
+                fields=['product', '-is_verified_purchase', '-created_at', '-id'],
+                name='review_product_verified_idx',
+            ),
+        ]
+
+def review_average(total, count):
+    """
+    SQL for total / count rounded half up to one decimal place (NULL when
+    count is 0). The rounding is done in integers so it matches
+    ProductReviewStats.average exactly.
+    """
+    tenths = (20 * F(total) + F(count)) / NullIf(2 * F(count), 0)
+    return Cast(tenths, FloatField()) / Value(10.0)
+
+class ProductReviewStatsQuerySet(models.QuerySet):
+    def adjust(self, product_id, rating, delta):
+        """Add (or with delta=-1, take away) one review of `rating` stars."""
+        rating_field = f'rating_{rating}'
+        rows = self.filter(product_id=product_id)
+        if rows.update(**{
+            'review_count': F('review_count') + delta,
+            'review_sum': F('review_sum') + delta * rating,
+            rating_field: F(rating_field) + delta,
+        }) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(product_id=product_id, review_count=delta, review_sum=delta * rating,
+                            **{rating_field: delta})
+        except IntegrityError:
+            # Another request created the row first
+            self.adjust(product_id, rating, delta)
+
+    def rebuild(self, product_ids=None):
+        """
+        Recompute the stats, and the products' display ratings, from the
+        reviews; returns the number of stats rows written.
+        """
+        reviews = ProductReview.objects.order_by().values('product')
+        stats = self
+        products = Product.objects.all()
+        if product_ids is not None:
+            reviews = reviews.filter(product_id__in=product_ids)
+            stats = stats.filter(product_id__in=product_ids)
+            products = products.filter(pk__in=product_ids)
+        rows = reviews.annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in ProductReviewStats.STARS},
+        )
+        with transaction.atomic():
+            stats.delete()
+            created = self.bulk_create([
+                ProductReviewStats(
+                    product_id=row['product'], review_count=row['count'], review_sum=row['total'],
+                    **{f'rating_{stars}': row[f'stars_{stars}'] for stars in ProductReviewStats.STARS},
+                )
+                for row in rows
+            ], batch_size=2000)
+            self.sync_display_ratings(products)
+        return len(created)
+
+    def sync_display_ratings(self, products):
+        """
+        Set `products`' display_rating to their review average, or their
+        catalogue rating when they have no reviews; returns how many changed.
+        """
+        average = ProductReviewStats.objects.filter(product=OuterRef('pk')).annotate(
+            value=review_average('review_sum', 'review_count'),
+        ).values('value')[:1]
+        display_rating = Coalesce(
+            Subquery(average, output_field=DecimalField(max_digits=3, decimal_places=1)), F('rating'),
+        )
+        return products.exclude(display_rating=display_rating).update(display_rating=display_rating)
+
+class ProductReviewStats(models.Model):
+    """
+    Running review totals for one product, kept in step with ProductReview by
+    signals so pages can show live ratings without aggregating reviews.
+    Products nobody has reviewed have no row.
+    """
+    STARS = (5, 4, 3, 2, 1)
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='review_stats')
+    review_count = models.PositiveIntegerField(default=0)
+    review_sum = models.PositiveIntegerField(default=0)
+    # Histogram: how many reviews gave each star rating
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = ProductReviewStatsQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.product_id}: {self.review_count} reviews"
+
+    @property
+    def average(self):
+        if not self.review_count:
+            return None
+        # Rounded half up, as review_average() does in SQL
+        tenths = (20 * self.review_sum + self.review_count) // (2 * self.review_count)
+        return Decimal(tenths).scaleb(-1)
+
+    @property
+    def histogram(self):
+        """(stars, count, percent) from five stars down."""
+        return [
+            (stars, count, round(100 * count / self.review_count) if self.review_count else 0)
+            for stars, count in ((stars, getattr(self, f'rating_{stars}')) for stars in self.STARS)
+        ]
+
+    class Meta:
+        verbose_name_plural = "Product review stats"
 
 # --- Category Models for Storefront ---
 
-class Category(models.Model):
+class ProductNameMixin:
+    """
+    Products store their category names in choice-constrained strings, and
+    follow a rename of the row they link to, so a row with products may only
+    be renamed to another of those choices.
+    """
+    product_choices = ()
+
+    def check_rename(self, previous_name):
+        choices = {value for value, _ in self.product_choices}
+        if previous_name in (None, self.name) or self.name in choices:
+            return
+        if self.products.exists():
+            raise ValidationError({
+                'name': f"Products use '{previous_name}', so it can only be renamed to one of the product choices.",
+            })
+
+    def clean(self):
+        super().clean()
+        if self.pk:
+            self.check_rename(type(self).objects.filter(pk=self.pk).values_list('name', flat=True).first())
+
+
+class Category(ProductNameMixin, models.Model):
     """Product categories for the storefront navigation."""
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
@@ -102,13 +344,15 @@ class Category(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    product_choices = PRODUCT_CATEGORY_CHOICES
+
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name_plural = "Categories"
 
-class SubCategory(models.Model):
+class SubCategory(ProductNameMixin, models.Model):
     """Subcategories for more detailed product organization."""
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='subcategories')
     name = models.CharField(max_length=100)
@@ -117,6 +361,8 @@ class SubCategory(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    product_choices = PRODUCT_SUBCATEGORY_CHOICES
+
     def __str__(self):
         return f"{self.category.name} - {self.name}"
 
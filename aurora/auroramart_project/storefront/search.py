@@ -0,0 +1,169 @@
+# storefront/search.py
+"""
+Full-text product search.
+
+On SQLite the catalogue is mirrored into an FTS5 virtual table (kept in sync
+by the Product signals in storefront/signals.py) and ranked with BM25. On
+PostgreSQL a weighted tsvector expression index is used instead. Any other
+backend falls back to the original icontains scan.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value
+
+from adminpanel.models import Product
+
+SEARCH_TABLE = 'storefront_product_search'
+
+# Indexed columns and their BM25 weights (a hit in the name counts most).
+SEARCH_COLUMNS = [
+    ('name', 10.0),
+    ('description', 1.0),
+    ('category', 4.0),
+    ('subcategory', 4.0),
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_backend():
+    """Return 'sqlite', 'postgresql' or None when no index is available."""
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return None
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so operators typed by users are taken literally) and
+    the last word is treated as a prefix, which suits search-as-you-type.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return ''
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_products(queryset, text):
+    """
+    Restrict a Product queryset to matches for `text`, annotated with a
+    `search_rank` where higher means more relevant.
+    """
+    backend = search_backend()
+
+    if backend == 'sqlite':
+        match = build_match_query(text)
+        if not match:
+            return queryset.none()
+        product_table = connection.ops.quote_name(Product._meta.db_table)
+        weights = ', '.join(str(weight) for _, weight in SEARCH_COLUMNS)
+        # Join the index once: MATCH finds the hits and bm25() scores each
+        # joined row, instead of a correlated subquery re-running MATCH for
+        # every product. extra() is the only way to add this join in the ORM.
+        return queryset.extra(
+            select={'search_rank': f'-bm25({SEARCH_TABLE}, {weights})'},
+            tables=[SEARCH_TABLE],
+            where=[f'{SEARCH_TABLE} MATCH %s', f'{SEARCH_TABLE}.rowid = {product_table}.id'],
+            params=[match],
+        )
+
+    if backend == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(text, search_type='websearch', config='english')
+        vector = postgres_search_vector()
+        return queryset.annotate(search_vector=vector).filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    return queryset.filter(
+        Q(name__icontains=text) |
+        Q(description__icontains=text) |
+        Q(category__icontains=text) |
+        Q(subcategory__icontains=text)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def postgres_search_vector():
+    """The weighted tsvector matching the expression index from migration 0003."""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config='english') +
+        SearchVector('category', 'subcategory', weight='B', config='english') +
+        SearchVector('description', weight='D', config='english')
+    )
+
+
+# --- Index Maintenance (SQLite/FTS5 only) ---
+
+def _row(product):
+    return (product.id, product.name, product.description, product.category, product.subcategory)
+
+
+def index_product(product):
+    """Insert or refresh a single product's entry."""
+    if search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [product.id])
+        _insert_rows(cursor, [_row(product)])
+
+
+def unindex_product(product_id):
+    """Remove a product's entry."""
+    if search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [product_id])
+
+
+def index_products(product_ids):
+    """Refresh the entries for a batch of products (e.g. after a bulk import)."""
+    if search_backend() != 'sqlite' or not product_ids:
+        return
+    product_ids = list(product_ids)
+    products = Product.objects.filter(id__in=product_ids).only(
+        'id', 'name', 'description', 'category', 'subcategory'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in product_ids])
+        _insert_rows(cursor, [_row(product) for product in products])
+
+
+def rebuild_index(chunk_size=2000):
+    """Repopulate the whole index from Product and return the row count."""
+    if search_backend() != 'sqlite':
+        return 0
+    products = Product.objects.only(
+        'id', 'name', 'description', 'category', 'subcategory'
+    ).order_by('id').iterator(chunk_size=chunk_size)
+
+    indexed = 0
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        for product in products:
+            batch.append(_row(product))
+            if len(batch) >= chunk_size:
+                indexed += _insert_rows(cursor, batch)
+                batch = []
+        indexed += _insert_rows(cursor, batch)
+        # Merge the b-tree segments written above into one for faster reads
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def _insert_rows(cursor, rows):
+    if rows:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description, category, subcategory) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+    return len(rows)
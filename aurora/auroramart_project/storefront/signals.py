@@ -0,0 +1,179 @@
+# storefront/signals.py
+from django.db.models.signals import post_save, pre_delete, pre_save, post_delete
+from django.dispatch import receiver
+
+from adminpanel.caching import CATALOGUE_VERSION, bump_version
+from adminpanel.models import Product
+from adminpanel.signals import products_imported
+from . import categories, search
+from .homepage import BANNER_VERSION, CATEGORY_VERSION, REVIEW_VERSION
+from .models import Banner, Cart, CartItem, Category, ProductReview, ProductReviewStats, SubCategory
+
+# --- Cart Totals ---
+
+@receiver(post_save, sender=Product)
+def refresh_cart_totals_on_product_save(sender, instance, created, **kwargs):
+    """Re-price every cart holding this product (its price may have changed)."""
+    if not created:
+        Cart.objects.filter(items__product=instance).recalculate_totals()
+
+@receiver(pre_delete, sender=Product)
+def remember_carts_on_product_delete(sender, instance, **kwargs):
+    """Note which carts lose a line before the cascade removes it."""
+    instance._affected_cart_ids = list(
+        Cart.objects.filter(items__product=instance).values_list('id', flat=True)
+    )
+
+@receiver(post_delete, sender=Product)
+def refresh_cart_totals_on_product_delete(sender, instance, **kwargs):
+    cart_ids = getattr(instance, '_affected_cart_ids', None)
+    if cart_ids:
+        Cart.objects.filter(id__in=cart_ids).recalculate_totals()
+
+@receiver(products_imported)
+def refresh_cart_totals_on_import(sender, product_ids, **kwargs):
+    Cart.objects.filter(
+        id__in=CartItem.objects.filter(product_id__in=product_ids).values('cart_id')
+    ).recalculate_totals()
+
+# --- Category Links ---
+
+@receiver(pre_save, sender=Product)
+def link_product_categories(sender, instance, raw=False, **kwargs):
+    """Point the product's category FKs at the rows its strings name, if they exist."""
+    if not raw:
+        categories.link_product(instance)
+
+@receiver(products_imported)
+def link_imported_products(sender, product_ids, **kwargs):
+    categories.link_products(Product.objects.filter(pk__in=product_ids))
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=SubCategory)
+def remember_previous_name(sender, instance, raw=False, **kwargs):
+    instance._previous_name = None
+    if instance.pk:
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    if not raw:
+        # Saves that bypass the admin form's clean() are refused too
+        instance.check_rename(instance._previous_name)
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def link_named_products(sender, instance, created, raw=False, **kwargs):
+    """Link the products that already name a newly created category."""
+    if not created or raw:
+        return
+    if sender is Category:
+        products = Product.objects.filter(category=instance.name)
+    else:
+        products = Product.objects.filter(category=instance.category.name, subcategory=instance.name)
+    if categories.link_products(products):
+        bump_version(CATALOGUE_VERSION)
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def unlink_deleted_category(sender, instance, **kwargs):
+    """The delete set its products' links to NULL without saving them."""
+    bump_version(CATALOGUE_VERSION)
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def rename_linked_products(sender, instance, created, **kwargs):
+    """
+    Keep the products' strings in step when their category is renamed; the
+    new name is one of Product's choices (see check_rename()).
+    """
+    previous = getattr(instance, '_previous_name', None)
+    if created or previous is None or previous == instance.name:
+        return
+    field = 'category' if sender is Category else 'subcategory'
+    products = Product.objects.filter(**{f'{field}_ref': instance})
+    product_ids = list(products.values_list('pk', flat=True))
+    products.update(**{field: instance.name})
+    search.index_products(product_ids)
+    bump_version(CATALOGUE_VERSION)
+
+# --- Review Stats ---
+
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_review(sender, instance, **kwargs):
+    instance._previous_review = None
+    if instance.pk:
+        instance._previous_review = ProductReview.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'rating'
+        ).first()
+
+def refresh_review_ratings(product_ids):
+    """Carry changed review stats through to the products' display ratings and the cached pages."""
+    products = Product.objects.filter(pk__in=product_ids)
+    if ProductReviewStats.objects.sync_display_ratings(products):
+        bump_version(CATALOGUE_VERSION)
+    # Review counts are shown on the cached homepage cards too
+    bump_version(REVIEW_VERSION)
+
+@receiver(post_save, sender=ProductReview)
+def count_saved_review(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_review', None)
+    current = (instance.product_id, instance.rating)
+    if previous == current:
+        return
+    product_ids = {instance.product_id}
+    if previous is not None:
+        ProductReviewStats.objects.adjust(*previous, -1)
+        product_ids.add(previous[0])
+    ProductReviewStats.objects.adjust(*current, 1)
+    refresh_review_ratings(product_ids)
+
+@receiver(post_delete, sender=ProductReview)
+def uncount_deleted_review(sender, instance, **kwargs):
+    ProductReviewStats.objects.adjust(instance.product_id, instance.rating, -1)
+    refresh_review_ratings([instance.product_id])
+
+@receiver(pre_save, sender=Product)
+def set_display_rating(sender, instance, raw=False, **kwargs):
+    """A saved product shows its review average, or its own rating until it has reviews."""
+    if raw:
+        return
+    stats = ProductReviewStats.objects.filter(product_id=instance.pk).first() if instance.pk else None
+    average = stats.average if stats else None
+    instance.display_rating = instance.rating if average is None else average
+
+@receiver(products_imported)
+def sync_imported_display_ratings(sender, product_ids, **kwargs):
+    ProductReviewStats.objects.sync_display_ratings(Product.objects.filter(pk__in=product_ids))
+
+# --- Search Index ---
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, **kwargs):
+    search.index_product(instance)
+
+@receiver(post_delete, sender=Product)
+def unindex_product_on_delete(sender, instance, **kwargs):
+    search.unindex_product(instance.id)
+
+@receiver(products_imported)
+def index_imported_products(sender, product_ids, **kwargs):
+    search.index_products(product_ids)
+
+# --- Cache Versions ---
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(products_imported)
+def bump_catalogue_version(sender, **kwargs):
+    """Tell every worker its in-memory catalogue structures are stale."""
+    bump_version(CATALOGUE_VERSION)
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def bump_banner_version(sender, **kwargs):
+    bump_version(BANNER_VERSION)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def bump_category_version(sender, **kwargs):
+    bump_version(CATEGORY_VERSION)
@@ -6,6 +6,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initWishlistFunctionality();
     initProductActions();
     initFormEnhancements();
+    initSearchSuggestions();
     initCarousel();
     initMessages();
     updateCartCount();
@@ -204,6 +205,65 @@ function initFormEnhancements() {
     });
 }
 
+// Search-as-you-type suggestions
+function initSearchSuggestions() {
+    const searchInput = document.querySelector('.search-input');
+    if (!searchInput) return;
+
+    const list = document.createElement('ul');
+    list.className = 'search-suggestions';
+    searchInput.closest('form').appendChild(list);
+
+    let debounceTimer = null;
+    let latestQuery = '';
+
+    searchInput.addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        const query = this.value.trim();
+        if (query.length < 2) {
+            hideSuggestions(list);
+            return;
+        }
+        debounceTimer = setTimeout(() => {
+            latestQuery = query;
+            fetch(`/api/search-suggest/?q=${encodeURIComponent(query)}`)
+                .then(response => response.json())
+                .then(data => {
+                    // Ignore responses that arrive after the user kept typing
+                    if (query === latestQuery) {
+                        renderSuggestions(list, data.suggestions || []);
+                    }
+                })
+                .catch(() => hideSuggestions(list));
+        }, 120);
+    });
+
+    searchInput.addEventListener('blur', () => {
+        setTimeout(() => hideSuggestions(list), 150);
+    });
+}
+
+function renderSuggestions(list, suggestions) {
+    list.innerHTML = '';
+    suggestions.forEach(suggestion => {
+        const item = document.createElement('li');
+        const link = document.createElement('a');
+        link.href = suggestion.url;
+        link.textContent = suggestion.label;
+        if (suggestion.type === 'subcategory') {
+            link.classList.add('suggestion-subcategory');
+        }
+        item.appendChild(link);
+        list.appendChild(item);
+    });
+    list.style.display = suggestions.length ? 'block' : 'none';
+}
+
+function hideSuggestions(list) {
+    list.innerHTML = '';
+    list.style.display = 'none';
+}
+
 function subscribeToNewsletter(email) {
     fetch('/api/subscribe-newsletter/', {
         method: 'POST',
@@ -0,0 +1,107 @@
+# storefront/suggest.py
+"""
+Search-as-you-type suggestions served from a per-process prefix index.
+
+The index is a sorted array of normalized keys searched with bisect, so a
+lookup never touches the database. It is built on first use in each worker
+and rebuilt whenever the shared 'catalogue' version (bumped by the Product
+signals) moves on.
+"""
+import bisect
+import re
+import threading
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from adminpanel.caching import CATALOGUE_VERSION, get_version
+from adminpanel.models import Product
+
+MIN_PREFIX_LENGTH = 2
+MAX_SUGGESTIONS = 8
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _WHITESPACE_RE.sub(' ', text.casefold()).strip()
+
+
+class PrefixIndex:
+    """Sorted (key, suggestion) pairs supporting prefix range scans."""
+
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [key for key, _ in entries]
+        self.suggestions = [suggestion for _, suggestion in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, prefix, limit=MAX_SUGGESTIONS):
+        prefix = normalize(prefix)
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return []
+
+        results = []
+        seen = set()
+        position = bisect.bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            suggestion = self.suggestions[position]
+            identity = (suggestion['type'], suggestion['label'])
+            if identity not in seen:
+                seen.add(identity)
+                results.append(suggestion)
+                if len(results) >= limit:
+                    break
+            position += 1
+        return results
+
+
+def build_index():
+    """Read the in-stock catalogue once and build the prefix index."""
+    entries = []
+    subcategories = set()
+    products = Product.objects.filter(stock__gt=0).values_list('id', 'sku', 'name', 'subcategory')
+    for product_id, sku, name, subcategory in products.iterator(chunk_size=2000):
+        suggestion = {
+            'label': name,
+            'type': 'product',
+            'url': reverse('product_detail', args=[product_id]),
+        }
+        # Index the name from every word onwards so "head" finds "Wireless Headphones"
+        words = normalize(name).split(' ')
+        for start in range(len(words)):
+            entries.append((' '.join(words[start:]), suggestion))
+        entries.append((normalize(sku), suggestion))
+        subcategories.add(subcategory)
+
+    search_url = reverse('product_list')
+    for subcategory in subcategories:
+        entries.append((normalize(subcategory), {
+            'label': subcategory,
+            'type': 'subcategory',
+            'url': f'{search_url}?{urlencode({"search": subcategory})}',
+        }))
+    return PrefixIndex(entries)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_index():
+    """Return this process's index, rebuilding it if the catalogue changed."""
+    global _index, _index_version
+    version = get_version(CATALOGUE_VERSION)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = build_index()
+                _index_version = version
+    return _index
+
+
+def suggest(prefix, limit=MAX_SUGGESTIONS):
+    return get_index().lookup(prefix, limit)
@@ -1,3 +1,740 @@
-from django.test import TestCase
+import re
+import threading
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from adminpanel.importers import import_products
+from adminpanel.models import Order, OrderItem, Product, ProductSalesDaily
+from .checkout import OutOfStock, checkout
+from .models import Cart, CartItem, Category, ProductReview, ProductReviewStats, SubCategory
+from .search import search_products
+
+
+def make_product(sku, **overrides):
+    fields = {
+        'sku': sku,
+        'name': f'Product {sku}',
+        'description': 'Test product',
+        'category': 'Electronics',
+        'subcategory': 'Headphones',
+        'price': Decimal('10.00'),
+        'rating': Decimal('4.0'),
+        'stock': 50,
+        'reorder_threshold': 5,
+    }
+    fields.update(overrides)
+    return Product.objects.create(**fields)
+
+
+class CartTotalsTests(TestCase):
+    def setUp(self):
+        self.cart = Cart.objects.create(session_key='totals')
+        self.lamp = make_product('CART-1', price=Decimal('12.50'))
+        self.mug = make_product('CART-2', price=Decimal('4.00'))
+
+    def assertTotals(self, item_count, subtotal):
+        stored = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((stored.item_count, stored.subtotal), (item_count, Decimal(subtotal)))
+        self.assertEqual((self.cart.item_count, self.cart.subtotal), (item_count, Decimal(subtotal)))
+
+    def test_mutations_keep_totals_in_step(self):
+        lamp_line = self.cart.add_product(self.lamp, quantity=2)
+        mug_line = self.cart.add_product(self.mug)
+        self.assertTotals(3, '29.00')
+
+        self.cart.set_quantity(lamp_line, 5)
+        self.assertEqual(CartItem.objects.get(pk=lamp_line.pk).quantity, 5)
+        self.assertTotals(6, '66.50')
+
+        self.cart.remove_item(mug_line)
+        self.assertFalse(CartItem.objects.filter(pk=mug_line.pk).exists())
+        self.assertTotals(5, '62.50')
+
+    def test_setting_zero_quantity_removes_the_line(self):
+        line = self.cart.add_product(self.lamp, quantity=2)
+        with mock.patch.object(Cart, 'remove_item', wraps=self.cart.remove_item) as remove_item:
+            self.cart.set_quantity(line, 0)
+        remove_item.assert_called_once_with(line)
+        self.assertFalse(self.cart.items.exists())
+        self.assertTotals(0, '0.00')
+
+    def test_stale_lines_do_not_double_count(self):
+        line = self.cart.add_product(self.lamp, quantity=2)
+        stale = CartItem.objects.get(pk=line.pk)
+
+        self.cart.set_quantity(line, 5)
+        self.cart.set_quantity(stale, 3)  # still thinks the line holds 2
+        self.assertEqual(CartItem.objects.get(pk=line.pk).quantity, 3)
+        self.assertTotals(3, '37.50')
+
+        self.cart.remove_item(line)
+        self.cart.remove_item(stale)  # already gone
+        self.assertTotals(0, '0.00')
+
+    def test_recalculation_repairs_drifted_totals(self):
+        self.cart.add_product(self.lamp, quantity=2)
+        self.cart.add_product(self.mug, quantity=3)
+        empty = Cart.objects.create(session_key='empty', item_count=4, subtotal=Decimal('9.99'))
+        Cart.objects.filter(pk=self.cart.pk).update(item_count=1, subtotal=Decimal('1.00'))
+
+        drifted = Cart.objects.with_expected_totals().exclude(
+            item_count=F('expected_item_count'), subtotal=F('expected_subtotal'),
+        )
+        self.assertEqual({cart.pk for cart in drifted}, {self.cart.pk, empty.pk})
+
+        Cart.objects.all().recalculate_totals()
+        self.cart.refresh_from_db()
+        self.assertTotals(5, '37.00')
+        empty.refresh_from_db()
+        self.assertEqual((empty.item_count, empty.subtotal), (0, Decimal('0.00')))
+
+
+class ShoppingCartPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='shopper', password='secret-pass-123')
+        self.cart = Cart.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def fill_cart(self, size):
+        for i in range(size):
+            product = make_product(f'SKU-{size}-{i}', price=Decimal('2.50') + i)
+            self.cart.add_product(product, quantity=2)
+
+    def render_cart(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('shopping_cart'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        self.fill_cart(1)
+        self.render_cart()  # loads the per-process category tree for the nav
+        _, small = self.render_cart()
+
+        self.fill_cart(25)
+        response, large = self.render_cart()
+
+        self.assertEqual(small, large)
+        self.assertEqual(large, 4)  # session, user, cart, lines+products
+        self.assertEqual(response.context['cart_summary'].line_count, 26)
+
+    def test_summary_matches_denormalized_totals(self):
+        self.fill_cart(3)
+        response, _ = self.render_cart()
+        summary = response.context['cart_summary']
+        self.cart.refresh_from_db()
+
+        self.assertEqual(summary.item_count, self.cart.item_count)
+        self.assertEqual(summary.subtotal, self.cart.subtotal)
+        self.assertEqual(summary.grand_total, self.cart.subtotal + Decimal('4.00'))
+
+
+class HomepageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product('HOME-1', name='Cached Lamp', rating=Decimal('4.9'))
+
+    def test_warm_homepage_serves_anonymous_traffic_without_queries(self):
+        self.client.get(reverse('homepage'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('homepage'))
+        self.assertContains(response, 'Cached Lamp')
+
+    def test_product_change_invalidates_cached_lists(self):
+        self.client.get(reverse('homepage'))
+        self.product.name = 'Renamed Lamp'
+        self.product.save()
+
+        response = self.client.get(reverse('homepage'))
+        self.assertContains(response, 'Renamed Lamp')
+        self.assertNotContains(response, 'Cached Lamp')
+
+
+class ProductSearchTests(TestCase):
+    def search(self, text):
+        return list(
+            search_products(Product.objects.all(), text)
+            .order_by('-search_rank', '-id').values_list('sku', flat=True)
+        )
+
+    def test_name_hits_outrank_description_hits(self):
+        make_product('DESC', name='Desk stand', description='Holds a walnut lamp')
+        make_product('NAME', name='Walnut lamp', description='Warm light')
+        make_product('NONE', name='Kettle', description='Boils water')
+
+        self.assertEqual(self.search('walnut lamp'), ['NAME', 'DESC'])
+        self.assertEqual(self.search('walnut la'), ['NAME', 'DESC'])  # last word is a prefix
+
+    def test_index_follows_saves_and_deletes(self):
+        product = make_product('SYNC', name='Copper kettle')
+        self.assertEqual(self.search('copper'), ['SYNC'])
+
+        product.name = 'Steel kettle'
+        product.save()
+        self.assertEqual(self.search('copper'), [])
+        self.assertEqual(self.search('steel'), ['SYNC'])
+
+        product.delete()
+        self.assertEqual(self.search('kettle'), [])
+
+
+class SearchSuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_product('SUG-1', name='Wireless Headphones')
+        make_product('SUG-2', name='Headphone Stand', subcategory='Accessories')
+
+    def suggest(self, prefix):
+        response = self.client.get(reverse('search_suggest'), {'q': prefix})
+        return [(item['type'], item['label']) for item in response.json()['suggestions']]
+
+    def test_prefixes_match_any_word_without_queries(self):
+        self.suggest('he')  # builds the per-process index
+        with self.assertNumQueries(0):
+            labels = self.suggest('head')
+        self.assertEqual(labels, [
+            ('product', 'Headphone Stand'), ('product', 'Wireless Headphones'), ('subcategory', 'Headphones'),
+        ])
+        self.assertEqual(self.suggest('acc'), [('subcategory', 'Accessories')])
+        self.assertEqual(self.suggest('h'), [])
+
+    def test_product_changes_rebuild_the_index(self):
+        self.assertEqual(len(self.suggest('wireless')), 1)
+        product = Product.objects.get(sku='SUG-1')
+        product.name = 'Bluetooth Headphones'
+        product.save()
+        self.assertEqual(self.suggest('wireless'), [])
+        self.assertEqual(self.suggest('blue'), [('product', 'Bluetooth Headphones')])
+
+        product.stock = 0
+        product.save()
+        self.assertEqual(self.suggest('blue'), [])
+
+
+class CatalogueCursorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(30):
+            # Few distinct prices, so most page boundaries fall inside a tie
+            make_product(f'CUR-{i:02d}', price=Decimal(5 + i % 4), rating=Decimal('4.0'))
+        make_product('CUR-OUT', stock=0)
+
+    def page(self, **params):
+        response = self.client.get(reverse('product_list'), dict(params, sort='price_low'))
+        page = response.context['products']
+        return [product.sku for product in page], page
+
+    def test_cursors_walk_every_in_stock_product_once(self):
+        expected = list(
+            Product.objects.filter(stock__gt=0).order_by('price', 'id').values_list('sku', flat=True)
+        )
+        seen, pages = [], []
+        skus, page = self.page()
+        while True:
+            seen += skus
+            pages.append(skus)
+            if not page.has_next:
+                break
+            skus, page = self.page(cursor=page.next_cursor)
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(skus) for skus in pages], [12, 12, 6])
+
+        skus, page = self.page(cursor=page.previous_cursor)
+        self.assertEqual(skus, pages[1])
+
+    def test_bad_cursor_falls_back_to_the_first_page(self):
+        first, _ = self.page()
+        self.assertEqual(self.page(cursor='not-a-cursor')[0], first)
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics', slug='electronics')
+        SubCategory.objects.create(category=self.category, name='Headphones', slug='headphones')
+        make_product('TREE-1', name='Tree Headphones', category='Electronics', subcategory='Headphones')
+
+    def category_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries if 'storefront_category' in q['sql'] or 'storefront_subcategory' in q['sql']]
+
+    def test_warm_category_pages_do_not_look_up_categories(self):
+        url = reverse('subcategory_products', args=['electronics', 'headphones'])
+        self.client.get(url)
+        self.assertEqual(self.category_queries(url), [])
+        self.assertEqual(self.category_queries(reverse('category_products', args=['electronics'])), [])
+
+    def test_subcategory_change_invalidates_tree(self):
+        self.client.get(reverse('category_products', args=['electronics']))
+        SubCategory.objects.create(category=self.category, name='Laptops', slug='laptops')
+        response = self.client.get(reverse('subcategory_products', args=['electronics', 'laptops']))
+        self.assertEqual(response.status_code, 200)
+
+        self.category.is_active = False
+        self.category.save()
+        response = self.client.get(reverse('category_products', args=['electronics']))
+        self.assertEqual(response.status_code, 404)
+
+
+class CategoryLinkTests(TestCase):
+    def setUp(self):
+        self.electronics = Category.objects.create(name='Electronics', slug='electronics')
+        self.headphones = SubCategory.objects.create(category=self.electronics, name='Headphones', slug='headphones')
+
+    def test_saved_products_link_to_the_rows_their_strings_name(self):
+        product = make_product('LINK-1')
+        self.assertEqual((product.category_ref, product.subcategory_ref), (self.electronics, self.headphones))
+
+        product.category, product.subcategory = 'Books', 'Fiction'
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual((product.category_ref, product.subcategory_ref), (None, None))
+        self.assertFalse(Category.objects.filter(name='Books').exists())
+
+        books = Category.objects.create(name='Books', slug='books')
+        fiction = SubCategory.objects.create(category=books, name='Fiction', slug='fiction')
+        product.refresh_from_db()
+        self.assertEqual((product.category_ref, product.subcategory_ref), (books, fiction))
+
+    def test_deleting_a_category_unlinks_its_products(self):
+        product = make_product('LINK-3')
+        self.electronics.delete()
+        product.refresh_from_db()
+        self.assertEqual((product.category_ref, product.subcategory_ref), (None, None))
+        self.assertEqual((product.category, product.subcategory), ('Electronics', 'Headphones'))
+
+        electronics = Category.objects.create(name='Electronics', slug='electronics')
+        product.refresh_from_db()
+        self.assertEqual(product.category_ref, electronics)
+
+    def test_imported_products_are_linked(self):
+        import_products([
+            'sku,name,description,category,subcategory,price,rating,stock,reorder_threshold',
+            'IMP-1,Earbuds,Wireless,Electronics,Headphones,99.00,4.5,3,1',
+        ])
+        product = Product.objects.get(sku='IMP-1')
+        self.assertEqual((product.category_ref, product.subcategory_ref), (self.electronics, self.headphones))
+
+    def test_command_creates_the_rows_products_name(self):
+        make_product('LINK-2', category='Sports & Outdoors', subcategory='Camping & Hiking')
+        call_command('create_product_categories', stdout=StringIO())
+        product = Product.objects.get(sku='LINK-2')
+        self.assertEqual(product.category_ref.slug, 'sports-outdoors')
+        self.assertEqual(product.subcategory_ref.category_id, product.category_ref_id)
+
+    def test_renames_stay_within_the_product_choices(self):
+        product = make_product('LINK-3')
+        self.electronics.name = 'Books'
+        self.electronics.save()
+        product.refresh_from_db()
+        self.assertEqual(product.category, 'Books')
+
+        self.electronics.name = 'Gadgets'
+        with self.assertRaises(ValidationError):
+            self.electronics.full_clean()
+        with self.assertRaises(ValidationError):
+            self.electronics.save()
+        product.refresh_from_db()
+        self.assertEqual(product.category, 'Books')
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        electronics = Category.objects.create(name='Electronics', slug='electronics')
+        books = Category.objects.create(name='Books', slug='books')
+        self.ids = {
+            'Electronics': electronics.pk,
+            'Books': books.pk,
+            'Headphones': SubCategory.objects.create(category=electronics, name='Headphones', slug='headphones').pk,
+            'Speakers': SubCategory.objects.create(category=electronics, name='Speakers', slug='speakers').pk,
+            'Fiction': SubCategory.objects.create(category=books, name='Fiction', slug='fiction').pk,
+        }
+        make_product('F-1')
+        make_product('F-2')
+        make_product('F-3', subcategory='Speakers', price=Decimal('30.00'))
+        make_product('F-4', category='Books', subcategory='Fiction')
+
+    def facet_page(self, **params):
+        query = '&'.join(
+            f'{name}={value}' for name, values in params.items() for value in values
+        )
+        response = self.client.get(f"{reverse('product_list')}?{query}")
+        options = response.context['facet_options']
+        counts = {
+            facet: {option['label']: (option['count'], option['selected']) for option in options[facet]}
+            for facet in ('category', 'subcategory', 'price')
+        }
+        return response, counts
+
+    def test_each_facet_is_counted_under_the_other_selections(self):
+        response, counts = self.facet_page(
+            category=[self.ids['Electronics'], self.ids['Books']], price=['0-25'],
+        )
+        self.assertEqual(response.context['total_products'], 3)
+        self.assertEqual(counts['category'], {'Books': (1, True), 'Electronics': (2, True)})
+        self.assertEqual(counts['subcategory'], {'Fiction': (1, False), 'Headphones': (2, False)})
+        self.assertEqual(counts['price']['Under $25'], (3, True))
+        self.assertEqual(counts['price']['$25 to $50'], (1, False))
+
+    def test_selected_options_stay_listed_without_products(self):
+        response, counts = self.facet_page(category=[self.ids['Books']], subcategory=[self.ids['Speakers']])
+        self.assertEqual(response.context['total_products'], 0)
+        self.assertEqual(counts['subcategory']['Speakers'], (0, True))
+
+
+class ReviewStatsTests(TestCase):
+    def setUp(self):
+        self.product = make_product('REV-1')
+        self.users = [User.objects.create_user(username=f'reviewer{i}') for i in range(4)]
+
+    def review(self, user, rating, product=None):
+        return ProductReview.objects.create(
+            product=product or self.product, user=user, rating=rating, title='Title', comment='Comment',
+        )
+
+    def stats(self):
+        return ProductReviewStats.objects.get(product=self.product)
+
+    def test_stats_follow_review_changes(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        self.review(self.users[2], 4)
+        stats = self.stats()
+        self.assertEqual((stats.review_count, stats.review_sum), (3, 13))
+        self.assertEqual(stats.average, Decimal('4.3'))
+        self.assertEqual([count for _, count, _ in stats.histogram], [1, 2, 0, 0, 0])
+
+        first.rating = 1
+        first.save()
+        stats = self.stats()
+        self.assertEqual((stats.review_count, stats.review_sum, stats.rating_5, stats.rating_1), (3, 9, 0, 1))
+
+        other = make_product('REV-2')
+        first.product = other
+        first.save()
+        first.delete()
+        self.assertEqual((self.stats().review_count, self.stats().review_sum), (2, 8))
+        self.assertEqual(ProductReviewStats.objects.get(product=other).review_count, 0)
+
+        expected = list(ProductReviewStats.objects.order_by('pk').values())
+        ProductReviewStats.objects.rebuild()
+        rebuilt = list(ProductReviewStats.objects.order_by('pk').values())
+        self.assertEqual(rebuilt, [row for row in expected if row['review_count']])
+
+    def test_pages_show_live_ratings_without_aggregating(self):
+        self.review(self.users[0], 2)
+        pages = [
+            (reverse('product_detail', args=[self.product.id]), 'Based on 1 review'),
+            (reverse('product_list'), '2.0 (1)'),
+        ]
+        for url, text in pages:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            with self.subTest(url=url):
+                self.assertContains(response, text)
+                self.assertFalse([q['sql'] for q in queries if 'AVG(' in q['sql']])
+
+    def test_display_rating_matches_the_shown_average(self):
+        for ratings in ((5, 4, 4), (5, 4, 4, 4), (1, 2), (3,)):
+            ProductReview.objects.all().delete()
+            for user, rating in zip(self.users, ratings):
+                self.review(user, rating)
+            self.product.refresh_from_db()
+            with self.subTest(ratings=ratings):
+                self.assertEqual(self.product.display_rating, self.stats().average)
+
+        ProductReview.objects.all().delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.display_rating, self.product.rating)
+
+    def test_rating_sort_and_filter_use_the_review_average(self):
+        category = Category.objects.create(name='Electronics', slug='electronics')
+        listed = make_product('REV-HIGH', rating=Decimal('4.8'))
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 5)
+
+        response = self.client.get(reverse('product_list') + '?sort=rating')
+        self.assertEqual([product.sku for product in response.context['products']], ['REV-1', 'REV-HIGH'])
+        self.assertContains(response, '5.0 (2)')
+
+        response = self.client.get(reverse('product_list') + f'?category={category.id}&rating=5')
+        self.assertEqual([product.sku for product in response.context['products']], ['REV-1'])
+
+        listed.rating = Decimal('3.0')
+        listed.save()
+        self.review(self.users[2], 1, product=listed)
+        listed.refresh_from_db()
+        self.assertEqual(listed.display_rating, Decimal('1.0'))
+
+    def test_reviews_refresh_the_cached_homepage(self):
+        cache.clear()
+        self.client.get(reverse('homepage'))
+        # The average stays 4.0, but the card's review count changes
+        self.review(self.users[0], 4)
+        self.assertContains(self.client.get(reverse('homepage')), '4.0 (1)')
+
+
+class ReviewPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = make_product('PAGE-1')
+        for i in range(25):
+            user = User.objects.create_user(username=f'paged{i}')
+            ProductReview.objects.create(
+                product=cls.product, user=user, rating=1 + i % 5, title=f'Review {i}', comment='Comment',
+                is_verified_purchase=i % 3 == 0,
+            )
+
+    def fetch_all(self, sort):
+        url = reverse('product_reviews', args=[self.product.id])
+        reviews, cursor = [], ''
+        while True:
+            data = self.client.get(url, {'sort': sort, 'cursor': cursor}).json()
+            reviews += data['reviews']
+            cursor = data['next_cursor']
+            if not cursor:
+                return reviews
+
+    def test_pages_cover_every_review_once_in_sort_order(self):
+        for sort, key in (('highest', 'rating'), ('verified', 'is_verified_purchase')):
+            with self.subTest(sort=sort):
+                reviews = self.fetch_all(sort)
+                self.assertEqual(len({review['id'] for review in reviews}), 25)
+                values = [review[key] for review in reviews]
+                self.assertEqual(values, sorted(values, reverse=True))
+
+    def test_detail_page_renders_only_the_first_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product_detail', args=[self.product.id]))
+        self.assertEqual(len(response.context['reviews']), 10)
+        self.assertTrue(response.context['reviews'].has_next)
+        self.assertEqual(len([q for q in queries if 'FROM "auth_user"' in q['sql']]), 0)
+
+    def test_review_pages_use_the_product_index(self):
+        reviews = ProductReview.objects.filter(product=self.product).order_by('-created_at', '-id')[:11]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {reviews.query}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('review_product_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_bad_cursor_is_rejected(self):
+        response = self.client.get(reverse('product_reviews', args=[self.product.id]), {'cursor': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductQueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every Product query issued by the catalogue
+    views and fails if SQLite would walk the whole table instead of an index.
+
+    The one tolerated table scan is a walk in primary-key order that a LIMIT
+    cuts short (the "newest" sort), since that reads only the rows returned.
+    """
+    FULL_SCAN = re.compile(r'^SCAN (adminpanel_product)\b(?! USING)')
+    PK_ORDER_WITH_LIMIT = re.compile(r'ORDER BY "adminpanel_product"\."id" (ASC|DESC) LIMIT \d+$')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Electronics', slug='electronics')
+        cls.subcategory = SubCategory.objects.create(category=cls.category, name='Headphones', slug='headphones')
+        categories = [('Electronics', 'Headphones'), ('Electronics', 'Laptops'), ('Books', 'Fiction')]
+        for i in range(60):
+            category, subcategory = categories[i % len(categories)]
+            make_product(
+                f'PLAN-{i}', name=f'Plan product {i}', category=category, subcategory=subcategory,
+                price=Decimal(5 + i % 7), rating=Decimal('3.0') + (i % 3), stock=i % 5, reorder_threshold=2,
+            )
+        cls.product = Product.objects.filter(stock__gt=0).first()
+        cls.staff = User.objects.create_user(username='staff', password='secret-pass-123', is_staff=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        # Make sure cached pages do not hide the queries under test
+        cache.clear()
+
+    def assert_no_full_scans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or '"adminpanel_product"' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            full_scans = [step for step in plan if self.FULL_SCAN.match(step)]
+            if full_scans and self.PK_ORDER_WITH_LIMIT.search(sql) and not any('TEMP B-TREE' in step for step in plan):
+                full_scans = []
+            self.assertFalse(full_scans, f'{url} runs a full scan:\n{sql}\n' + '\n'.join(plan))
+            checked += 1
+        return checked
+
+    def test_storefront_views_use_indexes(self):
+        urls = [
+            reverse('homepage'),
+            reverse('product_list'),
+            reverse('category_products', args=['electronics']),
+            reverse('subcategory_products', args=['electronics', 'headphones']),
+            reverse('product_detail', args=[self.product.id]),
+            reverse('product_list') + '?search=plan',
+            reverse('product_list') + f'?category={self.category.id}&sort=price_low',
+        ]
+        for sort in ('best_match', 'price_low', 'price_high', 'rating', 'newest'):
+            urls.append(reverse('product_list') + f'?sort={sort}')
+            urls.append(reverse('category_products', args=['electronics']) + f'?sort={sort}')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertTrue(self.assert_no_full_scans(url))
+
+    def test_cursor_pages_use_indexes(self):
+        for sort in ('price_low', 'price_high', 'rating', 'newest'):
+            response = self.client.get(reverse('product_list') + f'?sort={sort}')
+            cursor = response.context['products'].next_cursor
+            with self.subTest(sort=sort):
+                self.assertTrue(self.assert_no_full_scans(reverse('product_list') + f'?sort={sort}&cursor={cursor}'))
+
+    def test_admin_dashboard_uses_indexes(self):
+        self.client.force_login(self.staff)
+        self.assertTrue(self.assert_no_full_scans(reverse('adminpanel:admin_dashboard_home')))
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.cart = Cart.objects.create(session_key='checkout')
+        self.lamp = make_product('CHK-1', price=Decimal('12.50'), stock=5)
+        self.desk = make_product('CHK-2', price=Decimal('80.00'), stock=1)
+
+    def test_checkout_places_order_and_empties_cart(self):
+        self.cart.add_product(self.lamp, quantity=2)
+        self.cart.add_product(self.desk)
+
+        order = checkout(self.cart, '1 Kent Ridge Rd')
+
+        self.assertEqual(order.total_amount, Decimal('105.00') + Decimal('4.00'))
+        self.assertEqual(
+            sorted(order.items.values_list('product__sku', 'quantity', 'unit_price')),
+            [('CHK-1', 2, Decimal('12.50')), ('CHK-2', 1, Decimal('80.00'))],
+        )
+        self.lamp.refresh_from_db()
+        self.desk.refresh_from_db()
+        self.assertEqual((self.lamp.stock, self.desk.stock), (3, 0))
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.subtotal), (0, 0))
+        self.assertEqual(ProductSalesDaily.objects.get(product=self.lamp).units, 2)
+
+    def test_short_stock_rolls_everything_back(self):
+        self.cart.add_product(self.lamp, quantity=2)
+        self.cart.add_product(self.desk, quantity=2)
+
+        with self.assertRaises(OutOfStock):
+            checkout(self.cart, '1 Kent Ridge Rd')
+
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 2)
+
+    def test_checkout_view_rejects_malformed_bodies(self):
+        bodies = ['not json', '[]', '"1 Kent Ridge Rd"', '{}', '{"shipping_address": 5}',
+                  '{"shipping_address": {"street": "Kent Ridge"}}', '{"shipping_address": "  "}']
+        for body in bodies:
+            with self.subTest(body=body):
+                response = self.client.post(reverse('checkout'), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+        self.assertFalse(Order.objects.exists())
+
+        # A well-formed body reaches checkout(), which rejects the empty cart
+        response = self.client.post(reverse('checkout'), {'shipping_address': '1 Kent Ridge Rd'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], 'Your cart is empty.')
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """Many shoppers check out the same SKU at once; none may be oversold."""
+    SHOPPERS = 24
+    STOCK = 10
+
+    def test_concurrent_checkouts_never_oversell(self):
+        product = make_product('HOT-1', stock=self.STOCK)
+        carts = []
+        for i in range(self.SHOPPERS):
+            cart = Cart.objects.create(session_key=f'shopper-{i}')
+            cart.add_product(product)
+            carts.append(cart)
+
+        placed = []
+        rejected = []
+        start = threading.Barrier(self.SHOPPERS)
+
+        def shop(cart):
+            try:
+                start.wait()
+                checkout(cart, 'Somewhere')
+                placed.append(cart.pk)
+            except OutOfStock:
+                rejected.append(cart.pk)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=shop, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        product.refresh_from_db()
+        self.assertEqual(len(placed), self.STOCK)
+        self.assertEqual(len(rejected), self.SHOPPERS - self.STOCK)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), self.STOCK)
+
+
+class CartConcurrencyTests(TransactionTestCase):
+    """Shoppers edit the same cart line at once; the totals must match the lines."""
+    EDITS = 12
+
+    def test_concurrent_edits_keep_totals_in_step(self):
+        product = make_product('HOT-2', price=Decimal('3.00'))
+        cart = Cart.objects.create(session_key='shared')
+        line = cart.add_product(product)
+        start = threading.Barrier(self.EDITS)
+
+        def edit(quantity):
+            try:
+                # Each request loads its own copy of the cart and line
+                item = CartItem.objects.select_related('cart', 'product').get(pk=line.pk)
+                start.wait()
+                item.cart.set_quantity(item, quantity)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=edit, args=(quantity,)) for quantity in range(1, self.EDITS + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cart.refresh_from_db()
+        quantity = CartItem.objects.get(pk=line.pk).quantity
+        self.assertEqual((cart.item_count, cart.subtotal), (quantity, quantity * Decimal('3.00')))
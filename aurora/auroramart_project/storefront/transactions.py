@@ -0,0 +1,37 @@
+# storefront/transactions.py
+"""
+Transactions that read rows and then write based on what they read.
+
+On PostgreSQL and other backends select_for_update() makes such a
+transaction wait for concurrent writers. SQLite has no row locks, so
+write_transaction() takes its database write lock up front instead.
+"""
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+
+@contextmanager
+def write_transaction():
+    """
+    transaction.atomic(), taking SQLite's write lock when it begins.
+
+    A deferred SQLite transaction that reads and then writes cannot wait for
+    another writer to finish, so concurrent checkouts or cart edits would
+    fail with "database is locked". Only those read-then-write transactions
+    need BEGIN IMMEDIATE, so it is switched on for them rather than for
+    every transaction.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()  # transaction_mode is read from OPTIONS on connect
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = mode  # BEGIN has been issued
+            yield
+    finally:
+        connection.transaction_mode = mode
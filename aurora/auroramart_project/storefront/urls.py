@@ -21,7 +21,10 @@ urlpatterns = [
     path('api/add-to-cart/', views.add_to_cart, name='add_to_cart'),
     path('api/update-cart-item/', views.update_cart_item, name='update_cart_item'),
     path('api/remove-from-cart/', views.remove_from_cart, name='remove_from_cart'),
+    path('api/checkout/', views.checkout, name='checkout'),
     path('api/add-to-wishlist/', views.add_to_wishlist, name='add_to_wishlist'),
     path('api/remove-from-wishlist/', views.remove_from_wishlist, name='remove_from_wishlist'),
     path('api/subscribe-newsletter/', views.subscribe_newsletter, name='subscribe_newsletter'),
+    path('api/search-suggest/', views.search_suggest, name='search_suggest'),
+    path('api/products/<int:product_id>/reviews/', views.product_reviews, name='product_reviews'),
 ]
\ No newline at end of file
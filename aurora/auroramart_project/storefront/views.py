@@ -1,16 +1,27 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q, Avg, Count
+from django.db.models import prefetch_related_objects
 from django.core.paginator import Paginator
-from django.views.decorators.http import require_POST
-from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.views.decorators.http import require_GET, require_POST
 import json
 
+from adminpanel.association import frequently_bought_with
 from adminpanel.models import Product, Customer
-from .models import Cart, CartItem, Wishlist, WishlistItem, ProductReview, Category, SubCategory, Banner, NewsletterSubscription
+from adminpanel.pagination import CursorPaginator, InvalidCursor, count_results
+from .models import Cart, CartItem, Wishlist, WishlistItem, ProductReview, NewsletterSubscription
+from .cart import build_cart_summary, cart_totals_payload
+from .categories import get_tree as get_category_tree
+from .checkout import CheckoutError, checkout as place_order
+from .facets import ProductFacets
+from .homepage import get_homepage_data
+from .search import search_products
+from .suggest import suggest
 
 # --- Utility Functions ---
 
@@ -37,107 +48,146 @@ def get_or_create_wishlist(request):
 
 def homepage(request):
     """Homepage with featured products and banners."""
-    # Get featured products (you can customize this logic)
-    featured_products = Product.objects.filter(stock__gt=0).order_by('-rating')[:8]
-    best_sellers = Product.objects.filter(stock__gt=0).order_by('-rating')[:8]
-    
-    # Get banners
-    banners = Banner.objects.filter(is_active=True).order_by('display_order')
-    
-    # Get categories for navigation
-    categories = Category.objects.filter(is_active=True)
-    
-    context = {
-        'featured_products': featured_products,
-        'best_sellers': best_sellers,
-        'banners': banners,
-        'categories': categories,
-    }
+    # Product lists, banners and categories come from the versioned cache
+    context = get_homepage_data()
     return render(request, 'storefront/homepage.html', context)
 
+# Keyset orderings for each sort option; each ends in 'id' to break ties.
+PRODUCT_SORT_ORDERINGS = {
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+    'rating': ('-display_rating', '-id'),
+    'newest': ('-id',),
+    'best_match': ('-display_rating', '-id'),
+}
+PRODUCTS_PER_PAGE = 12
+
 def product_list(request, category_slug=None, subcategory_slug=None):
     """Product listing page with filtering and search."""
     products = Product.objects.filter(stock__gt=0)
+    category = None
+    subcategory = None
     
-    # Filter by category
+    # Filter by category and subcategory, resolved from the in-process tree
     if category_slug:
-        category = get_object_or_404(Category, slug=category_slug, is_active=True)
-        products = products.filter(category=category.name)
-        
-        # Filter by subcategory
-        if subcategory_slug:
-            subcategory = get_object_or_404(SubCategory, slug=subcategory_slug, category=category)
-            products = products.filter(subcategory=subcategory.name)
-    else:
-        category = None
-        subcategory = None
+        category, subcategory = get_category_tree().resolve(category_slug, subcategory_slug)
+        products = products.filter(category_ref=category.id)
+        if subcategory:
+            products = products.filter(subcategory_ref=subcategory.id)
+    
+    facets = ProductFacets(request.GET)
+    products = facets.apply_range(products)
     
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(category__icontains=search_query) |
-            Q(subcategory__icontains=search_query)
-        )
+        products = search_products(products, search_query)
+    
+    # Facet counts for the result set before the facet selections narrow it;
+    # unsearched result sets are cached
+    cache_scope = None if search_query else (category_slug, subcategory_slug, facets.min_price, facets.max_price)
+    facet_options = facets.options(facets.grouped_rows(products, cache_scope))
+    products = facets.filter(products)
     
     # Sorting
     sort_by = request.GET.get('sort', 'best_match')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'rating':
-        products = products.order_by('-rating')
-    elif sort_by == 'newest':
-        products = products.order_by('-id')
-    else:  # best_match
-        products = products.order_by('-rating', '-id')
+    if sort_by not in PRODUCT_SORT_ORDERINGS:
+        sort_by = 'best_match'
+    if sort_by == 'best_match' and search_query:
+        # Relevance is a computed score, so it cannot be used as a keyset
+        ordering = ('-search_rank', '-display_rating', '-id')
+    else:
+        ordering = PRODUCT_SORT_ORDERINGS[sort_by]
+    products = products.order_by(*ordering).select_related('review_stats')
+    
+    # Counted once and shared by the paginator and the template. Setting
+    # STOREFRONT_COUNT_LIMIT caps the count for very large catalogues.
+    total_products, count_is_exact = count_results(
+        products, getattr(settings, 'STOREFRONT_COUNT_LIMIT', None)
+    )
     
-    # Pagination
-    paginator = Paginator(products, 12)
+    # Pagination: keyset cursors by default, page numbers for relevance
+    # ordering and for old ?page= links
+    query_params = request.GET.copy()
+    query_params.pop('page', None)
+    cursor = query_params.pop('cursor', [''])[-1]
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    use_cursor = 'search_rank' not in ordering[0] and not page_number
     
-    # Get categories for sidebar
-    categories = Category.objects.filter(is_active=True)
+    if use_cursor:
+        paginator = CursorPaginator(products, ordering, PRODUCTS_PER_PAGE)
+        try:
+            page_obj = paginator.page(cursor)
+        except InvalidCursor:
+            page_obj = paginator.page()
+    else:
+        paginator = Paginator(products, PRODUCTS_PER_PAGE)
+        if count_is_exact:
+            paginator.count = total_products
+        page_obj = paginator.get_page(page_number)
     
     context = {
         'products': page_obj,
+        'use_cursor': use_cursor,
+        'base_query': query_params.urlencode(),
         'category': category,
         'subcategory': subcategory,
-        'categories': categories,
         'search_query': search_query,
         'sort_by': sort_by,
-        'total_products': products.count(),
+        'total_products': total_products,
+        'count_is_exact': count_is_exact,
+        'facets': facets,
+        'facet_options': facet_options,
     }
     return render(request, 'storefront/product_list.html', context)
 
+# Keyset orderings for the review sorts; each ends in 'id' to break ties.
+REVIEW_SORT_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'highest': ('-rating', '-created_at', '-id'),
+    'verified': ('-is_verified_purchase', '-created_at', '-id'),
+}
+REVIEWS_PER_PAGE = 10
+
+def get_review_page(product_id, sort, cursor=''):
+    """One page of a product's reviews, with their users in the same query."""
+    if sort not in REVIEW_SORT_ORDERINGS:
+        sort = 'newest'
+    reviews = ProductReview.objects.filter(product_id=product_id).select_related('user')
+    paginator = CursorPaginator(reviews, REVIEW_SORT_ORDERINGS[sort], REVIEWS_PER_PAGE)
+    return paginator.page(cursor), sort
+
 def product_detail(request, product_id):
     """Product detail page."""
-    product = get_object_or_404(Product, id=product_id)
+    product = get_object_or_404(Product.objects.select_related('review_stats'), id=product_id)
     
-    # Get reviews
-    reviews = ProductReview.objects.filter(product=product).order_by('-created_at')
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    # The first page of reviews is rendered here and later pages load from
+    # product_reviews; the rating summary comes from the maintained stats
+    # row, which only exists once the product has a review
+    reviews, review_sort = get_review_page(product.id, request.GET.get('review_sort', 'newest'))
+    review_stats = getattr(product, 'review_stats', None)
     
     # Get related products
     related_products = Product.objects.filter(
-        category=product.category,
+        category_ref=product.category_ref_id,
         stock__gt=0
-    ).exclude(id=product.id)[:4]
+    ).select_related('review_stats').exclude(id=product.id)[:4]
     
-    # Get frequently bought together (simple implementation)
-    frequently_bought = Product.objects.filter(
-        category=product.category,
+    # Frequently bought together, from the mined association rules; fall
+    # back to the same category until the miner has rules for this product
+    frequently_bought = frequently_bought_with(product, 5) or list(Product.objects.filter(
+        category_ref=product.category_ref_id,
         stock__gt=0
-    ).exclude(id=product.id)[:5]
+    ).exclude(id=product.id)[:5])
+    prefetch_related_objects(frequently_bought, 'review_stats')
     
     context = {
         'product': product,
         'reviews': reviews,
-        'avg_rating': avg_rating,
+        'review_sort': review_sort,
+        'review_stats': review_stats,
+        'avg_rating': review_stats.average if review_stats else 0,
+        'review_count': review_stats.review_count if review_stats else 0,
         'related_products': related_products,
         'frequently_bought': frequently_bought,
     }
@@ -146,11 +196,12 @@ def product_detail(request, product_id):
 def shopping_cart(request):
     """Shopping cart page."""
     cart = get_or_create_cart(request)
-    cart_items = cart.items.all()
+    summary = build_cart_summary(cart)
     
     context = {
         'cart': cart,
-        'cart_items': cart_items,
+        'cart_summary': summary,
+        'cart_items': summary.lines,
     }
     return render(request, 'storefront/shopping_cart.html', context)
 
@@ -181,22 +232,13 @@ def add_to_cart(request):
         product = get_object_or_404(Product, id=product_id)
         cart = get_or_create_cart(request)
         
-        # Check if item already exists in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+        # Adds the line (or bumps its quantity) and updates the cart totals
+        cart.add_product(product, quantity)
         
         return JsonResponse({
             'success': True,
             'message': f'{product.name} added to cart',
-            'cart_total': cart.total_items,
-            'cart_price': float(cart.total_price)
+            **cart_totals_payload(cart.item_count, cart.subtotal)
         })
     
     except Exception as e:
@@ -213,19 +255,13 @@ def update_cart_item(request):
         item_id = data.get('item_id')
         quantity = int(data.get('quantity', 1))
         
-        cart_item = get_object_or_404(CartItem, id=item_id)
-        
-        if quantity <= 0:
-            cart_item.delete()
-        else:
-            cart_item.quantity = quantity
-            cart_item.save()
-        
+        cart_item = get_object_or_404(CartItem.objects.select_related('cart', 'product'), id=item_id)
         cart = cart_item.cart
+        cart.set_quantity(cart_item, quantity)
+        
         return JsonResponse({
             'success': True,
-            'cart_total': cart.total_items,
-            'cart_price': float(cart.total_price),
+            **cart_totals_payload(cart.item_count, cart.subtotal),
             'item_total': float(cart_item.total_price)
         })
     
@@ -242,15 +278,14 @@ def remove_from_cart(request):
         data = json.loads(request.body)
         item_id = data.get('item_id')
         
-        cart_item = get_object_or_404(CartItem, id=item_id)
+        cart_item = get_object_or_404(CartItem.objects.select_related('cart', 'product'), id=item_id)
         cart = cart_item.cart
-        cart_item.delete()
+        cart.remove_item(cart_item)
         
         return JsonResponse({
             'success': True,
             'message': 'Item removed from cart',
-            'cart_total': cart.total_items,
-            'cart_price': float(cart.total_price)
+            **cart_totals_payload(cart.item_count, cart.subtotal)
         })
     
     except Exception as e:
@@ -259,6 +294,79 @@ def remove_from_cart(request):
             'message': 'Error removing item from cart'
         })
 
+@require_POST
+def checkout(request):
+    """Place an order for the whole cart via AJAX."""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        data = None
+    shipping_address = data.get('shipping_address') if isinstance(data, dict) else None
+    if not isinstance(shipping_address, str) or not shipping_address.strip():
+        return JsonResponse({
+            'success': False,
+            'message': 'A shipping address is required.'
+        }, status=400)
+
+    cart = get_or_create_cart(request)
+    customer = None
+    if request.user.is_authenticated:
+        customer = Customer.objects.filter(user=request.user).first()
+
+    try:
+        order = place_order(cart, shipping_address, customer)
+    except CheckoutError as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        })
+
+    return JsonResponse({
+        'success': True,
+        'message': f'Order {order.oID} placed',
+        'order_id': order.id,
+        **cart_totals_payload(cart.item_count, cart.subtotal)
+    })
+
+# --- Search AJAX Views ---
+
+@require_GET
+def search_suggest(request):
+    """Autocomplete suggestions for the header search box."""
+    query = request.GET.get('q', '')
+    return JsonResponse({
+        'success': True,
+        'suggestions': suggest(query),
+    })
+
+# --- Review AJAX Views ---
+
+@require_GET
+def product_reviews(request, product_id):
+    """A page of a product's reviews as JSON, for "Load more" and re-sorting."""
+    try:
+        page, sort = get_review_page(product_id, request.GET.get('sort', 'newest'), request.GET.get('cursor', ''))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+    return JsonResponse({
+        'success': True,
+        'sort': sort,
+        'reviews': [
+            {
+                'id': review.id,
+                'username': review.user.username,
+                'rating': review.rating,
+                'title': review.title,
+                'comment': review.comment,
+                'created_at': review.created_at.isoformat(),
+                'date': date_format(timezone.localtime(review.created_at), 'M d, Y'),
+                'is_verified_purchase': review.is_verified_purchase,
+            }
+            for review in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
+
 # --- Wishlist AJAX Views ---
 
 @login_required